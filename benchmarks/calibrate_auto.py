@@ -0,0 +1,163 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Calibrate the costs used by the "auto" sequence diff algorithm.
+
+Times each sequence diff algorithm on generated line sequences, and
+prints:
+
+- the cost per unit of work of each algorithm, in nanoseconds, as used
+  by the auto_costs diff setting
+- the measured crossover points, the fraction of changed lines above
+  which brute force beats Myers' algorithm for some lengths, and the
+  length above which difflib beats Myers' algorithm
+
+With a filename, the costs are also written to it as a diff config,
+which can be used as nbdime_diff.json in the Jupyter config directory.
+
+Usage:
+
+    python benchmarks/calibrate_auto.py [nbdime_diff.json]
+"""
+
+from __future__ import print_function, unicode_literals
+
+import io
+import json
+import random
+import os
+import sys
+import timeit
+
+# Run against the nbdime of this source tree
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+
+from nbdime.config import DiffConfig
+from nbdime.diffing.seq_auto import estimate_edit_distance
+from nbdime.diffing.seq_bruteforce import bruteforce_compute_lcs
+from nbdime.diffing.seq_difflib import diff_sequence_difflib
+from nbdime.diffing.seq_hirschberg import hirschberg_lcs_indices
+from nbdime.diffing.seq_myers import myers_lcs_indices
+
+
+rng = random.Random(42)
+
+
+def lines(n):
+    return ["line %d\n" % rng.randint(0, 10**9) for i in range(n)]
+
+
+def edited(a, fraction):
+    "Replace a fraction of the lines of a at random positions."
+    b = list(a)
+    for i in rng.sample(range(len(b)), int(fraction * len(b))):
+        b[i] = "new %d\n" % rng.randint(0, 10**9)
+    return b
+
+
+def seconds(f, *args):
+    "Best time of a call of f(*args)."
+    number = max(1, int(0.05 / max(timeit.timeit(lambda: f(*args), number=1), 1e-6)))
+    return min(timeit.repeat(lambda: f(*args), number=number, repeat=3)) / number
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def edit_distance(a, b):
+    return len(a) + len(b) - 2 * len(myers_lcs_indices(a, b)[0])
+
+
+def measure_costs():
+    "Measure the auto_costs, in nanoseconds per unit of work."
+    grids = [(lines(n), lines(n)) for n in (100, 200, 400)]
+    similar = [(a, edited(a, f)) for a in (lines(500), lines(2000))
+               for f in (0.01, 0.05, 0.2, 0.5)]
+    costs = {
+        "bruteforce": median(seconds(bruteforce_compute_lcs, a, b) / (len(a) * len(b))
+                             for a, b in grids),
+        "hirschberg": median(seconds(hirschberg_lcs_indices, a, b) / (len(a) * len(b))
+                             for a, b in grids),
+        "difflib": median(seconds(diff_sequence_difflib, a, b) / (len(a) + len(b))
+                          for a, b in similar),
+        "estimate": median(seconds(estimate_edit_distance, a, b) / (len(a) + len(b))
+                           for a, b in similar),
+        "estimate_call": seconds(estimate_edit_distance, ["a\n"], ["b\n"]),
+    }
+    costs["myers"], costs["myers_item"] = fit_myers(grids + similar)
+    return dict((k, int(round(v * 1e9))) for k, v in costs.items())
+
+
+def fit_myers(pairs):
+    "Least squares fit of the time of Myers' algorithm to myers*D**2 + myers_item*(N+M)."
+    rows = []
+    for a, b in pairs:
+        D = edit_distance(a, b)
+        rows.append((D * D, len(a) + len(b), seconds(myers_lcs_indices, a, b)))
+    # Relative errors, so that short sequences count as much as long ones
+    rows = [(x / t, y / t, 1.0) for x, y, t in rows]
+    sxx = sum(x * x for x, y, t in rows)
+    sxy = sum(x * y for x, y, t in rows)
+    syy = sum(y * y for x, y, t in rows)
+    sx = sum(x for x, y, t in rows)
+    sy = sum(y for x, y, t in rows)
+    det = sxx * syy - sxy * sxy
+    return (max(0.0, (sx * syy - sy * sxy) / det),
+            max(0.0, (sy * sxx - sx * sxy) / det))
+
+
+def myers_crossover(n):
+    "Fraction of changed lines above which brute force is faster than Myers."
+    a = lines(n)
+    for percent in range(5, 101, 5):
+        b = edited(a, percent / 100.0)
+        if seconds(bruteforce_compute_lcs, a, b) < seconds(myers_lcs_indices, a, b):
+            return percent / 100.0
+    return None
+
+
+def difflib_crossover(fraction):
+    "Length above which difflib is faster than Myers, with a fraction of changed lines."
+    n = 250
+    while n <= 64000:
+        a = lines(n)
+        b = edited(a, fraction)
+        if seconds(diff_sequence_difflib, a, b) < seconds(myers_lcs_indices, a, b):
+            return n
+        n *= 2
+    return None
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    costs = measure_costs()
+    defaults = DiffConfig.defaults["auto_costs"]
+    print("%-16s %10s %10s" % ("cost", "measured", "default"))
+    for name in sorted(costs):
+        print("%-16s %10d %10d" % (name, costs[name], defaults[name]))
+
+    print()
+    print("%-16s %10s" % ("lines", "myers until"))
+    for n in (50, 200, 1000):
+        print("%-16d %10s" % (n, myers_crossover(n)))
+
+    print()
+    print("%-16s %10s" % ("changed", "difflib from"))
+    for fraction in (0.01, 0.1):
+        print("%-16s %10s" % (fraction, difflib_crossover(fraction)))
+
+    if args:
+        with io.open(args[0], "w", encoding="utf8") as f:
+            f.write(json.dumps({"auto_costs": costs}, indent=2, sort_keys=True))
+        print()
+        print("Wrote", args[0])
+
+
+if __name__ == "__main__":
+    main()
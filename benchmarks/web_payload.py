@@ -0,0 +1,94 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Benchmark payload size and encoding time of web API responses.
+
+Computes the /api/diff and /api/merge response data for the notebooks in
+nbdime/tests/files (or the notebooks given on the command line), and
+prints the encoded size and encode time for each available format and
+content encoding.
+
+Usage:
+
+    python benchmarks/web_payload.py [notebook ...]
+"""
+
+from __future__ import print_function, unicode_literals
+
+import glob
+import os
+import sys
+import timeit
+
+import nbformat
+
+here = os.path.dirname(os.path.abspath(__file__))
+# Run against the nbdime of this source tree
+sys.path.insert(0, os.path.join(here, os.pardir))
+
+import nbdime
+from nbdime.merging.notebooks import decide_notebook_merge
+from nbdime.webapp import encoding
+from nbdime.webapp.nbdimeserver import _mergetool_args
+
+
+files = os.path.join(here, os.pardir, "nbdime", "tests", "files")
+
+
+def load(path):
+    return nbformat.read(path, as_version=4)
+
+
+def payloads(paths):
+    "Yield (name, data) for the diff and merge responses of the notebooks."
+    groups = {}
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        groups.setdefault(name.split("--")[0], []).append(path)
+    for prefix, group in sorted(groups.items()):
+        # The base notebook of a group has no "--" suffix, if present
+        group = sorted(group, key=lambda p: ("--" in os.path.basename(p), p))
+        nbs = [load(p) for p in group]
+        if len(nbs) >= 2:
+            base, remote = nbs[0], nbs[-1]
+            yield prefix + " diff", {
+                "base": base, "diff": nbdime.diff_notebooks(base, remote)}
+        if len(nbs) >= 3:
+            base, local, remote = nbs[:3]
+            # The decisions computed by the server for /api/merge
+            merge_decisions = decide_notebook_merge(
+                base, local, remote, args=_mergetool_args())
+            yield prefix + " merge", {
+                "base": base, "merge_decisions": merge_decisions}
+
+
+def variants():
+    formats = ["json"]
+    if encoding.msgpack is not None:
+        formats.append("msgpack")
+    for fmt in formats:
+        yield fmt, None
+        for enc in encoding.available_encodings():
+            yield fmt, enc
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    paths = args or glob.glob(os.path.join(files, "*.ipynb"))
+    print("%-40s %-16s %10s %10s" % ("payload", "encoding", "bytes", "ms"))
+    for name, data in payloads(paths):
+        for fmt, enc in variants():
+            body, _ = encoding.encode_payload(data, fmt, enc)
+            number = 10
+            t = timeit.timeit(
+                lambda: encoding.encode_payload(data, fmt, enc), number=number)
+            label = fmt if enc is None else "%s+%s" % (fmt, enc)
+            print("%-40s %-16s %10d %10.3f" % (
+                name, label, len(body), 1000.0 * t / number))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,9 @@
 
 from __future__ import unicode_literals
 
-from ._version import __version__
+import sys
 
-from .diffing import diff, diff_notebooks
-from .patching import patch, patch_notebook
-from .merging import merge_notebooks, decide_merge, apply_decisions
+from ._version import __version__
 
 __all__ = [
     "__version__",
@@ -17,3 +15,37 @@ __all__ = [
     "patch", "patch_notebook",
     "decide_merge", "merge_notebooks", "apply_decisions"
     ]
+
+# Modules providing the public functions. Entry points like the git
+# drivers run once per file, so they should not pay for importing
+# diffing, merging and nbformat just by importing nbdime.
+_lazy_attributes = {
+    "diff": "nbdime.diffing",
+    "diff_notebooks": "nbdime.diffing",
+    "patch": "nbdime.patching",
+    "patch_notebook": "nbdime.patching",
+    "decide_merge": "nbdime.merging",
+    "merge_notebooks": "nbdime.merging",
+    "apply_decisions": "nbdime.merging",
+    }
+
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        # Only called for attributes not found the normal way (PEP 562)
+        module = _lazy_attributes.get(name)
+        if module is None:
+            raise AttributeError(
+                "module %r has no attribute %r" % (__name__, name))
+        import importlib
+        value = getattr(importlib.import_module(module), name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_lazy_attributes))
+
+else:
+    from .diffing import diff, diff_notebooks
+    from .patching import patch, patch_notebook
+    from .merging import merge_notebooks, decide_merge, apply_decisions
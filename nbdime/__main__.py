@@ -14,7 +14,7 @@ try:
 except ImportError:
     from backports.shutil_which import which
 
-COMMANDS = ["show", "diff", "merge", "diff-web", "merge-web", "mergetool"]
+COMMANDS = ["show", "diff", "merge", "diff-web", "merge-web", "mergetool", "daemon"]
 
 
 def main_dispatch(args=None):
@@ -36,6 +36,8 @@ def main_dispatch(args=None):
         from nbdime.webapp.nbdiffweb import main
     elif cmd == "merge-web":
         from nbdime.webapp.nbmergeweb import main
+    elif cmd == "daemon":
+        from nbdime.daemon import main
     elif cmd == 'mergetool':
         if not which('git'):
             sys.exit("Cannot use \"nbdime mergetool\" alias as git is not preset on path")
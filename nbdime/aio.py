@@ -0,0 +1,89 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Coroutines for using nbdime from asyncio applications.
+
+The diff and merge functions are CPU heavy, and would block the event
+loop if called directly. The coroutines here run them in the executor
+shared with the nbdime web server, see nbdime.executor.shared_executor,
+or in an executor given by the caller. At most a bounded number of
+computations are pending at a time, more are refused with QueueFull.
+Notebooks are only cached when read through a NotebookCache given by
+the caller, like the one of an nbdime web app.
+
+Cancelling the awaiting task drops a computation that has not started
+yet. A computation that is already running completes in its thread,
+and its result is discarded.
+
+Requires Python 3.5 or later.
+"""
+
+from __future__ import unicode_literals
+
+import asyncio
+
+from .executor import shared_executor, QueueFull
+
+
+__all__ = ["run", "read_notebook", "diff_notebooks",
+           "decide_notebook_merge", "apply_decisions", "merge_notebooks",
+           "QueueFull"]
+
+
+async def run(fn, *args, executor=None):
+    """Call fn(*args) in the executor, and return its result.
+
+    Raises QueueFull if the executor is at capacity.
+    """
+    if executor is None:
+        executor = shared_executor()
+    future = executor.submit(fn, *args)
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+
+
+async def read_notebook(filename, cache=None, executor=None):
+    """Read a notebook file.
+
+    With a NotebookCache, like the one of an nbdime web app, the notebook
+    is read through the cache and validated. Otherwise it is read with
+    nbdime.loader.read_notebook, which leaves large outputs unparsed.
+    """
+    if cache is not None:
+        return (await run(cache.read, filename, executor=executor))[0]
+    from .loader import read_notebook
+    return await run(read_notebook, filename, executor=executor)
+
+
+async def diff_notebooks(a, b, executor=None):
+    "Compute the diff of two notebooks, see nbdime.diff_notebooks."
+    from .diffing import diff_notebooks
+    return await run(diff_notebooks, a, b, executor=executor)
+
+
+async def decide_notebook_merge(base, local, remote, args=None, executor=None):
+    "Compute merge decisions, see nbdime.merging.decide_notebook_merge."
+    from .merging.notebooks import decide_notebook_merge
+    return await run(decide_notebook_merge, base, local, remote, args,
+                     executor=executor)
+
+
+async def apply_decisions(base, decisions, executor=None):
+    "Apply merge decisions to base, see nbdime.apply_decisions."
+    from .merging import apply_decisions
+    return await run(apply_decisions, base, decisions, executor=executor)
+
+
+async def merge_notebooks(base, local, remote, args=None, executor=None):
+    """Merge notebooks, see nbdime.merge_notebooks.
+
+    Returns the merged notebook and the merge decisions.
+    """
+    from .merging import merge_notebooks
+    return await run(merge_notebooks, base, local, remote, args,
+                     executor=executor)
@@ -8,6 +8,7 @@ import logging
 import os
 
 from ._version import __version__
+from .config import profiles, load_config, default_config, parse_value
 from .log import init_logging, set_nbdime_log_level
 
 class LogLevelAction(argparse.Action):
@@ -57,6 +58,81 @@ def add_web_args(parser, default_port=8888):
         help="specify the working directory you want "
              "the server to run from. Default is the "
              "actual cwd at program start.")
+    parser.add_argument(
+        '--workers',
+        default=None,
+        type=int,
+        help="number of diff/merge computations the server runs "
+             "concurrently. Default is the workers diff setting, 4.")
+    parser.add_argument(
+        '--max-queue',
+        default=None,
+        type=int,
+        help="number of computations allowed to wait for a free worker "
+             "before the server responds with 503 (busy). Default is 16.")
+    parser.add_argument(
+        '--request-timeout',
+        default=None,
+        type=float,
+        help="time limit in seconds for a single diff/merge computation. "
+             "By default there is no limit.")
+    parser.add_argument(
+        '--notebook-cache-size',
+        default=None,
+        type=float,
+        help="memory limit in megabytes (measured as file size) for "
+             "notebooks the server keeps parsed in memory. Default is 256, "
+             "0 disables the cache.")
+    parser.add_argument(
+        '--result-cache-size',
+        default=None,
+        type=float,
+        help="memory limit in megabytes (measured as JSON size) for "
+             "diff and merge results the server keeps in memory. "
+             "Default is 64, 0 disables the cache.")
+    parser.add_argument(
+        '--fetch-timeout',
+        default=None,
+        type=float,
+        help="timeout in seconds when fetching notebooks given as URLs. "
+             "Default is 30.")
+    parser.add_argument(
+        '--fetch-max-size',
+        default=None,
+        type=float,
+        help="size limit in megabytes for notebooks given as URLs. "
+             "Default is 512.")
+    parser.add_argument(
+        '--blob-threshold',
+        default=None,
+        type=float,
+        help="size in kilobytes from which output values are sent "
+             "separately from diff and merge responses, for clients "
+             "that ask for it. Default is 64.")
+    parser.add_argument(
+        '--blob-store-size',
+        default=None,
+        type=float,
+        help="memory limit in megabytes for output values kept for "
+             "separate transfer. Default is 256.")
+
+
+def args_for_server(arguments):
+    """Collect the server tuning options added by add_web_args.
+
+    Returns a dict of keyword arguments for the web server.
+    """
+    return dict(
+        workers=arguments.workers,
+        max_queue=arguments.max_queue,
+        request_timeout=arguments.request_timeout,
+        notebook_cache_size=arguments.notebook_cache_size,
+        result_cache_size=arguments.result_cache_size,
+        fetch_timeout=arguments.fetch_timeout,
+        fetch_max_size=arguments.fetch_max_size,
+        blob_threshold=arguments.blob_threshold,
+        blob_store_size=arguments.blob_store_size,
+    )
 
 
 def add_diff_args(parser):
@@ -66,14 +142,66 @@ def add_diff_args(parser):
         Merge applications also performs diff operations to compute
         the merge, so these arguments should also be included there.
     """
-    # TODO: Add diff strategy options that are reusable for the
-    # merge command here
-
-    # TODO: Define sensible strategy variables and implement
-    #parser.add_argument('-d', '--diff-strategy',
-    #                    default="default", choices=("foo", "bar"),
-    #                    help="specify the diff strategy to use.")
-    pass
+    parser.add_argument(
+        '--diff-profile',
+        default=None,
+        choices=sorted(profiles),
+        help="Set of diff settings to start from. 'fast' trades diff "
+             "quality for speed on large notebooks, 'precise' finds "
+             "minimal diffs at a higher cost. Default is 'default', or "
+             "the profile of the diff config file.")
+    parser.add_argument(
+        '--diff-config',
+        default=None,
+        metavar='FILE',
+        help="JSON file with diff settings. Default is nbdime_diff.json "
+             "in the Jupyter config directory.")
+    parser.add_argument(
+        '--diff-option',
+        default=[],
+        action='append',
+        metavar='NAME=VALUE',
+        help="Set a diff setting, e.g. line_similarity=0.8. Can be "
+             "repeated. Values are parsed as JSON if possible.")
+
+
+def add_diff_render_args(parser):
+    """Adds arguments for commands that print diffs to the terminal."""
+    parser.add_argument(
+        '--external-diff',
+        action='store_true',
+        default=False,
+        help="Render the line diffs of sources and outputs with git diff, "
+             "or diff if git is missing, instead of in-process. Slower, "
+             "but follows the git diff configuration.")
+
+
+def diff_config_from_args(arguments, parser=None):
+    """Load the DiffConfig selected by the arguments added by add_diff_args.
+
+    Returns the default config when arguments is None or has no
+    diff arguments. Invalid settings raise ValueError, or are reported
+    with parser.error when parser is given.
+    """
+    if arguments is None or not hasattr(arguments, "diff_profile"):
+        return default_config()
+    try:
+        settings = {}
+        for option in arguments.diff_option:
+            name, sep, value = option.partition("=")
+            if not sep:
+                raise ValueError("Diff option %r is not of the form "
+                                 "NAME=VALUE." % (option,))
+            settings[name.strip().replace("-", "_")] = parse_value(value)
+        if (arguments.diff_profile is None and
+                arguments.diff_config is None and not settings):
+            return default_config()
+        return load_config(profile=arguments.diff_profile, settings=settings,
+                           filename=arguments.diff_config)
+    except ValueError as e:
+        if parser is None:
+            raise
+        parser.error(str(e))
 
 
 def add_merge_args(parser):
@@ -0,0 +1,178 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""In-process caches for parsed notebooks and computed results.
+
+Objects handed out by these caches are shared between all callers,
+and must be treated as read-only.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import nbformat
+
+
+__all__ = ["LRUCache", "NotebookCache", "content_digest"]
+
+
+def content_digest(data):
+    "Compute a hex digest identifying the given bytes."
+    return hashlib.sha1(data).hexdigest()
+
+
+class LRUCache(object):
+    """A thread safe least-recently-used cache with a total size limit.
+
+    Each entry is stored with a size estimate given by the caller.
+    When the sum of sizes exceeds `max_size`, the least recently used
+    entries are evicted. A `max_size` of 0 disables the cache.
+
+    Values computed through get_or_compute are also tracked while
+    being computed, so that concurrent callers share one computation.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        "Look up key, counting the lookup as a hit or a miss."
+        with self._lock:
+            try:
+                value, size = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            # Reinsert to mark as most recently used
+            self._entries[key] = (value, size)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, size=1):
+        "Store value under key, evicting old entries as needed."
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            if size > self.max_size:
+                # Would evict everything else and still not fit
+                return
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def get_or_compute(self, key, compute, size=None):
+        """Look up key, or compute and store its value with compute().
+
+        If the value is already being computed by another thread, wait
+        for that computation instead of starting a second one. The size
+        of computed values is estimated by `size(value)`, or 1.
+
+        Returns a tuple (value, status), where status is "hit", "miss"
+        or "wait" for values that were found, computed or waited for.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+                self.hits += 1
+                return entry[0], "hit"
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            return future.result(), "wait"
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        self.put(key, value, size=1 if size is None else size(value))
+        with self._lock:
+            del self._inflight[key]
+        future.set_result(value)
+        return value, "miss"
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class NotebookCache(object):
+    """Cache of parsed notebooks, keyed by path, mtime and file size.
+
+    A changed file gets a new key, so stale entries are never returned,
+    they simply age out of the cache. Along with each notebook the cache
+    keeps a digest of the file contents, which identifies the notebook
+    independently of its path.
+    """
+
+    def __init__(self, max_size):
+        self.entries = LRUCache(max_size)
+
+    def read(self, path):
+        """Read a notebook file, returning (notebook, digest, hit).
+
+        `hit` tells whether the notebook was found in the cache.
+        The size limit of the cache is applied to the file sizes.
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        mtime = getattr(st, "st_mtime_ns", st.st_mtime)
+        key = (path, mtime, st.st_size)
+
+        def load():
+            with io.open(path, "rb") as f:
+                return self.parse(f.read())
+
+        entry, status = self.entries.get_or_compute(
+            key, load, size=lambda entry: st.st_size)
+        return entry + (status != "miss",)
+
+    def reads(self, data):
+        """Parse notebook bytes, returning (notebook, digest, hit).
+
+        Notebooks read this way are cached by their content digest.
+        """
+        digest = content_digest(data)
+        nb, status = self.entries.get_or_compute(
+            ("digest", digest),
+            lambda: nbformat.reads(data.decode("utf8"), as_version=4),
+            size=lambda nb: len(data))
+        return nb, digest, status != "miss"
+
+    def parse(self, data):
+        "Parse notebook bytes, returning (notebook, digest)."
+        nb = nbformat.reads(data.decode("utf8"), as_version=4)
+        return nb, content_digest(data)
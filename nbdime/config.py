@@ -0,0 +1,326 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Settings of the diff algorithms.
+
+A DiffConfig holds the settings that trade diff quality for speed and
+memory. Settings start from a profile, "default", "fast" or "precise",
+and can be changed by a config file, by environment variables and by
+command line arguments, in increasing order of precedence:
+
+- The config file is nbdime_diff.json in the Jupyter config directory,
+  or the file named by NBDIME_DIFF_CONFIG. It holds a JSON object of
+  settings, and optionally the name of a "profile".
+- NBDIME_DIFF_PROFILE selects a profile, and NBDIME_DIFF_<NAME> sets
+  the setting <name>, e.g. NBDIME_DIFF_LINE_SIMILARITY=0.8.
+- The command line arguments added by nbdime.args.add_diff_args.
+
+Values from the environment and the command line are parsed as JSON
+when possible, and taken as strings otherwise.
+"""
+
+from __future__ import unicode_literals
+
+import copy
+import io
+import json
+import logging
+import numbers
+import os
+import threading
+
+import six
+
+
+__all__ = ["DiffConfig", "profiles", "algorithm_names", "similarity_ratios",
+           "load_config", "parse_value",
+           "default_config", "set_default_config"]
+
+
+class DiffConfig(object):
+    """Settings of the diff algorithms.
+
+    algorithm
+        Sequence diff algorithm, "bruteforce", "myers", "difflib" or
+        "auto", or None for the module default,
+        nbdime.diffing.sequences.diff_sequence_algorithm. "auto"
+        chooses one for each pair of sequences, see
+        nbdime.diffing.seq_auto.
+    algorithms
+        Algorithms for specific JSON paths, like "/cells/*/source" for
+        the lines of sources. difflib is only used where items are
+        compared exactly.
+    auto_costs
+        Estimated cost of the algorithms per unit of work, for "auto":
+        per pair of items for "bruteforce", and for "hirschberg" when
+        the grids would exceed grid_memory_limit, per square of the
+        number of inserted and deleted items for "myers" plus per item
+        for "myers_item", and per item for "difflib". Estimating the
+        similarity costs "estimate" per item plus "estimate_call",
+        inputs cheaper than that are diffed by brute force.
+    auto_hash_min_size
+        Combined length of sequences from which "auto" may choose
+        difflib, for items compared exactly.
+    source_similarity, line_similarity
+        Ratio above which cell sources, or lines, are aligned as
+        similar. None aligns only equal sources, or lines.
+    similarity_ratio
+        The difflib.SequenceMatcher estimate used for the final
+        similarity check, "ratio", "quick_ratio" or "real_quick_ratio".
+    approximate_max_length
+        Strings longer than this are only compared exactly.
+    split_mimes
+        Prefixes of mimetypes of output data diffed line by line.
+    split_max_size
+        Output data longer than this is replaced, not diffed by line.
+    grid_memory_limit
+        Bytes the brute force algorithm may use for its grids before
+        switching to the linear space algorithm.
+    workers
+        Number of diff and merge computations run concurrently by
+        servers and nbdime.aio, unless given explicitly.
+    """
+
+    defaults = {
+        "algorithm": None,
+        "algorithms": {},
+        "auto_costs": {"bruteforce": 300, "hirschberg": 500, "myers": 140,
+                       "myers_item": 400, "difflib": 3000, "estimate": 500,
+                       "estimate_call": 6500},
+        "auto_hash_min_size": 10000,
+        "source_similarity": 0.7,
+        "line_similarity": 0.7,
+        "similarity_ratio": "ratio",
+        "approximate_max_length": None,
+        "split_mimes": ("text/", "image/svg+xml", "application/javascript",
+                        "application/json"),
+        "split_max_size": None,
+        "grid_memory_limit": 2**27,
+        "workers": 4,
+    }
+
+    def __init__(self, profile="default", **settings):
+        if profile not in profiles:
+            raise ValueError("Unknown diff profile %r, use one of %s." % (
+                profile, ", ".join(sorted(profiles))))
+        self.profile = profile
+        self.update(**copy.deepcopy(self.defaults))
+        self.update(**copy.deepcopy(profiles[profile]))
+        self.update(**settings)
+
+    def update(self, **settings):
+        "Change settings, raising ValueError for unknown or invalid ones."
+        checked = {}
+        for name, value in settings.items():
+            if name not in self.defaults:
+                raise ValueError("Unknown diff setting %r." % (name,))
+            checked[name] = _check_setting(name, value)
+        for name, value in checked.items():
+            setattr(self, name, value)
+
+    def settings(self):
+        "The settings as a dict."
+        return dict((name, getattr(self, name)) for name in self.defaults)
+
+    def algorithm_for(self, path, exact=True):
+        """The sequence diff algorithm to use for the items at path.
+
+        exact tells if the items are compared exactly, otherwise only
+        bruteforce is possible.
+        """
+        algorithm = self.algorithms.get(path or "/", self.algorithm)
+        if algorithm == "difflib" and not exact:
+            return "bruteforce"
+        return algorithm
+
+    def __eq__(self, other):
+        return isinstance(other, DiffConfig) and self.settings() == other.settings()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        changed = ", ".join("%s=%r" % (name, value)
+                            for name, value in sorted(self.settings().items())
+                            if value != DiffConfig.defaults[name])
+        return "DiffConfig(%s)" % changed
+
+
+algorithm_names = ("bruteforce", "myers", "difflib", "auto")
+
+similarity_ratios = ("ratio", "quick_ratio", "real_quick_ratio")
+
+# Settings that are numbers, with their minimum and whether they may
+# be None
+_numbers = {
+    "auto_hash_min_size": (0, False),
+    "approximate_max_length": (0, True),
+    "split_max_size": (0, True),
+    "grid_memory_limit": (0, False),
+    "workers": (1, False),
+}
+
+
+def _is_number(value):
+    return (isinstance(value, numbers.Real) and
+            not isinstance(value, bool))
+
+
+def _check_setting(name, value):
+    "Check the value of a setting, returning it in normalized form."
+    def invalid(expected):
+        return ValueError("Invalid value %r for diff setting %r, "
+                          "expected %s." % (value, name, expected))
+
+    if name in ("source_similarity", "line_similarity"):
+        if value is not None and not (_is_number(value) and 0 <= value <= 1):
+            raise invalid("a ratio between 0 and 1 or null")
+    elif name in _numbers:
+        minimum, optional = _numbers[name]
+        if not (value is None and optional or
+                _is_number(value) and value >= minimum):
+            raise invalid("a number of at least %s%s" % (
+                minimum, " or null" if optional else ""))
+    elif name == "algorithm":
+        if value is not None and value not in algorithm_names:
+            raise invalid("one of %s or null" % ", ".join(algorithm_names))
+    elif name == "algorithms":
+        if not isinstance(value, dict) or not all(
+                isinstance(path, six.string_types) and
+                algorithm in algorithm_names
+                for path, algorithm in value.items()):
+            raise invalid("an object mapping paths to one of %s" %
+                          ", ".join(algorithm_names))
+    elif name == "auto_costs":
+        if not isinstance(value, dict) or not all(
+                cost in DiffConfig.defaults[name] and _is_number(v) and v >= 0
+                for cost, v in value.items()):
+            raise invalid("an object mapping some of %s to numbers" %
+                          ", ".join(sorted(DiffConfig.defaults[name])))
+        # Costs not given keep their defaults
+        value = dict(DiffConfig.defaults[name], **value)
+    elif name == "similarity_ratio":
+        if value not in similarity_ratios:
+            raise invalid("one of %s" % ", ".join(similarity_ratios))
+    elif name == "split_mimes":
+        if (isinstance(value, six.string_types) or
+                not isinstance(value, (list, tuple)) or
+                not all(isinstance(m, six.string_types) for m in value)):
+            raise invalid("a list of mimetype prefixes")
+        value = tuple(value)
+    return value
+
+
+# Settings changed by each profile
+profiles = {
+    "default": {},
+    # Cheaper similarity estimates, exact line alignment with the
+    # fastest algorithm, and large or long values compared as a whole
+    "fast": {
+        "algorithm": "auto",
+        "line_similarity": None,
+        "similarity_ratio": "quick_ratio",
+        "approximate_max_length": 10000,
+        "split_max_size": 2**16,
+        "grid_memory_limit": 2**25,
+    },
+    # Minimal diffs, with the exact lcs of long sequences as long as
+    # the grids fit in a generous amount of memory
+    "precise": {
+        "algorithm": "bruteforce",
+        "grid_memory_limit": 2**30,
+    },
+}
+
+
+def parse_value(value):
+    "Parse a setting given as a string, as JSON if possible."
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def _config_filename(environ):
+    filename = environ.get("NBDIME_DIFF_CONFIG")
+    if filename:
+        return filename
+    try:
+        from jupyter_core.paths import jupyter_config_dir
+    except ImportError:
+        return None
+    return os.path.join(jupyter_config_dir(), "nbdime_diff.json")
+
+
+def load_config(profile=None, settings=None, environ=None, filename=None):
+    """Load a DiffConfig from the config file, the environment and settings.
+
+    profile and settings take precedence over the profile and settings
+    of the environment, which take precedence over the config file.
+    The config file is filename if given, otherwise the default one.
+    """
+    if environ is None:
+        environ = os.environ
+    # Only the default config file may be missing
+    required = filename is not None or bool(environ.get("NBDIME_DIFF_CONFIG"))
+    if filename is None:
+        filename = _config_filename(environ)
+
+    from_file = {}
+    if filename and (required or os.path.exists(filename)):
+        try:
+            with io.open(filename, encoding="utf8") as f:
+                from_file = json.load(f)
+        except (IOError, OSError, ValueError) as e:
+            raise ValueError("Failed to read diff config file %s: %s" %
+                             (filename, e))
+        if not isinstance(from_file, dict):
+            raise ValueError("Diff config file %s must hold an object." % filename)
+
+    prefix = "NBDIME_DIFF_"
+    from_env = {}
+    for name in DiffConfig.defaults:
+        key = prefix + name.upper()
+        if key in environ:
+            from_env[name] = parse_value(environ[key])
+
+    profile = (profile or environ.get(prefix + "PROFILE") or
+               from_file.pop("profile", None) or "default")
+    from_file.pop("profile", None)
+    config = DiffConfig(profile, **from_file)
+    config.update(**from_env)
+    config.update(**(settings or {}))
+    return config
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_config():
+    """The config used when none is given.
+
+    Loaded with load_config on first use, unless set with
+    set_default_config. Invalid settings in the config file or the
+    environment are logged, and the default profile is used instead.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            try:
+                _default = load_config()
+            except ValueError as e:
+                logging.getLogger("nbdime").warning(
+                    "Ignoring diff settings: %s", e)
+                _default = DiffConfig()
+        return _default
+
+
+def set_default_config(config):
+    "Replace the default config, returning the previous one."
+    global _default
+    with _default_lock:
+        previous, _default = _default, config
+    return previous
@@ -0,0 +1,357 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Background daemon running the git drivers for notebooks.
+
+The daemon keeps nbdime imported, and the parsed notebooks and compiled
+schema validators in memory, so that git drivers forwarding their work
+to it (see nbdime.daemonclient) skip the interpreter and import start up
+that otherwise dominates commands like `git log -p`.
+
+Start it with:
+
+    nbdime daemon start
+
+Requests are handled one at a time. While handling a request, the
+daemon takes on the working directory, environment, arguments and
+standard streams of the driver that forwarded it, and loads the diff
+settings again from that environment.
+"""
+
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import errno
+import importlib
+import io
+import json
+import logging
+import os
+import struct
+import subprocess
+import sys
+import time
+import traceback
+from argparse import ArgumentParser
+
+from six import text_type
+from six.moves import socketserver
+
+import nbdime
+import nbdime.log
+from .args import add_generic_args
+from .cache import NotebookCache
+from .config import set_default_config
+from .daemonclient import (connect, socket_path, frame_header, send_request,
+    receive_response, STDOUT, STDERR, EXIT, REFUSED)
+
+
+__all__ = ["DaemonServer"]
+
+
+_logger = logging.getLogger(__name__)
+
+
+# Commands the daemon runs, and the functions running them in-process
+drivers = {
+    "git-nbdiffdriver": "nbdime.gitdiffdriver:main_local",
+    "git-nbmergedriver": "nbdime.gitmergedriver:main_local",
+    }
+
+# Defaults for the daemon
+default_idle_timeout = 3600  # seconds
+default_notebook_cache_size = 128  # megabytes
+
+
+def _load(name):
+    module, _, func = name.partition(":")
+    return getattr(importlib.import_module(module), func)
+
+
+class FrameWriter(object):
+    """A text stream writing frames on a channel of a daemon connection."""
+
+    encoding = "utf-8"
+
+    def __init__(self, wfile, channel, tty=False):
+        self.wfile = wfile
+        self.channel = channel
+        self.tty = tty
+        # For code writing bytes to sys.stdout.buffer
+        self.buffer = self
+
+    def write(self, text):
+        data = text.encode("utf8") if isinstance(text, text_type) else text
+        if data:
+            self.wfile.write(frame_header.pack(self.channel, len(data)) + data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        self.wfile.flush()
+
+    def isatty(self):
+        return self.tty
+
+
+class CurrentStderrHandler(logging.StreamHandler):
+    """Log handler writing to whatever sys.stderr currently is."""
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class DriverRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line.decode("utf8"))
+        except ValueError:
+            return
+        command = request.get("command")
+        if command == "ping":
+            self.write_exit(0, "nbdime daemon running (pid %d)\n" % os.getpid())
+        elif command == "shutdown":
+            self.server.stopped = True
+            self.write_exit(0)
+        elif (command in drivers and
+                request.get("version") == nbdime.__version__):
+            self.server.requests += 1
+            self.write_exit(self.server.run_driver(request, self.wfile))
+        else:
+            # Unknown command, or a client of another nbdime version
+            self.wfile.write(frame_header.pack(REFUSED, 0))
+
+    def write_exit(self, code, output=None):
+        if output:
+            FrameWriter(self.wfile, STDOUT).write(output)
+        self.wfile.write(frame_header.pack(EXIT, 4) + struct.pack(">i", code))
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """Runs git driver commands forwarded over a Unix socket.
+
+    Stops after `idle_timeout` seconds without requests.
+    """
+
+    def __init__(self, path, idle_timeout=None, notebook_cache_size=None,
+                 log_level=logging.INFO):
+        socketserver.UnixStreamServer.__init__(self, path, DriverRequestHandler)
+        if idle_timeout is None:
+            idle_timeout = default_idle_timeout
+        if notebook_cache_size is None:
+            notebook_cache_size = default_notebook_cache_size
+        self.timeout = idle_timeout or None
+        self.stopped = False
+        self.requests = 0
+        self.notebook_cache = NotebookCache(
+            int(notebook_cache_size * 1024 * 1024))
+
+        # Warm up, so that the first request is as fast as the others
+        for name in drivers.values():
+            _load(name)
+        from . import nbdiffapp
+        nbdiffapp.notebook_cache = self.notebook_cache
+
+        # Set up logging like init_logging does, but to the stderr of
+        # the current request. Drivers calling init_logging are then
+        # left with this configuration.
+        self.log_handler = CurrentStderrHandler()
+        self.log_handler.setFormatter(logging.Formatter(
+            '[%(levelname)1.1s %(module)s:%(lineno)d] %(message)s'))
+        root = logging.getLogger()
+        root.addHandler(self.log_handler)
+        root.setLevel(log_level)
+        logging.captureWarnings(True)
+
+    def handle_timeout(self):
+        _logger.info("Stopping idle nbdime daemon")
+        self.stopped = True
+
+    def serve(self):
+        while not self.stopped:
+            self.handle_request()
+
+    def run_driver(self, request, wfile):
+        """Run a driver command as if started by the client.
+
+        Returns the exit code of the command.
+        """
+        main = _load(drivers[request["command"]])
+        saved = (os.getcwd(), dict(os.environ), sys.argv,
+                 sys.stdout, sys.stderr, sys.stdin)
+        loggers = [logging.getLogger(), logging.getLogger("nbdime")]
+        levels = [logger.level for logger in loggers]
+        # The diff settings are loaded again from the client's environment
+        saved_config = set_default_config(None)
+        try:
+            os.chdir(request["cwd"])
+            os.environ.clear()
+            os.environ.update(request["env"])
+            sys.argv = [request["command"]] + request["args"]
+            sys.stdout = FrameWriter(wfile, STDOUT)
+            sys.stderr = FrameWriter(wfile, STDERR)
+            sys.stdin = io.StringIO()
+            try:
+                code = main(request["args"])
+            except SystemExit as e:
+                code = e.code
+                if code is not None and not isinstance(code, int):
+                    # sys.exit(message)
+                    print(code, file=sys.stderr)
+                    code = 1
+            except Exception:
+                traceback.print_exc()
+                code = 1
+            sys.stdout.flush()
+        finally:
+            cwd, env, sys.argv, sys.stdout, sys.stderr, sys.stdin = saved
+            set_default_config(saved_config)
+            os.chdir(cwd)
+            os.environ.clear()
+            os.environ.update(env)
+            for logger, level in zip(loggers, levels):
+                logger.setLevel(level)
+        return code or 0
+
+
+def request(command, path=None):
+    """Send a control command to the daemon.
+
+    Returns the exit code, or None if no daemon is running.
+    """
+    sock = connect(path)
+    if sock is None:
+        return None
+    try:
+        send_request(sock, {"command": command})
+        return receive_response(
+            sock, getattr(sys.stdout, "buffer", sys.stdout),
+            getattr(sys.stderr, "buffer", sys.stderr))
+    finally:
+        sock.close()
+
+
+def prepare_socket_path(path):
+    """Create the private directory of the socket, and remove a stale socket.
+
+    Returns False if a daemon is already listening on path.
+    """
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, 0o700)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    st = os.stat(directory)
+    if st.st_uid != os.getuid():
+        raise RuntimeError("%s is owned by another user." % directory)
+    os.chmod(directory, 0o700)
+    if os.path.exists(path):
+        sock = connect(path)
+        if sock is not None:
+            sock.close()
+            return False
+        os.remove(path)
+    return True
+
+
+def start(path, idle_timeout=None, foreground=False, log_level="INFO",
+          timeout=20):
+    if not foreground:
+        cmd = [sys.executable, "-m", "nbdime.daemon", "start", "--foreground",
+               "--socket", path, "--log-level", log_level]
+        if idle_timeout is not None:
+            cmd += ["--idle-timeout", str(idle_timeout)]
+        with io.open(os.devnull, "r+b") as devnull:
+            subprocess.Popen(cmd, stdin=devnull, stdout=devnull, stderr=devnull,
+                             close_fds=True, preexec_fn=os.setsid)
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            sock = connect(path)
+            if sock is not None:
+                sock.close()
+                return 0
+            time.sleep(0.05)
+        print("Failed to start nbdime daemon.", file=sys.stderr)
+        return 1
+
+    if not prepare_socket_path(path):
+        print("nbdime daemon is already running.", file=sys.stderr)
+        return 1
+    server = DaemonServer(path, idle_timeout=idle_timeout,
+                          log_level=getattr(logging, log_level))
+    try:
+        server.serve()
+    finally:
+        server.server_close()
+        os.remove(path)
+    return 0
+
+
+def _build_arg_parser():
+    """Creates an argument parser for the daemon command."""
+    parser = ArgumentParser(
+        description="Run git drivers for notebooks in a background daemon.")
+    add_generic_args(parser)
+    parser.add_argument(
+        'action',
+        choices=('start', 'stop', 'status'),
+        help="start or stop the daemon, or show whether it is running.")
+    parser.add_argument(
+        '--socket',
+        default=None,
+        help="path of the daemon's Unix socket. Defaults to the "
+             "NBDIME_DAEMON_SOCKET environment variable, or a "
+             "private directory in the system temporary directory.")
+    parser.add_argument(
+        '--idle-timeout',
+        default=None,
+        type=float,
+        help="seconds without requests after which the daemon stops. "
+             "Default is %d, 0 means never." % default_idle_timeout)
+    parser.add_argument(
+        '--foreground',
+        action='store_true',
+        help="run the daemon in the foreground.")
+    return parser
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    arguments = _build_arg_parser().parse_args(args)
+    if arguments.action != "start":
+        nbdime.log.init_logging(level=arguments.log_level)
+    if not hasattr(socketserver, "UnixStreamServer"):
+        print("The nbdime daemon requires Unix domain sockets.", file=sys.stderr)
+        return 1
+    path = arguments.socket or socket_path()
+
+    if arguments.action == "start":
+        return start(path, arguments.idle_timeout, arguments.foreground,
+                     arguments.log_level)
+    elif arguments.action == "stop":
+        if request("shutdown", path) is None:
+            print("nbdime daemon is not running.", file=sys.stderr)
+            return 1
+        return 0
+    else:
+        if request("ping", path) is None:
+            print("nbdime daemon is not running.")
+            return 1
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
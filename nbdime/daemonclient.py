@@ -0,0 +1,156 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Client for the nbdime daemon, used by the git drivers.
+
+git starts the diff and merge drivers once for every notebook. When a
+daemon is running (see nbdime.daemon), the drivers forward their
+arguments, working directory and environment to it, and write out the
+output it streams back, instead of importing and running nbdime in a
+fresh interpreter. This module only uses the standard library.
+
+Requests are a single line of JSON. Responses are a sequence of frames,
+each a channel byte and a 4 byte big endian length followed by data.
+"""
+
+from __future__ import unicode_literals
+
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+
+
+__all__ = ["run", "socket_path"]
+
+
+# Response frame channels
+STDOUT = 1
+STDERR = 2
+EXIT = 3
+REFUSED = 4
+
+frame_header = struct.Struct(">BI")
+
+
+def socket_path():
+    """Path of the daemon socket of the current user.
+
+    Can be overridden with the NBDIME_DAEMON_SOCKET environment variable.
+    """
+    path = os.environ.get("NBDIME_DAEMON_SOCKET")
+    if path:
+        return path
+    return os.path.join(tempfile.gettempdir(),
+                        "nbdime-%d" % os.getuid(), "daemon.sock")
+
+
+def is_private_directory(path):
+    "Check that path is a directory only accessible by the current user."
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def connect(path=None):
+    "Connect to the daemon, returning the socket or None."
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    if path is None:
+        path = socket_path()
+    # Only talk to a daemon of our own
+    if not is_private_directory(os.path.dirname(path)):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except socket.error:
+        sock.close()
+        return None
+    return sock
+
+
+def recv_exactly(sock, n):
+    "Receive n bytes, or None if the connection is lost first."
+    chunks = []
+    while n > 0:
+        try:
+            chunk = sock.recv(min(n, 65536))
+        except socket.error:
+            return None
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_request(sock, request):
+    sock.sendall(json.dumps(request).encode("utf8") + b"\n")
+
+
+def receive_response(sock, stdout, stderr):
+    """Write streamed output to the binary streams stdout and stderr.
+
+    Returns the exit code, or None if the daemon refused the request
+    or went away before any output.
+    """
+    written = False
+    while True:
+        header = recv_exactly(sock, frame_header.size)
+        if header is None:
+            # Daemon died, fail rather than repeat partial output
+            return 1 if written else None
+        channel, length = frame_header.unpack(header)
+        data = recv_exactly(sock, length)
+        if data is None:
+            return 1 if written else None
+        if channel == STDOUT:
+            stdout.write(data)
+            stdout.flush()
+            written = True
+        elif channel == STDERR:
+            stderr.write(data)
+            stderr.flush()
+            written = True
+        elif channel == EXIT:
+            return struct.unpack(">i", data)[0]
+        elif channel == REFUSED:
+            return None
+
+
+def run(command, args, path=None):
+    """Run a git driver command in the daemon.
+
+    Returns the exit code of the command, or None if there is no
+    daemon to run it, in which case the caller should run it itself.
+    """
+    sock = connect(path)
+    if sock is None:
+        return None
+    from ._version import __version__
+    # Take the streams now, they may be replaced while we wait
+    stdout = getattr(sys.stdout, "buffer", sys.stdout)
+    stderr = getattr(sys.stderr, "buffer", sys.stderr)
+    request = {
+        "command": command,
+        "args": args,
+        "cwd": os.getcwd(),
+        "env": dict(os.environ),
+        "version": __version__,
+        }
+    try:
+        try:
+            send_request(sock, request)
+        except socket.error:
+            return None
+        # Errors writing the output, like a closed pipe, are our own
+        return receive_response(sock, stdout, stderr)
+    finally:
+        sock.close()
@@ -11,6 +11,7 @@ import operator
 from collections import defaultdict
 import difflib
 
+from ..config import default_config
 from ..diff_format import validate_diff, count_consumed_symbols
 from ..diff_format import SequenceDiffBuilder, MappingDiffBuilder
 
@@ -33,16 +34,26 @@ def default_differs():
     return defaultdict(lambda: diff)
 
 
-def compare_strings_approximate(x, y):
-    "Compare to strings with approximate heuristics."
+def compare_strings_approximate(x, y, threshold=0.7, ratio="ratio",
+                                max_length=None):
+    """Compare to strings with approximate heuristics.
+
+    The strings are similar if their difflib ratio is above threshold.
+    A cheaper estimate of the ratio can be used instead by naming the
+    SequenceMatcher method in ratio. Strings longer than max_length
+    are only compared exactly.
+    """
     # Cutoff on equality (Python has fast hash functions for strings)
     if x == y:
         return True
+    if max_length is not None and max(len(x), len(y)) > max_length:
+        return False
 
     # TODO: Investigate performance and quality of this difflib ratio approach,
     # possibly one of the weakest links of the notebook diffing algorithm.
     # Alternatives to try are the libraries diff-patch-match and Levenschtein
-    threshold = 0.7  # TODO: Add configuration framework and tune with real world examples?
+    # The threshold is configured by DiffConfig.line_similarity and
+    # source_similarity, see nbdime.config.
 
     # Informal benchmark normalized to operator ==:
     #    1.0  operator ==
@@ -58,28 +69,44 @@ def compare_strings_approximate(x, y):
     s = difflib.SequenceMatcher(None, x, y, autojunk=False)
     if s.real_quick_ratio() < threshold:
         return False
+    if ratio == "real_quick_ratio":
+        return True
     if s.quick_ratio() < threshold:
         return False
+    if ratio == "quick_ratio":
+        return True
     return s.ratio() > threshold
 
 
-def diff(a, b, path="", predicates=None, differs=None):
-    "Compute the diff of two json-like objects, list or dict or string."
+def diff(a, b, path="", predicates=None, differs=None, config=None):
+    """Compute the diff of two json-like objects, list or dict or string.
+
+    config is a nbdime.config.DiffConfig, by default the one loaded
+    from the config file and environment.
+    """
 
     if predicates is None:
         predicates = default_predicates()
     if differs is None:
         differs = default_differs()
+    if config is None:
+        config = default_config()
+
+    if a is b and not is_atomic(a):
+        # Shared values, e.g. from interned notebooks, are equal
+        return []
 
     if isinstance(a, list) and isinstance(b, list):
-        d = diff_lists(a, b, path=path, predicates=predicates, differs=differs)
+        d = diff_lists(a, b, path=path, predicates=predicates, differs=differs,
+                       config=config)
     elif isinstance(a, dict) and isinstance(b, dict):
-        d = diff_dicts(a, b, path=path, predicates=predicates, differs=differs)
+        d = diff_dicts(a, b, path=path, predicates=predicates, differs=differs,
+                       config=config)
     elif isinstance(a, string_types) and isinstance(b, string_types):
         # Don't pass differs/predicates as the only possible use case is to
         # use a different character differ within each line or predicates
         # for comparing lines
-        d = diff_strings_linewise(a, b)
+        d = diff_strings_linewise(a, b, path=path, config=config)
     else:
         raise RuntimeError("Can currently only diff list, dict, or str objects.")
 
@@ -89,45 +116,53 @@ def diff(a, b, path="", predicates=None, differs=None):
     return d
 
 
-def diff_sequence_multilevel(a, b, path="", predicates=None, differs=None):
+def diff_sequence_multilevel(a, b, path="", predicates=None, differs=None,
+                             config=None):
     """Compute diff of two lists with configurable behaviour."""
 
     if predicates is None:
         predicates = default_predicates()
     if differs is None:
         differs = default_differs()
+    if config is None:
+        config = default_config()
 
     # Invoke multilevel snake computation algorithm
     compares = predicates[path or '/']
-    snakes = compute_snakes_multilevel(a, b, compares)
+    snakes = compute_snakes_multilevel(a, b, compares, path=path, config=config)
 
     # Convert snakes to diff
-    return compute_diff_from_snakes(a, b, snakes, path=path, predicates=predicates, differs=differs)
+    return compute_diff_from_snakes(a, b, snakes, path=path, predicates=predicates,
+                                    differs=differs, config=config)
 
 
-def diff_lists(a, b, path="", predicates=None, differs=None, shallow_diff=None):
+def diff_lists(a, b, path="", predicates=None, differs=None, shallow_diff=None,
+               config=None):
     """Compute diff of two lists with configurable behaviour."""
 
     if predicates is None:
         predicates = default_predicates()
     if differs is None:
         differs = default_differs()
+    if config is None:
+        config = default_config()
 
     # If multiple compares are provided to this path, delegate to multilevel algorithm
     compares = predicates[path or '/']
     if len(compares) > 1:
         assert shallow_diff is None
-        return diff_sequence_multilevel(a, b, path=path, predicates=predicates, differs=differs)
+        return diff_sequence_multilevel(a, b, path=path, predicates=predicates,
+                                        differs=differs, config=config)
 
     # First make a shallow sequence diff with custom compare,
     # unless it's provided for us
     if shallow_diff is None:
-        shallow_diff = diff_sequence(a, b, compares[0])
+        shallow_diff = diff_sequence(a, b, compares[0], path=path, config=config)
 
     # Next we recurse to diff items in sequence that are considered
     # similar by compares[0] in the loop below
     subpath = "/".join((path, "*"))
-    diffit = differs.get(subpath, diff)
+    diffit = differs[subpath]
 
     # Count consumed items i,j from a,b, (i="take" in patch_list)
     i, j = 0, 0
@@ -154,8 +189,9 @@ def diff_lists(a, b, path="", predicates=None, differs=None, shallow_diff=None):
         for k in range(n):
             aval = a[i + k]
             bval = b[j + k]
-            if not is_atomic(aval):
-                cd = diffit(aval, bval, path=subpath, predicates=predicates, differs=differs)
+            if aval is not bval and not is_atomic(aval):
+                cd = diffit(aval, bval, path=subpath, predicates=predicates,
+                            differs=differs, config=config)
                 if cd:
                     di.patch(i + k, cd)  # FIXME: Not covered in tests, create test situation
 
@@ -175,7 +211,7 @@ def diff_lists(a, b, path="", predicates=None, differs=None, shallow_diff=None):
     return di.validated()
 
 
-def diff_dicts(a, b, path="", predicates=None, differs=None):
+def diff_dicts(a, b, path="", predicates=None, differs=None, config=None):
     """Compute diff of two dicts with configurable behaviour.
 
     Keys in both a and b will be handled based on
@@ -190,6 +226,8 @@ def diff_dicts(a, b, path="", predicates=None, differs=None):
         predicates = default_predicates()
     if differs is None:
         differs = default_differs()
+    if config is None:
+        config = default_config()
 
     assert isinstance(a, dict) and isinstance(b, dict)
     akeys = set(a.keys())
@@ -205,11 +243,14 @@ def diff_dicts(a, b, path="", predicates=None, differs=None):
     for key in sorted(akeys & bkeys):
         avalue = a[key]
         bvalue = b[key]
+        if avalue is bvalue:
+            continue
         # If types are the same and nonatomic, recurse
         if type(avalue) == type(bvalue) and not is_atomic(avalue):
             subpath = "/".join((path, key))
             diffit = differs.get(subpath, diff)
-            dd = diffit(avalue, bvalue, path=subpath, predicates=predicates, differs=differs)
+            dd = diffit(avalue, bvalue, path=subpath, predicates=predicates,
+                        differs=differs, config=config)
             if dd:
                 di.patch(key, dd)
         else:
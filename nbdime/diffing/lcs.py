@@ -33,3 +33,21 @@ def diff_from_lcs(A, B, A_indices, B_indices):
     if y < M:
         di.addrange(x, B[y:M])
     return di.validated()
+
+
+def snakes_from_lcs(A_indices, B_indices):
+    """Compute snakes from indices of an lcs.
+
+    Return a list of snakes (i, j, n), each a run of n items in the lcs
+    with consecutive indices in both sequences.
+    """
+    snakes = [(0, 0, 0)]
+    for i, j in zip(A_indices, B_indices):
+        if snakes[-1][0] + snakes[-1][2] == i and snakes[-1][1] + snakes[-1][2] == j:
+            snake = snakes[-1]
+            snakes[-1] = (snake[0], snake[1], snake[2] + 1)
+        else:
+            snakes.append((i, j, 1))
+    if snakes[0][2] == 0:
+        snakes.pop(0)
+    return snakes
@@ -12,29 +12,45 @@ converted to the same format version, currently v4 at time of writing.
 Up- and down-conversion is handled by nbformat.
 """
 
+import bisect
 import operator
 import copy
+import functools
 from collections import defaultdict
+from six import string_types
 
+from ..config import default_config
 from ..diff_format import source_as_string, MappingDiffBuilder
 
-from .generic import (diff, diff_sequence_multilevel,
+from .generic import (diff, diff_dicts, diff_sequence_multilevel,
                       compare_strings_approximate)
+from .snakes import (compute_snakes_multilevel, compute_diff_from_snakes,
+                     iter_diff_from_snakes)
+from ..diff_format import op_patch
 
-__all__ = ["diff_notebooks"]
+__all__ = ["diff_notebooks", "iter_diff_notebooks", "lazy_diff_notebooks"]
 
 
-def compare_cell_source_approximate(x, y):
+def compare_cell_source_approximate(x, y, config=None):
     "Compare source of cells x,y with approximate heuristics."
+    if x is y:
+        return True
     # Cell types must match
-    if x.cell_type != y["cell_type"]:
+    if x["cell_type"] != y["cell_type"]:
         return False
 
     # Convert from list to single string
     xs = source_as_string(x["source"])
     ys = source_as_string(y["source"])
 
-    return compare_strings_approximate(xs, ys)
+    if config is None:
+        config = default_config()
+    if config.source_similarity is None:
+        return xs == ys
+    return compare_strings_approximate(xs, ys,
+                                       threshold=config.source_similarity,
+                                       ratio=config.similarity_ratio,
+                                       max_length=config.approximate_max_length)
 
 
 def compare_cell_source_exact(x, y):
@@ -85,6 +101,8 @@ def compare_output_data_keys(x, y):
 
 def compare_output_data(x, y):
     "Compare type and data of output cells x,y exactly."
+    if x is y:
+        return True
     # Fast cutuff
     ot = x["output_type"]
     if ot != y["output_type"]:
@@ -121,36 +139,57 @@ def compare_output_data(x, y):
 
 
 def diff_single_outputs(a, b, path="/cells/*/outputs/*",
-                        predicates=None, differs=None):
+                        predicates=None, differs=None, config=None):
     "DiffOp a pair of output cells."
     assert path == "/cells/*/outputs/*"
-    assert a.output_type == b.output_type
+    assert a["output_type"] == b["output_type"]
+    if config is None:
+        config = default_config()
 
-    if a.output_type in ("execute_result", "display_data"):
+    if a["output_type"] in ("execute_result", "display_data"):
         di = MappingDiffBuilder()
 
         a_conj = copy.deepcopy(a)
         del a_conj['data']
         b_conj = copy.deepcopy(b)
         del b_conj['data']
-        dd_conj = diff(a_conj, b_conj)
+        dd_conj = diff(a_conj, b_conj, config=config)
         if dd_conj:
             for e in dd_conj:
                 di.append(e)
 
-        dd = diff_mime_bundle(a.data, b.data, path=path+"/data")
+        dd = diff_mime_bundle(a["data"], b["data"], path=path+"/data",
+                              config=config)
         if dd:
             di.patch("data", dd)
 
         return di.validated()
     else:
-        return diff(a, b)
+        return diff(a, b, config=config)
+
+
+def _split_mime(key, avalue, bvalue, config):
+    "Tell if mime data values should be diffed, rather than replaced."
+    if not key.lower().startswith(config.split_mimes):
+        return False
+    limit = config.split_max_size
+    if limit is None:
+        return True
+    for value in (avalue, bvalue):
+        if isinstance(value, list) and all(isinstance(line, string_types)
+                                           for line in value):
+            value = "".join(value)
+        if isinstance(value, string_types) and len(value) > limit:
+            return False
+    return True
 
 
 def diff_attachments(a, b, path="/cells/*/attachments",
-                     predicates=None, differs=None):
+                     predicates=None, differs=None, config=None):
     """Diff a pair of attachment collections"""
     assert path == "/cells/*/attachments"
+    if config is None:
+        config = default_config()
 
     # Two events can happen:
     #  1: An attachment is added/removed/patched
@@ -171,8 +210,8 @@ def diff_attachments(a, b, path="/cells/*/attachments",
         avalue = a[key]
         bvalue = b[key]
 
-        if key.lower().startswith(_split_mimes):
-            dd = diff_mime_bundle(avalue, bvalue)
+        if _split_mime(key, avalue, bvalue, config):
+            dd = diff_mime_bundle(avalue, bvalue, config=config)
             if dd:
                 di.patch(key, dd)
         elif avalue != bvalue:
@@ -183,13 +222,11 @@ def diff_attachments(a, b, path="/cells/*/attachments",
     return di.validated()
 
 
-
-_split_mimes = ('text/', 'image/svg+xml', 'application/javascript', 'application/json')
-
-
 def diff_mime_bundle(a, b, path=None,
-                     predicates=None, differs=None):
+                     predicates=None, differs=None, config=None):
     assert isinstance(a, dict) and isinstance(b, dict)
+    if config is None:
+        config = default_config()
     di = MappingDiffBuilder()
 
     akeys = set(a.keys())
@@ -205,8 +242,8 @@ def diff_mime_bundle(a, b, path=None,
 
         # TODO: Handle output diffing with plugins?
         # I.e. image diff, svg diff, json diff, etc.
-        if key.lower().startswith(_split_mimes):
-            dd = diff(avalue, bvalue)
+        if _split_mime(key, avalue, bvalue, config):
+            dd = diff(avalue, bvalue, config=config)
             if dd:
                 di.patch(key, dd)
         elif avalue != bvalue:
@@ -217,6 +254,67 @@ def diff_mime_bundle(a, b, path=None,
     return di.validated()
 
 
+def match_cell_ids(a, b):
+    """Match cells of a and b with equal ids, as in nbformat 4.5 and later.
+
+    Returns pairs (i, j) of cells a[i] and b[j] with the same id and
+    cell type, increasing in both i and j. When cells have been moved,
+    the longest sequence of matches in the same order is kept. Cells
+    without an id, or with an id that is not unique, are not matched.
+    """
+    def unique_ids(cells):
+        ids = {}
+        for k, cell in enumerate(cells):
+            cell_id = cell.get("id")
+            if cell_id is not None:
+                ids[cell_id] = None if cell_id in ids else k
+        return ids
+
+    ids_a = unique_ids(a)
+    if not ids_a:
+        return []
+    ids_b = unique_ids(b)
+    pairs = []
+    for cell_id, i in ids_a.items():
+        j = ids_b.get(cell_id)
+        if i is not None and j is not None and a[i]["cell_type"] == b[j]["cell_type"]:
+            pairs.append((i, j))
+    pairs.sort()
+
+    # Longest increasing subsequence of j, with links to rebuild it
+    tails = []
+    tail_js = []
+    links = []
+    for k, (i, j) in enumerate(pairs):
+        p = bisect.bisect_left(tail_js, j)
+        links.append(tails[p-1] if p else None)
+        if p == len(tails):
+            tails.append(k)
+            tail_js.append(j)
+        else:
+            tails[p] = k
+            tail_js[p] = j
+    matches = []
+    k = tails[-1] if tails else None
+    while k is not None:
+        matches.append(pairs[k])
+        k = links[k]
+    matches.reverse()
+    return matches
+
+
+def diff_cell_sequence(a, b, path="/cells", predicates=None, differs=None,
+                       config=None):
+    "Diff two lists of cells, aligned by align_cells."
+    if config is None:
+        config = default_config()
+    if predicates is None:
+        predicates = make_notebook_predicates(config)
+    snakes = align_cells(a, b, config, predicates[path])
+    return compute_diff_from_snakes(a, b, snakes, path=path, predicates=predicates,
+                                    differs=differs, config=config)
+
+
 # Sequence diffs should be applied with multilevel
 # algorithm for paths with more than one predicate,
 # and using operator.__eq__ if no match in there.
@@ -237,7 +335,7 @@ notebook_predicates = defaultdict(lambda: [operator.__eq__], {
 
 # Recursive diffing of substructures should pick a rule from here, with diff as fallback
 notebook_differs = defaultdict(lambda: diff, {
-    "/cells": diff_sequence_multilevel,
+    "/cells": diff_cell_sequence,
     "/cells/*": diff,
     "/cells/*/outputs": diff_sequence_multilevel,
     "/cells/*/outputs/*": diff_single_outputs,
@@ -245,12 +343,153 @@ notebook_differs = defaultdict(lambda: diff, {
     })
 
 
-def diff_cells(a, b):
-    "This is currently just used by some tests."
-    path = "/cells"
-    return notebook_differs[path](a, b, path=path, predicates=notebook_predicates, differs=notebook_differs)
+def make_notebook_predicates(config):
+    """The notebook predicates with the similarity settings of config.
+
+    Without a source_similarity, cells are aligned only by exact
+    comparisons.
+    """
+    predicates = notebook_predicates.copy()
+    compares = list(predicates["/cells"])
+    if config.source_similarity is None:
+        compares.remove(compare_cell_source_approximate)
+    else:
+        i = compares.index(compare_cell_source_approximate)
+        compares[i] = functools.partial(compare_cell_source_approximate,
+                                        config=config)
+    predicates["/cells"] = compares
+    return predicates
 
 
-def diff_notebooks(a, b):
-    """Compute the diff of two notebooks using customized heuristics and diff rules."""
-    return diff(a, b, path="", predicates=notebook_predicates, differs=notebook_differs)
+def diff_cells(a, b, config=None):
+    "This is currently just used by some tests."
+    path = "/cells"
+    if config is None:
+        config = default_config()
+    return notebook_differs[path](a, b, path=path,
+                                  predicates=make_notebook_predicates(config),
+                                  differs=notebook_differs, config=config)
+
+
+def align_cells(a, b, config=None, compares=None):
+    """Align two lists of cells without diffing the contents of the cells.
+
+    Returns a list of snakes (i, j, n), each a run of n cells a[i:i+n]
+    matched with cells b[j:j+n]. Cells in between snakes are deleted
+    from a or inserted from b. This is the first step of diffing the
+    cells of two notebooks, diff_single_cells completes it.
+
+    Cells with equal ids are matched first, see match_cell_ids. The
+    cells between them are aligned by the compares, by default the
+    notebook predicates for "/cells".
+    """
+    if config is None:
+        config = default_config()
+    if compares is None:
+        compares = make_notebook_predicates(config)["/cells"]
+    snakes = [(0, 0, 0)]
+    i0, j0 = 0, 0
+    for i, j in match_cell_ids(a, b) + [(len(a), len(b))]:
+        if i > i0 and j > j0:
+            # Align the cells between matches with the predicates
+            gap = compute_snakes_multilevel(
+                a, b, compares, rect=(i0, j0, i, j), path="/cells",
+                config=config)
+        else:
+            gap = []
+        if i < len(a):
+            gap.append((i, j, 1))
+        for snake in gap:
+            li, lj, ln = snakes[-1]
+            if li + ln == snake[0] and lj + ln == snake[1]:
+                # Merge contiguous snakes
+                snakes[-1] = (li, lj, ln + snake[2])
+            else:
+                snakes.append(snake)
+        i0, j0 = i + 1, j + 1
+    # Pop empty snake from beginning if it wasn't extended inside the loop
+    if snakes[0][2] == 0:
+        snakes.pop(0)
+    return snakes
+
+
+def diff_single_cells(a, b, config=None):
+    "Diff a pair of cells matched by align_cells."
+    path = "/cells/*"
+    if config is None:
+        config = default_config()
+    return notebook_differs[path](a, b, path=path,
+                                  predicates=make_notebook_predicates(config),
+                                  differs=notebook_differs, config=config)
+
+
+def diff_notebooks(a, b, config=None):
+    """Compute the diff of two notebooks using customized heuristics and diff rules.
+
+    config is a nbdime.config.DiffConfig, by default default_config().
+    """
+    if config is None:
+        config = default_config()
+    return diff(a, b, path="", predicates=make_notebook_predicates(config),
+                differs=notebook_differs, config=config)
+
+
+def iter_diff_notebooks(a, b, config=None):
+    """Compute the diff of two notebooks incrementally.
+
+    Generates pairs (path, entry) of diff entries and the path of the
+    value they apply to, ordered by key. The entries of the cells are
+    generated one at a time with path "/cells", each computed when the
+    iteration gets to it. Other entries have the path "". Together, the
+    entries make up diff_notebooks(a, b, config).
+    """
+    if config is None:
+        config = default_config()
+    predicates = make_notebook_predicates(config)
+    for key in sorted(set(a) | set(b)):
+        if key == "cells" and key in a and key in b:
+            snakes = align_cells(a["cells"], b["cells"], config)
+            for e in iter_diff_from_snakes(
+                    a["cells"], b["cells"], snakes, path="/cells",
+                    predicates=predicates, differs=notebook_differs,
+                    config=config):
+                yield "/cells", e
+        else:
+            # The diff of the notebook limited to this key
+            suba = {key: a[key]} if key in a else {}
+            subb = {key: b[key]} if key in b else {}
+            for e in diff_dicts(suba, subb, path="",
+                                predicates=predicates,
+                                differs=notebook_differs, config=config):
+                yield "", e
+
+
+def lazy_diff_notebooks(a, b, config=None):
+    """Compute the diff of two notebooks while it is being consumed.
+
+    Generates the entries of diff_notebooks(a, b), except that the
+    diff of the cells is a generator of the cell entries, computed by
+    iter_diff_notebooks. It should be consumed before the next entry,
+    as it is when serializing with nbdime.loader.write_json, which then
+    writes each cell diff as soon as it is computed. Cell entries that
+    have not been consumed by then are computed and dropped, and the
+    generator ends.
+    """
+    pairs = iter_diff_notebooks(a, b, config)
+    head = [next(pairs, None)]
+
+    def cell_entries():
+        while head[0] is not None and head[0][0] == "/cells":
+            yield head[0][1]
+            head[0] = next(pairs, None)
+
+    while head[0] is not None:
+        path, e = head[0]
+        if path == "/cells":
+            yield op_patch("cells", cell_entries())
+            # Skip the cell entries the caller did not consume
+            while head[0] is not None and head[0][0] == "/cells":
+                head[0] = next(pairs, None)
+        else:
+            yield e
+            head[0] = next(pairs, None)
@@ -0,0 +1,136 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Choice of a sequence diff algorithm for each pair of sequences.
+
+The brute force algorithm makes N*M comparisons, Myers' algorithm in
+the expected case about N+M+D**2 where D is the number of inserted
+and deleted items, and difflib is close to linear in N+M but only
+compares items by hash and does not always find a minimal diff. The
+algorithm with the lowest estimated cost is used, where D is
+estimated from the items that A and B have in common. Short sequences
+are diffed by brute force without an estimate.
+
+The cost per unit of work of each algorithm is set by the auto_costs
+diff setting. benchmarks/calibrate_auto.py measures them on the
+current machine.
+"""
+
+from __future__ import unicode_literals
+
+import bisect
+from collections import Counter
+import operator
+
+from six.moves import xrange as range
+
+from .seq_bruteforce import bruteforce_grid_size
+
+__all__ = ["estimate_edit_distance", "choose_sequence_algorithm"]
+
+
+# Number of item pairs compared to estimate similarity when the items
+# cannot be counted by hash
+estimate_samples = 16
+
+
+def _trim(A, B, compare):
+    "Count the matching leading and trailing items of A and B."
+    N, M = len(A), len(B)
+    head = 0
+    while head < N and head < M and compare(A[head], B[head]):
+        head += 1
+    tail = 0
+    while (tail < N - head and tail < M - head and
+           compare(A[N-tail-1], B[M-tail-1])):
+        tail += 1
+    return head, tail
+
+
+def _hashable(A):
+    try:
+        for a in A:
+            hash(a)
+    except TypeError:
+        return False
+    return True
+
+
+def _lis_length(values):
+    "Length of the longest increasing subsequence of values."
+    tails = []
+    for v in values:
+        k = bisect.bisect_left(tails, v)
+        if k == len(tails):
+            tails.append(v)
+        else:
+            tails[k] = v
+    return len(tails)
+
+
+def estimate_edit_distance(A, B, compare=operator.__eq__, hashable=None):
+    """Estimate the number D of items inserted and deleted between A and B.
+
+    With exact comparison of hashable items this is based on the items
+    A and B have in common, and the order of those that are unique in
+    both. Otherwise a few pairs of items along the diagonal are
+    compared, which overestimates D when items have been inserted or
+    deleted.
+    """
+    head, tail = _trim(A, B, compare)
+    A = A[head:len(A)-tail]
+    B = B[head:len(B)-tail]
+    N, M = len(A), len(B)
+    if N == 0 or M == 0:
+        return N + M
+    if compare is operator.__eq__ and (
+            hashable if hashable is not None else _hashable(A) and _hashable(B)):
+        counts_a = Counter(A)
+        counts_b = Counter(B)
+        common = sum((counts_a & counts_b).values())
+        # Scale by the fraction of items that occur once in both A and
+        # B which are in the same order, to account for moved items
+        positions = dict((b, j) for j, b in enumerate(B) if counts_b[b] == 1)
+        anchors = [positions[a] for a in A
+                   if counts_a[a] == 1 and a in positions]
+        if anchors:
+            common = common * _lis_length(anchors) // len(anchors)
+        return N + M - 2*common
+    n = min(N, M, estimate_samples)
+    matches = sum(1 for s in range(n)
+                  if compare(A[s*N//n], B[s*M//n]))
+    similarity = float(matches) / n
+    return abs(N - M) + int((1.0 - similarity) * 2 * min(N, M))
+
+
+def choose_sequence_algorithm(A, B, compare=operator.__eq__, config=None):
+    """Choose the sequence diff algorithm with the lowest estimated cost.
+
+    Returns "bruteforce", "myers" or "difflib". difflib is only chosen
+    for items compared exactly by hash, when N+M is at least the
+    auto_hash_min_size setting.
+    """
+    if config is None:
+        from ..config import default_config
+        config = default_config()
+    costs = config.auto_costs
+    N, M = len(A), len(B)
+    bruteforce = costs["bruteforce"] * N * M
+    if bruteforce <= costs["estimate_call"] + costs["estimate"] * (N + M):
+        # Not worth estimating
+        return "bruteforce"
+    exact = compare is operator.__eq__
+    hashable = exact and _hashable(A) and _hashable(B)
+    D = estimate_edit_distance(A, B, compare, hashable)
+
+    if bruteforce_grid_size(A, B) > config.grid_memory_limit:
+        bruteforce = costs["hirschberg"] * N * M
+    estimates = [
+        (bruteforce, "bruteforce"),
+        (costs["myers"] * D * D + costs["myers_item"] * (N + M), "myers"),
+    ]
+    if hashable and N + M >= config.auto_hash_min_size:
+        estimates.append((costs["difflib"] * (N + M), "difflib"))
+    return min(estimates)[1]
@@ -7,11 +7,23 @@ from __future__ import unicode_literals
 
 from six.moves import xrange as range
 import operator
-from .lcs import diff_from_lcs
+from .lcs import diff_from_lcs, snakes_from_lcs
+from .seq_hirschberg import hirschberg_lcs_indices
 
 __all__ = ["diff_sequence_bruteforce"]
 
 
+# Sequences with grids estimated to take more than this many bytes are
+# compared in linear space with Hirschberg's algorithm instead
+grid_memory_limit = 2**27
+
+
+def bruteforce_grid_size(A, B):
+    "Estimate the memory used by the grids of A and B, in bytes."
+    # Two grids of pointers, ints are mostly shared small ints
+    return 2 * 8 * (len(A) + 1) * (len(B) + 1)
+
+
 def bruteforce_compare_grid(A, B, compare=operator.__eq__):
     "Brute force compute grid G[i, j] == compare(A[i], B[j])."
     return [[compare(a, b) for b in B] for a in A]
@@ -60,7 +72,7 @@ def bruteforce_lcs_indices(A, B, G, R, compare=operator.__eq__):
     return A_indices, B_indices
 
 
-def bruteforce_compute_snakes(A, B, compare):
+def bruteforce_compute_snakes(A, B, compare, memory_limit=None):
     """Compute snakes using brute force algorithm.
 
     Return a list of snakes, where each snake is a tuple (i,j,n)
@@ -68,24 +80,25 @@ def bruteforce_compute_snakes(A, B, compare):
     in A and B starting at i and j, i.e. compare(x,y) returns
     True for x,y in zip(A[i:i+n], B[j:j+n]).
     """
+    return snakes_from_lcs(*bruteforce_compute_lcs(A, B, compare, memory_limit))
+
+
+def bruteforce_compute_lcs(A, B, compare=operator.__eq__, memory_limit=None):
+    """Compute the lcs indices of A and B.
+
+    Uses the grids when they fit within memory_limit bytes, by default
+    grid_memory_limit, and Hirschberg's linear space algorithm otherwise.
+    """
+    if memory_limit is None:
+        memory_limit = grid_memory_limit
+    if bruteforce_grid_size(A, B) > memory_limit:
+        return hirschberg_lcs_indices(A, B, compare)
     G = bruteforce_compare_grid(A, B, compare)
     R = bruteforce_llcs_grid(G)
-    A_indices, B_indices = bruteforce_lcs_indices(A, B, G, R, compare)
-    snakes = [(0, 0, 0)]
-    for i, j in zip(A_indices, B_indices):
-        if snakes[-1][0] == i and snakes[-1][1] == j:
-            snake = snakes[-1]
-            snakes[-1] = (snake[0], snake[1], snake[2] + 1)
-        else:
-            snakes.append((i, j, 1))
-    if snakes[0][2] == 0:
-        snakes.pop(0)
-    return snakes
+    return bruteforce_lcs_indices(A, B, G, R, compare)
 
 
-def diff_sequence_bruteforce(A, B, compare=operator.__eq__):
+def diff_sequence_bruteforce(A, B, compare=operator.__eq__, memory_limit=None):
     """Compute the diff of A and B using expensive brute force O(MN) algorithms."""
-    G = bruteforce_compare_grid(A, B, compare)
-    R = bruteforce_llcs_grid(G)
-    A_indices, B_indices = bruteforce_lcs_indices(A, B, G, R, compare)
+    A_indices, B_indices = bruteforce_compute_lcs(A, B, compare, memory_limit)
     return diff_from_lcs(A, B, A_indices, B_indices)
@@ -9,7 +9,7 @@ from difflib import SequenceMatcher
 from ..diff_format import SequenceDiffBuilder
 
 
-__all__ = ["diff_sequence_difflib"]
+__all__ = ["diff_sequence_difflib", "difflib_compute_snakes"]
 
 
 def opcodes_to_diff(a, b, opcodes):
@@ -48,3 +48,9 @@ def diff_sequence_difflib(a, b):
     assert not any(isinstance(x, (list, dict)) for x in b)
     s = SequenceMatcher(None, a, b, autojunk=False)
     return opcodes_to_diff(a, b, s.get_opcodes())
+
+
+def difflib_compute_snakes(a, b):
+    "Compute snakes like bruteforce_compute_snakes, with difflib."
+    s = SequenceMatcher(None, a, b, autojunk=False)
+    return [tuple(block) for block in s.get_matching_blocks() if block[2]]
@@ -0,0 +1,93 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Longest common subsequence in linear space, with Hirschberg's algorithm.
+
+Like the brute force algorithm this makes O(NM) comparisons, but only
+keeps two rows of llcs values at a time instead of the full grids, so
+long sequences can be compared without running out of memory.
+"""
+
+from __future__ import unicode_literals
+
+from six.moves import xrange as range
+import operator
+
+from .lcs import diff_from_lcs, snakes_from_lcs
+
+__all__ = ["diff_sequence_hirschberg"]
+
+
+def hirschberg_llcs_row(A, B, compare=operator.__eq__):
+    "Compute the row R[y] == llcs(A, B[:y]) for y in 0..len(B)."
+    M = len(B)
+    prev = [0] * (M+1)
+    for a in A:
+        cur = [0] * (M+1)
+        for y in range(1, M+1):
+            if compare(a, B[y-1]):
+                cur[y] = prev[y-1] + 1
+            else:
+                cur[y] = max(prev[y], cur[y-1])
+        prev = cur
+    return prev
+
+
+def _lcs(A, B, i0, i1, j0, j1, compare, A_indices, B_indices):
+    "Append the lcs indices of A[i0:i1] and B[j0:j1] to A_indices and B_indices."
+    # Matching leading and trailing items are always part of an lcs
+    while i0 < i1 and j0 < j1 and compare(A[i0], B[j0]):
+        A_indices.append(i0)
+        B_indices.append(j0)
+        i0 += 1
+        j0 += 1
+    tail = 0
+    while i0 < i1 - tail and j0 < j1 - tail and compare(A[i1-tail-1], B[j1-tail-1]):
+        tail += 1
+    i1 -= tail
+    j1 -= tail
+
+    if i0 < i1 and j0 < j1:
+        if i1 - i0 == 1:
+            for j in range(j0, j1):
+                if compare(A[i0], B[j]):
+                    A_indices.append(i0)
+                    B_indices.append(j)
+                    break
+        else:
+            # Split A in half, and B where an lcs crosses the split
+            mid = (i0 + i1) // 2
+            fwd = hirschberg_llcs_row(A[i0:mid], B[j0:j1], compare)
+            bwd = hirschberg_llcs_row(A[mid:i1][::-1], B[j0:j1][::-1], compare)
+            M = j1 - j0
+            k = max(range(M+1), key=lambda y: fwd[y] + bwd[M-y])
+            _lcs(A, B, i0, mid, j0, j0 + k, compare, A_indices, B_indices)
+            _lcs(A, B, mid, i1, j0 + k, j1, compare, A_indices, B_indices)
+
+    A_indices.extend(range(i1, i1 + tail))
+    B_indices.extend(range(j1, j1 + tail))
+
+
+def hirschberg_lcs_indices(A, B, compare=operator.__eq__):
+    """Compute the lcs of A and B in linear space.
+
+    Returns two lists (A_indices, B_indices) with length == llcs(A, B),
+    such that lcs(A, B) == A[A_indices] == B[B_indices].
+    """
+    A_indices = []
+    B_indices = []
+    _lcs(A, B, 0, len(A), 0, len(B), compare, A_indices, B_indices)
+    return A_indices, B_indices
+
+
+def hirschberg_compute_snakes(A, B, compare=operator.__eq__):
+    "Compute snakes like bruteforce_compute_snakes, in linear space."
+    return snakes_from_lcs(*hirschberg_lcs_indices(A, B, compare))
+
+
+def diff_sequence_hirschberg(A, B, compare=operator.__eq__):
+    """Compute the diff of A and B using Hirschberg's linear space algorithm."""
+    A_indices, B_indices = hirschberg_lcs_indices(A, B, compare)
+    return diff_from_lcs(A, B, A_indices, B_indices)
@@ -3,13 +3,132 @@
 # Copyright (c) Jupyter Development Team.
 # Distributed under the terms of the Modified BSD License.
 
+"""Longest common subsequence with Myers' O(ND) algorithm.
+
+The cost is proportional to the length of the sequences times the
+number D of inserted and deleted items, so similar sequences are
+compared much faster than with the brute force algorithm. Like
+Hirschberg's algorithm, the linear space variant splits the problem
+at a middle snake and only keeps two arrays of furthest reaching
+paths at a time.
+
+See E. W. Myers, An O(ND) difference algorithm and its variations,
+Algorithmica 1 (1986).
+"""
+
 from __future__ import unicode_literals
 
+from six.moves import xrange as range
 import operator
 
+from .lcs import diff_from_lcs, snakes_from_lcs
+
 __all__ = ["diff_sequence_myers"]
 
 
+def myers_middle_snake(A, B, i0, N, j0, M, compare=operator.__eq__):
+    """Find the middle snake of a shortest edit script of A and B.
+
+    Only A[i0:i0+N] and B[j0:j0+M] are compared. Returns
+    (D, x, y, u, v), where D is the length of the edit script and the
+    snake runs from (x, y) to (u, v), relative to (i0, j0).
+    """
+    delta = N - M
+    odd = delta % 2 == 1
+    MAX = (N + M + 1) // 2
+    # Furthest reaching x on diagonal k is at V[V0 + k]. The reverse
+    # paths are computed on the reversed sequences.
+    V0 = MAX + 1
+    Vf = [0] * (2*MAX + 3)
+    Vr = [0] * (2*MAX + 3)
+    for D in range(MAX + 1):
+        for k in range(-D, D+1, 2):
+            if k == -D or k != D and Vf[V0+k-1] < Vf[V0+k+1]:
+                x = Vf[V0+k+1]
+            else:
+                x = Vf[V0+k-1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < N and y < M and compare(A[i0+x], B[j0+y]):
+                x += 1
+                y += 1
+            Vf[V0+k] = x
+            # Overlap with the reverse (D-1)-path on the same diagonal
+            if odd and -(D-1) <= delta-k <= D-1 and x + Vr[V0+delta-k] >= N:
+                return 2*D - 1, x0, y0, x, y
+        for k in range(-D, D+1, 2):
+            if k == -D or k != D and Vr[V0+k-1] < Vr[V0+k+1]:
+                x = Vr[V0+k+1]
+            else:
+                x = Vr[V0+k-1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < N and y < M and compare(A[i0+N-1-x], B[j0+M-1-y]):
+                x += 1
+                y += 1
+            Vr[V0+k] = x
+            # Overlap with the forward D-path on the same diagonal
+            if not odd and -D <= delta-k <= D and x + Vf[V0+delta-k] >= N:
+                return 2*D, N - x, M - y, N - x0, M - y0
+    raise RuntimeError("Failed to find middle snake!")
+
+
+def _lcs(A, B, i0, i1, j0, j1, compare, A_indices, B_indices):
+    "Append the lcs indices of A[i0:i1] and B[j0:j1] to the index lists."
+    # Matching leading and trailing items are always part of an lcs
+    while i0 < i1 and j0 < j1 and compare(A[i0], B[j0]):
+        A_indices.append(i0)
+        B_indices.append(j0)
+        i0 += 1
+        j0 += 1
+    tail = 0
+    while (i0 < i1 - tail and j0 < j1 - tail and
+           compare(A[i1-tail-1], B[j1-tail-1])):
+        tail += 1
+    i1 -= tail
+    j1 -= tail
+
+    if i0 < i1 and j0 < j1:
+        D, x, y, u, v = myers_middle_snake(A, B, i0, i1 - i0, j0, j1 - j0, compare)
+        if D > 1:
+            _lcs(A, B, i0, i0 + x, j0, j0 + y, compare, A_indices, B_indices)
+            A_indices.extend(range(i0 + x, i0 + u))
+            B_indices.extend(range(j0 + y, j0 + v))
+            _lcs(A, B, i0 + u, i1, j0 + v, j1, compare, A_indices, B_indices)
+        else:
+            # The shorter sequence is all of the lcs but one item
+            j = j0
+            for i in range(i0, i1):
+                while j < j1 and not compare(A[i], B[j]):
+                    j += 1
+                if j == j1:
+                    break
+                A_indices.append(i)
+                B_indices.append(j)
+                j += 1
+
+    A_indices.extend(range(i1, i1 + tail))
+    B_indices.extend(range(j1, j1 + tail))
+
+
+def myers_lcs_indices(A, B, compare=operator.__eq__):
+    """Compute the lcs of A and B with Myers' linear space algorithm.
+
+    Returns two lists (A_indices, B_indices) with length == llcs(A, B),
+    such that lcs(A, B) == A[A_indices] == B[B_indices].
+    """
+    A_indices = []
+    B_indices = []
+    _lcs(A, B, 0, len(A), 0, len(B), compare, A_indices, B_indices)
+    return A_indices, B_indices
+
+
+def myers_compute_snakes(A, B, compare=operator.__eq__):
+    "Compute snakes like bruteforce_compute_snakes, in O(ND) time."
+    return snakes_from_lcs(*myers_lcs_indices(A, B, compare))
+
+
 def diff_sequence_myers(A, B, compare=operator.__eq__):
     """Compute the diff of A and B using Myers' O(ND) algorithm."""
-    raise NotImplementedError("Work in progress...")
+    A_indices, B_indices = myers_lcs_indices(A, B, compare)
+    return diff_from_lcs(A, B, A_indices, B_indices)
@@ -5,6 +5,7 @@
 
 from __future__ import unicode_literals
 
+import functools
 import operator
 from six import string_types
 from collections import defaultdict
@@ -12,35 +13,56 @@ from collections import defaultdict
 from .seq_difflib import diff_sequence_difflib
 from .seq_bruteforce import diff_sequence_bruteforce
 from .seq_myers import diff_sequence_myers
+from .seq_auto import choose_sequence_algorithm
 
 __all__ = ["diff_strings_by_char", "diff_sequence", "diff_strings_linewise"]
 
 
-# TODO: Configuration framework?
-# legal_diff_sequence_algorithms = ["bruteforce", "difflib", "myers"]
+# The algorithm used unless a DiffConfig selects one
+# legal_diff_sequence_algorithms = ["bruteforce", "difflib", "myers", "auto"]
 diff_sequence_algorithm = "bruteforce"
 
 
-def diff_sequence(a, b, compare=operator.__eq__):
+def sequence_algorithm(a, b, compare=operator.__eq__, path="", config=None):
+    """The algorithm to diff the sequences a and b at path with.
+
+    Chosen by config, or diff_sequence_algorithm, with "auto" resolved
+    for a and b.
+    """
+    algorithm = None
+    if config is not None:
+        algorithm = config.algorithm_for(path, compare is operator.__eq__)
+    algorithm = algorithm or diff_sequence_algorithm
+    if algorithm == "auto":
+        algorithm = choose_sequence_algorithm(a, b, compare, config)
+    return algorithm
+
+
+def diff_sequence(a, b, compare=operator.__eq__, path="", config=None):
     """Compute a shallow diff of two sequences.
 
     I.e. these algorithms do not recursively diff elements of the sequences.
 
-    This is a wrapper for alternative diff implementations.
+    This is a wrapper for alternative diff implementations. The
+    algorithm for the sequence at path is chosen by sequence_algorithm.
     """
-    if diff_sequence_algorithm == "difflib":
+    algorithm = sequence_algorithm(a, b, compare, path, config)
+    memory_limit = config.grid_memory_limit if config is not None else None
+
+    if algorithm == "difflib":
         if compare is not operator.__eq__:
             raise RuntimeError("Cannot use difflib with comparison other than ==.")
         return diff_sequence_difflib(a, b)
-    elif diff_sequence_algorithm == "bruteforce":
-        return diff_sequence_bruteforce(a, b, compare)
-    elif diff_sequence_algorithm == "myers":
+    elif algorithm == "bruteforce":
+        return diff_sequence_bruteforce(a, b, compare, memory_limit=memory_limit)
+    elif algorithm == "myers":
         return diff_sequence_myers(a, b, compare)
     else:
-        raise RuntimeError("Unknown diff_sequence_algorithm {}.".format(diff_sequence_algorithm))
+        raise RuntimeError("Unknown diff_sequence_algorithm {}.".format(algorithm))
 
 
-def diff_strings_by_char(a, b, path="", predicates=None, differs=None):
+def diff_strings_by_char(a, b, path="", predicates=None, differs=None,
+                         config=None):
     "Compute char-based diff of two strings."
     assert isinstance(a, string_types) and isinstance(b, string_types)
     if a == b:
@@ -49,16 +71,29 @@ def diff_strings_by_char(a, b, path="", predicates=None, differs=None):
         return diff_sequence_difflib(a, b)
 
 
-def diff_strings_linewise(a, b):
+def diff_strings_linewise(a, b, path="", config=None):
     """Do a line-wise diff of two strings
+
+    Lines are aligned as similar according to config.line_similarity.
     """
     assert isinstance(a, string_types) and isinstance(b, string_types)
     lines_a = a.splitlines(True)
     lines_b = b.splitlines(True)
 
     from .generic import diff_lists, compare_strings_approximate
-    predicates = defaultdict(lambda: [
-        compare_strings_approximate,
-        operator.__eq__])
+    from ..config import default_config
+    if config is None:
+        config = default_config()
+    if config.line_similarity is None:
+        compares = [operator.__eq__]
+    else:
+        compares = [
+            functools.partial(compare_strings_approximate,
+                              threshold=config.line_similarity,
+                              ratio=config.similarity_ratio,
+                              max_length=config.approximate_max_length),
+            operator.__eq__]
+    predicates = defaultdict(lambda: compares)
     differs = defaultdict(lambda: diff_strings_by_char)
-    return diff_lists(lines_a, lines_b, predicates=predicates, differs=differs)
+    return diff_lists(lines_a, lines_b, path=path, predicates=predicates,
+                      differs=differs, config=config)
@@ -10,29 +10,45 @@ Utilities for computing 'snakes', or contiguous sequences of equal elements of t
 """
 
 import operator
-from ..diff_format import SequenceDiffBuilder
+from ..diff_format import (SequenceDiffBuilder, op_addrange, op_removerange,
+    op_patch)
+from . import sequences
 from .seq_bruteforce import bruteforce_compute_snakes
+from .seq_difflib import difflib_compute_snakes
+from .seq_myers import myers_compute_snakes
 
-__all__ = ["compute_snakes_multilevel"]
+__all__ = ["compute_snakes_multilevel", "compute_diff_from_snakes",
+           "iter_diff_from_snakes"]
 
 
-def compute_snakes(A, B, compare, rect=None):
+def compute_snakes(A, B, compare, rect=None, path="", config=None):
+    """Compute snakes (i, j, n) of A and B within rect.
+
+    The algorithm is chosen for each call like for diff_sequence.
+    """
     if rect is None:
         rect = (0, 0, len(A), len(B))
     i0, j0, i1, j1 = rect
-
-    # TODO: Implement this using difflib or recursive Myers or simpler
-    # non-recursive Myers algorithm without the middle snake stuff
-
-    # snakes = [(i, j, n)]
-    snakes = bruteforce_compute_snakes(A[i0:i1], B[j0:j1], compare)
+    a, b = A[i0:i1], B[j0:j1]
+
+    algorithm = sequences.sequence_algorithm(a, b, compare, path, config)
+    memory_limit = config.grid_memory_limit if config is not None else None
+    if algorithm == "myers":
+        snakes = myers_compute_snakes(a, b, compare)
+    elif algorithm == "difflib" and compare is operator.__eq__ and \
+            not any(isinstance(x, (list, dict)) for x in a + b):
+        snakes = difflib_compute_snakes(a, b)
+    else:
+        # Uses Hirschberg's algorithm above the memory limit
+        snakes = bruteforce_compute_snakes(a, b, compare, memory_limit)
     snakes = [(i+i0, j+j0, n) for (i, j, n) in snakes]
 
     assert all(compare(A[i+k], B[j+k]) for (i, j, n) in snakes for k in range(n))
     return snakes
 
 
-def compute_snakes_multilevel(A, B, compares, rect=None, level=None):
+def compute_snakes_multilevel(A, B, compares, rect=None, level=None,
+                              path="", config=None):
     """Compute snakes using a multilevel multi-predicate algorithm.
 
     TODO: Document this algorithm.
@@ -44,7 +60,7 @@ def compute_snakes_multilevel(A, B, compares, rect=None, level=None):
 
     # Compute initial set of coarse snakes
     compare = compares[level]
-    snakes = compute_snakes(A, B, compare, rect)
+    snakes = compute_snakes(A, B, compare, rect, path, config)
     if level == 0:
         return snakes
 
@@ -56,7 +72,8 @@ def compute_snakes_multilevel(A, B, compares, rect=None, level=None):
             # Recurse to compute snakes with less accurate
             # compare predicates between the coarse snakes
             subrect = (i0, j0, i, j)
-            newsnakes += compute_snakes_multilevel(A, B, compares, subrect, level-1)
+            newsnakes += compute_snakes_multilevel(A, B, compares, subrect, level-1,
+                                                   path, config)
         if n > 0:
             li, lj, ln = newsnakes[-1]
             if li+ln == i and lj+ln == j:
@@ -73,27 +90,44 @@ def compute_snakes_multilevel(A, B, compares, rect=None, level=None):
     return newsnakes
 
 
-def compute_diff_from_snakes(a, b, snakes, path="", predicates=None, differs=None):
-    "Compute diff from snakes."
+def iter_diff_from_snakes(a, b, snakes, path="", predicates=None, differs=None,
+                          config=None):
+    """Generate the entries of the diff computed from snakes, in order.
 
+    Each matched pair of items is only diffed when the iteration gets
+    to it, so the first entries are available before the rest of the
+    items have been diffed.
+    """
     subpath = "/".join((path, "*"))
     diffit = differs[subpath]
 
-    di = SequenceDiffBuilder()
     i0, j0, i1, j1 = 0, 0, len(a), len(b)
     for i, j, n in snakes + [(i1, j1, 0)]:
-        if i > i0:
-            di.removerange(i0, i-i0)
+        # Insertions go before removals at the same position
         if j > j0:
-            di.addrange(i0, b[j0:j])
+            yield op_addrange(i0, b[j0:j])
+        if i > i0:
+            yield op_removerange(i0, i-i0)
 
         for k in range(n):
             aval = a[i + k]
             bval = b[j + k]
-            cd = diffit(aval, bval, path=subpath, predicates=predicates, differs=differs)
+            if aval is bval:
+                continue
+            cd = diffit(aval, bval, path=subpath, predicates=predicates,
+                        differs=differs, config=config)
             if cd:
-                di.patch(i + k, cd)
+                yield op_patch(i + k, cd)
 
         # Update corner offsets for next rectangle
         i0, j0 = i+n, j+n
+
+
+def compute_diff_from_snakes(a, b, snakes, path="", predicates=None, differs=None,
+                             config=None):
+    "Compute diff from snakes."
+    di = SequenceDiffBuilder()
+    for e in iter_diff_from_snakes(a, b, snakes, path=path, predicates=predicates,
+                                   differs=differs, config=config):
+        di.append(e)
     return di.validated()
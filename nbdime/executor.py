@@ -0,0 +1,120 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Bounded execution of CPU heavy diff and merge computations.
+
+The web server and nbdime.aio hand diff and merge computations to a
+BoundedExecutor so that the event loop stays responsive while they
+run. The executor limits the number of pending computations, so that
+a burst of requests for large notebooks is refused up front instead of
+piling up. Both use the shared executor unless given other limits.
+"""
+
+from __future__ import unicode_literals
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import default_config
+
+
+__all__ = ["BoundedExecutor", "QueueFull",
+           "shared_executor", "set_shared_executor"]
+
+
+# Default used when the server is started without explicit limits,
+# the default number of workers is DiffConfig.workers
+default_max_queue = 16
+
+
+class QueueFull(RuntimeError):
+    """Raised by BoundedExecutor.submit when no more work is accepted."""
+    pass
+
+
+class BoundedExecutor(object):
+    """A thread pool that refuses work beyond a fixed queue depth.
+
+    At most `max_workers` submitted calls run concurrently, and at most
+    `max_queue` additional calls wait for a free worker. Submitting more
+    than that raises QueueFull.
+
+    Calls that have not started yet can be cancelled through the returned
+    future. Calls that are already running always run to completion, but
+    their results are simply dropped if nobody waits for them anymore.
+    """
+
+    def __init__(self, max_workers=None, max_queue=None):
+        if max_workers is None:
+            max_workers = default_config().workers
+        if max_queue is None:
+            max_queue = default_max_queue
+        if max_workers < 1:
+            raise ValueError("Need at least one worker, got %r." % (max_workers,))
+        if max_queue < 0:
+            raise ValueError("Queue depth cannot be negative, got %r." % (max_queue,))
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers)
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self):
+        "The number of submitted calls that have not completed yet."
+        return self._pending
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule fn(*args, **kwargs) and return a concurrent future.
+
+        Raises QueueFull if the executor is already at capacity.
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise QueueFull(
+                    "%d computations already pending." % self._pending)
+            self._pending += 1
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_executor():
+    """The executor shared by all users of nbdime in this process.
+
+    Created with the default limits on first use, unless one has been
+    set with set_shared_executor.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = BoundedExecutor()
+        return _shared
+
+
+def set_shared_executor(executor):
+    """Replace the shared executor, e.g. to configure its limits.
+
+    Returns the previous shared executor, which is not shut down.
+    """
+    global _shared
+    with _shared_lock:
+        previous, _shared = _shared, executor
+    return previous
@@ -14,6 +14,9 @@ Enable in your global git config with:
 Use with:
 
     git diff [<commit> [<commit>]]
+
+When the nbdime daemon is running (`nbdime daemon start`), the driver
+forwards its work to the daemon instead of running it in-process.
 """
 
 from __future__ import print_function
@@ -23,7 +26,7 @@ import os
 import sys
 from subprocess import check_call, check_output, CalledProcessError
 
-from . import nbdiffapp
+from . import daemonclient
 
 
 def enable(global_=False):
@@ -72,7 +75,17 @@ def disable(global_=False):
 def main(args=None):
     if args is None:
         args = sys.argv[1:]
+    if args[:1] == ['diff']:
+        code = daemonclient.run('git-nbdiffdriver', args)
+        if code is not None:
+            return code
+    return main_local(args)
+
+
+def main_local(args):
+    """Run the driver in this process."""
     import argparse
+    from .args import add_diff_render_args
     parser = argparse.ArgumentParser('git-nbdiffdriver', description=__doc__,
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
@@ -81,6 +94,7 @@ def main(args=None):
     diff_parser = subparsers.add_parser('diff',
         description="The actual entrypoint for the diff tool. Git will call this."
     )
+    add_diff_render_args(diff_parser)
     # Argument list
     # path old-file old-hex old-mode new-file new-hex new-mode [ rename-to ]
     diff_parser.add_argument('path')
@@ -110,7 +124,9 @@ def main(args=None):
     )
     opts = parser.parse_args(args)
     if opts.subcommand == 'diff':
-        return nbdiffapp.main([opts.a, opts.b])
+        from . import nbdiffapp
+        options = ['--external-diff'] if opts.external_diff else []
+        return nbdiffapp.main(options + [opts.a, opts.b])
     elif opts.subcommand == 'config':
         opts.config_func(opts.global_)
         return 0
@@ -6,27 +6,34 @@ Other files are displayed via `git diff`.
 
 Enable in your global git config with:
 
-    git-nbdifftool config --enable [--global]
+    git-nbdifftool config --enable [--global] [--session]
 
 Use with:
 
     git difftool [<commit> [<commit>]]
+
+With --session, all notebooks of a `git difftool` run are shown in a
+single browser page, served by one server for the whole session.
 """
 import os
 import sys
 from subprocess import check_call, check_output, CalledProcessError
 
 import nbdime.log
-from .webapp import nbdifftool
+from .webapp import sessionclient
 
 
-def enable(global_=False, set_default=False):
+def enable(global_=False, set_default=False, session=False):
     """Enable nbdime git difftool"""
     cmd = ['git', 'config']
     if global_:
         cmd.append('--global')
 
-    check_call(cmd + ['difftool.nbdime.cmd', 'git-nbdifftool diff "$LOCAL" "$REMOTE"'])
+    if session:
+        tool = 'git-nbdifftool diff --session --name "$MERGED" "$LOCAL" "$REMOTE"'
+    else:
+        tool = 'git-nbdifftool diff "$LOCAL" "$REMOTE"'
+    check_call(cmd + ['difftool.nbdime.cmd', tool])
     if set_default:
         check_call(cmd + ['diff.guitool', 'nbdime'])
 
@@ -34,7 +41,7 @@ def enable(global_=False, set_default=False):
     check_call(cmd + ['difftool.prompt', 'false'])
 
 
-def disable(global_=False, *args):
+def disable(global_=False, *args, **kwargs):
     """Disable nbdime git difftool"""
     cmd = ['git', 'config']
     if global_:
@@ -52,14 +59,21 @@ def disable(global_=False, *args):
                 pass
 
 
-def show_diff(before, after):
+def show_diff(before, after, session=False, name=None):
     """Run the difftool
 
-    If we are diffing a notebook, show the diff via nbdiff.
+    If we are diffing a notebook, show the diff via nbdiff,
+    or in the running difftool session.
     Otherwise, call out to `git diff`.
     """
     # TODO: handle /dev/null (Windows equivalent?) for new or deleted files
     if before.endswith('.ipynb') or after.endswith('ipynb'):
+        if session:
+            return sessionclient.submit(
+                "diff", {"base": before, "remote": after}, name=name)
+        # The web app is only imported when used, session mode
+        # above keeps the per-file start up cheap
+        from .webapp import nbdifftool
         return nbdifftool.main([before, after])
     else:
         # Never returns
@@ -78,7 +92,14 @@ def main(args=None):
     diff_parser = subparsers.add_parser('diff',
         description="The actual entrypoint for the diff tool. Git will call this."
     )
-    from .args import add_filename_args
+    from .args import add_filename_args, add_generic_args
+    add_generic_args(parser)
+    diff_parser.add_argument('--session', action='store_true',
+        help="show the diff in the running difftool session, starting one if needed"
+    )
+    diff_parser.add_argument('--name', default=None,
+        help="the name of the file to show in the session"
+    )
     add_filename_args(diff_parser, ["local", "remote"])
 
     config = subparsers.add_parser('config',
@@ -89,6 +110,9 @@ def main(args=None):
     config.add_argument('--set-default', action='store_true', dest='set_default',
         help="set nbdime as default gui difftool"
     )
+    config.add_argument('--session', action='store_true',
+        help="show all files of a git difftool run in a single session"
+    )
     enable_disable = config.add_mutually_exclusive_group(required=True)
     enable_disable.add_argument('--enable', action='store_const',
         dest='config_func', const=enable,
@@ -101,9 +125,10 @@ def main(args=None):
     opts = parser.parse_args(args)
     nbdime.log.init_logging(level=opts.log_level)
     if opts.subcommand == 'diff':
-        return show_diff(opts.local, opts.remote)
+        return show_diff(opts.local, opts.remote,
+                         session=opts.session, name=opts.name)
     elif opts.subcommand == 'config':
-        opts.config_func(opts.global_, opts.set_default)
+        opts.config_func(opts.global_, opts.set_default, session=opts.session)
         return 0
     else:
         parser.print_help()
@@ -0,0 +1,150 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Reading of notebooks straight from the object store of a git repository.
+
+Instead of checking out files or starting git once for every revision
+of every notebook, a single `git cat-file --batch` process is kept open
+and blobs are streamed from it by object name.
+"""
+
+from __future__ import unicode_literals
+
+from collections import namedtuple
+from subprocess import Popen, PIPE, check_output, CalledProcessError
+
+import nbformat
+
+from .log import NBDiffFormatError
+
+
+__all__ = ["GitObjectReader", "GitNotebookSource", "ChangedFile",
+           "changed_files", "resolve_tree"]
+
+
+def is_null_sha(sha):
+    "Check for the all-zero object name git uses for missing files."
+    return not sha.strip("0")
+
+
+class GitObjectReader(object):
+    """Reads objects through a single `git cat-file --batch` process.
+
+    Objects can be named by anything git understands, like a sha or
+    "<revision>:<path>". Use as a context manager, or call close().
+    """
+
+    def __init__(self, cwd=None):
+        self.process = Popen(["git", "cat-file", "--batch"],
+                             stdin=PIPE, stdout=PIPE, cwd=cwd)
+
+    def read(self, name):
+        """Read an object, returning (sha, type, data).
+
+        Raises KeyError if there is no such object.
+        """
+        if "\n" in name:
+            raise KeyError(name)
+        stdin, stdout = self.process.stdin, self.process.stdout
+        stdin.write(name.encode("utf8") + b"\n")
+        stdin.flush()
+        header = stdout.readline().decode("utf8").split()
+        if len(header) != 3:
+            # "<name> missing" or "<name> ambiguous"
+            raise KeyError(name)
+        sha, kind, size = header
+        data = stdout.read(int(size))
+        stdout.read(1)  # Trailing newline
+        return sha, kind, data
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.stdout.close()
+            self.process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GitNotebookSource(object):
+    """Parses notebooks from blobs read with a GitObjectReader.
+
+    If `cache` is a NotebookCache, parsed notebooks are shared through it.
+    """
+
+    def __init__(self, reader, cache=None):
+        self.reader = reader
+        self.cache = cache
+
+    def read(self, sha):
+        """Read the notebook in blob sha.
+
+        The null sha gives an empty notebook, for added or deleted files.
+        """
+        if is_null_sha(sha):
+            return nbformat.v4.new_notebook()
+        sha, kind, data = self.reader.read(sha)
+        if kind != "blob":
+            raise NBDiffFormatError("%s is a %s, not a notebook." % (sha, kind))
+        if self.cache is not None:
+            return self.cache.reads(data)[0]
+        return nbformat.reads(data.decode("utf8"), as_version=4)
+
+
+class ChangedFile(namedtuple("ChangedFile",
+                             "path status base_sha remote_sha")):
+    """A file changed between two revisions.
+
+    status is the status letter of git diff, like M, A or D. The
+    sha of the side where the file is missing is the null sha.
+    """
+
+    def content_changed(self):
+        "Whether the contents differ, rather than only the mode."
+        return self.base_sha != self.remote_sha
+
+
+def _is_file_mode(mode):
+    "Regular file, or no file."
+    return mode in ("100644", "100755", "000000")
+
+
+def resolve_tree(revision, cwd=None):
+    "Get the sha of the tree of a git revision, or None."
+    try:
+        out = check_output(
+            ["git", "rev-parse", "--verify", "--quiet", revision + "^{tree}"],
+            cwd=cwd, stderr=PIPE)
+    except (CalledProcessError, OSError):
+        return None
+    return out.decode("utf8").strip()
+
+
+def changed_files(base, remote, paths=None, cwd=None):
+    """List the files changed between two git revisions.
+
+    `paths` are git pathspecs relative to `cwd` limiting the files
+    listed. The paths of the returned ChangedFiles are relative to the
+    top of the repository. Renames are listed as a deletion and an
+    addition.
+    """
+    cmd = ["git", "diff-tree", "-r", "-z", "--no-renames", base, remote]
+    if paths:
+        cmd += ["--"] + list(paths)
+    out = check_output(cmd, cwd=cwd).decode("utf8")
+    # With -z, each file is ":<modes> <shas> <status>\0<path>\0"
+    fields = out.split("\0")
+    changed = []
+    for info, path in zip(fields[0::2], fields[1::2]):
+        base_mode, remote_mode, base_sha, remote_sha, status = info[1:].split()
+        if not (_is_file_mode(base_mode) and _is_file_mode(remote_mode)):
+            # Symlinks and submodules
+            continue
+        changed.append(ChangedFile(path, status[0], base_sha, remote_sha))
+    return changed
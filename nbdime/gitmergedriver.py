@@ -14,6 +14,9 @@ Enable in your global git config with:
 Use with:
 
     git merge [<commit> [<commit>]]
+
+When the nbdime daemon is running (`nbdime daemon start`), the driver
+forwards its work to the daemon instead of running it in-process.
 """
 
 from __future__ import print_function
@@ -25,8 +28,9 @@ import argparse
 from subprocess import check_call, check_output, CalledProcessError
 
 import nbdime.log
-from . import nbmergeapp
+from . import daemonclient
 from .args import add_generic_args, add_diff_args, add_merge_args, add_filename_args
+from .args import diff_config_from_args
 
 
 def enable(global_=False):
@@ -77,9 +81,19 @@ def disable(global_=False):
 def main(args=None):
     if args is None:
         args = sys.argv[1:]
+    if args[:1] == ['merge']:
+        code = daemonclient.run('git-nbmergedriver', args)
+        if code is not None:
+            return code
+    return main_local(args)
+
+
+def main_local(args):
+    """Run the driver in this process."""
     parser = argparse.ArgumentParser('git-nbmergedriver', description=__doc__,
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
+    add_generic_args(parser)
     subparsers = parser.add_subparsers(dest='subcommand')
 
     merge_parser = subparsers.add_parser('merge',
@@ -94,6 +108,7 @@ def main(args=None):
     # TODO: support git-config-specified conflict markers inside sources
     merge_parser.add_argument('marker')
     merge_parser.add_argument('output', nargs='?')
+    merge_parser.set_defaults(decisions=False)
     # "The merge driver can learn the pathname in which the merged result will
     # be stored via placeholder %P"
     # - NOTE: This is not where the driver should store its output, see below!
@@ -119,6 +134,8 @@ def main(args=None):
         # file named with %A by overwriting it, and exit with zero status if it
         # managed to merge them cleanly, or non-zero if there were conflicts."
         opts.output = opts.local
+        diff_config_from_args(opts, merge_parser)
+        from . import nbmergeapp
         return nbmergeapp.main_merge(opts)
     elif opts.subcommand == 'config':
         opts.config_func(opts.global_)
@@ -5,28 +5,34 @@ Uses nbdime to merge notebooks instead of plain text merges of JSON.
 
 Enable in your global git config with:
 
-    git-nbmergetool config --enable [--global]
+    git-nbmergetool config --enable [--global] [--session]
 
 Use with:
 
     git mergetool [<commit> [<commit>]]
+
+With --session, all notebooks of a `git mergetool` run are merged in a
+single browser page, served by one server for the whole session.
 """
 import sys
 from subprocess import check_call, check_output, CalledProcessError
 
 import nbdime.log
-from .webapp import nbmergetool
-from .args import add_filename_args
+from .webapp import sessionclient
+from .args import add_filename_args, add_generic_args
 
 
-def enable(global_=False, set_default=False):
+def enable(global_=False, set_default=False, session=False):
     """Enable nbdime git mergetool"""
     cmd = ['git', 'config']
     if global_:
         cmd.append('--global')
 
     # Register CLI tool
-    check_call(cmd + ['mergetool.nbdime.cmd', 'git-nbmergetool merge "$BASE" "$LOCAL" "$REMOTE" "$MERGED"'])
+    tool = 'git-nbmergetool merge "$BASE" "$LOCAL" "$REMOTE" "$MERGED"'
+    if session:
+        tool = tool.replace('merge ', 'merge --session ', 1)
+    check_call(cmd + ['mergetool.nbdime.cmd', tool])
 
     # Common setting:
     check_call(cmd + ['mergetool.prompt', 'false'])
@@ -36,7 +42,7 @@ def enable(global_=False, set_default=False):
         check_call(cmd + ['merge.tool', 'nbdime'])
 
 
-def disable(global_=False, *args):
+def disable(global_=False, *args, **kwargs):
     """Disable nbdime git mergetool"""
     cmd = ['git', 'config']
     if global_:
@@ -60,11 +66,15 @@ def main(args=None):
     parser = argparse.ArgumentParser('git-nbmergetool', description=__doc__,
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
+    add_generic_args(parser)
     subparsers = parser.add_subparsers(dest='subcommand')
 
     merge_parser = subparsers.add_parser('merge',
         description="The actual entrypoint for the mergetool. Git will call this."
     )
+    merge_parser.add_argument('--session', action='store_true',
+        help="merge in the running mergetool session, starting one if needed"
+    )
 
     add_filename_args(merge_parser, ["base", "local", "remote", "merged"])
 
@@ -76,6 +86,9 @@ def main(args=None):
     config.add_argument('--set-default', action='store_true', dest='set_default',
         help="set nbdime as default mergetool"
     )
+    config.add_argument('--session', action='store_true',
+        help="merge all files of a git mergetool run in a single session"
+    )
     enable_disable = config.add_mutually_exclusive_group(required=True)
     enable_disable.add_argument('--enable', action='store_const',
         dest='config_func', const=enable,
@@ -88,9 +101,15 @@ def main(args=None):
     opts = parser.parse_args(args)
     nbdime.log.init_logging(level=opts.log_level)
     if opts.subcommand == 'merge':
+        if opts.session:
+            return sessionclient.submit(
+                "merge",
+                {"base": opts.base, "local": opts.local, "remote": opts.remote},
+                name=opts.merged, output=opts.merged)
+        from .webapp import nbmergetool
         return nbmergetool.main([opts.base, opts.local, opts.remote, opts.merged])
     elif opts.subcommand == 'config':
-        opts.config_func(opts.global_, opts.set_default)
+        opts.config_func(opts.global_, opts.set_default, session=opts.session)
         return 0
     else:
         parser.print_help()
@@ -0,0 +1,104 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Sharing equal values between notebooks.
+
+The notebooks of a diff or merge are mostly equal. An Interner
+replaces equal strings and equal subtrees of the notebooks it is given
+with a single shared object, so the content common to base, local and
+remote is stored once. Values are shared, so they must be treated as
+read-only afterwards. In return, diff and merge can tell that shared
+values are equal by their identity alone.
+"""
+
+from __future__ import unicode_literals
+
+import copy
+
+from six import string_types
+
+from .loader import Blob
+
+
+__all__ = ["Interner", "intern_notebooks", "intern_notebook_copies"]
+
+
+class Interner(object):
+    """Replaces equal values with one canonical object.
+
+    Containers are interned in place, each of their items is replaced
+    by the canonical equal item. With copy=True, containers are never
+    changed, a container with items to replace is copied instead. Since the items of canonical containers
+    are canonical, containers are equal when they have the same type
+    and identical items, so each one is keyed on the identities of its
+    items, and interning costs one pass over the values.
+    """
+
+    def __init__(self, copy=False):
+        self._copy = copy
+        self._strings = {}
+        self._values = {}
+
+    def __len__(self):
+        return len(self._strings) + len(self._values)
+
+    def _key(self, value):
+        "The key of an item of an interned container."
+        if isinstance(value, string_types):
+            return value
+        elif isinstance(value, (dict, list, Blob)):
+            return id(value)
+        # Keep 1, 1.0 and True apart
+        return (type(value), value)
+
+    def intern(self, value):
+        "Intern value and its items, returning the canonical equal value."
+        if isinstance(value, string_types):
+            return self._strings.setdefault(value, value)
+        elif isinstance(value, dict):
+            original = value
+            for k, v in list(original.items()):
+                canonical = self.intern(v)
+                if canonical is not v:
+                    if self._copy and value is original:
+                        value = copy.copy(original)
+                    value[k] = canonical
+            key = (type(value),) + tuple(sorted(
+                (k, self._key(v)) for k, v in value.items()))
+        elif isinstance(value, list):
+            original = value
+            for i, v in enumerate(original):
+                canonical = self.intern(v)
+                if canonical is not v:
+                    if self._copy and value is original:
+                        value = list(original)
+                    value[i] = canonical
+            key = (list,) + tuple(self._key(v) for v in value)
+        elif isinstance(value, Blob):
+            key = (Blob, value.digest)
+        else:
+            return value
+        return self._values.setdefault(key, value)
+
+
+def intern_notebooks(*notebooks):
+    """Share equal values between notebooks, interning them in place.
+
+    Returns the notebooks, which may now be the same object if they
+    are equal. The notebooks must be treated as read-only afterwards.
+    """
+    interner = Interner()
+    return [interner.intern(nb) for nb in notebooks]
+
+
+def intern_notebook_copies(*notebooks):
+    """Share equal values between notebooks without changing them.
+
+    Like intern_notebooks, but the parts of the notebooks with values
+    to share are copied, so notebooks shared with other threads, like
+    those of a NotebookCache, can be interned while in use.
+    """
+    interner = Interner(copy=True)
+    return [interner.intern(nb) for nb in notebooks]
@@ -0,0 +1,206 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Finding the parts of a notebook file without parsing all of it.
+
+The JSON of a notebook is scanned for the byte ranges of its top level
+fields and cells. Strings are skipped without being decoded, so a
+scan costs little more than a pass over the bytes, and a few cells can be parsed from a huge notebook without
+building objects for the rest of it.
+"""
+
+from __future__ import unicode_literals
+
+import io
+import json
+import mmap
+import os
+import re
+
+
+__all__ = ["scan_value", "scan_object", "scan_array", "scan_notebook",
+           "map_file", "NotebookScan"]
+
+
+_whitespace = re.compile(br"[ \t\n\r]*")
+_scalar = re.compile(br"[^,:\]} \t\n\r]+")
+
+# Runs of anything but brackets and long strings. Long strings, like
+# base64 encoded images, are skipped with find instead, which is much
+# faster than the regular expression engine.
+_run = re.compile(
+    br'[^"\[\]{}]*(?:"[^"\\]{0,200}(?:\\.[^"\\]{0,200}){0,20}"[^"\[\]{}]*)*',
+    re.DOTALL)
+
+
+def _skip_whitespace(buf, pos):
+    return _whitespace.match(buf, pos).end()
+
+
+def _expect(buf, pos, char):
+    "Skip whitespace and char, returning the position after it."
+    pos = _skip_whitespace(buf, pos)
+    if buf[pos:pos + 1] != char:
+        raise ValueError("Expected %r at position %d" % (char, pos))
+    return pos + 1
+
+
+def _string_end(buf, pos):
+    "Find the end of the string starting at pos."
+    end = pos
+    while True:
+        end = buf.find(b'"', end + 1)
+        if end < 0:
+            raise ValueError("Unterminated string at position %d" % pos)
+        # Quotes after an odd number of backslashes are escaped
+        k = end
+        while buf[k - 1:k] == b"\\":
+            k -= 1
+        if (end - k) % 2 == 0:
+            return end + 1
+
+
+def scan_value(buf, pos):
+    """Find the JSON value starting at or after pos in buf.
+
+    Returns its (start, end) positions, skipping leading whitespace.
+    The value is not parsed or checked to be valid JSON, only strings
+    and brackets are matched.
+    """
+    start = pos = _skip_whitespace(buf, pos)
+    c = buf[pos:pos + 1]
+    if c == b'"':
+        return start, _string_end(buf, pos)
+    elif c in (b"[", b"{"):
+        depth = 0
+        while True:
+            pos = _run.match(buf, pos).end()
+            c = buf[pos:pos + 1]
+            if c == b'"':
+                pos = _string_end(buf, pos)
+            elif c in (b"[", b"{"):
+                depth += 1
+                pos += 1
+            elif c in (b"]", b"}"):
+                depth -= 1
+                pos += 1
+                if depth == 0:
+                    return start, pos
+            else:
+                raise ValueError("Unterminated value at position %d" % start)
+    else:
+        m = _scalar.match(buf, pos)
+        if m is None:
+            raise ValueError("Expected a value at position %d" % pos)
+        return start, m.end()
+
+
+def _scan_items(buf, pos, close, keys):
+    """Find the items of a JSON object or array starting at pos.
+
+    Yields (key, start, end) for each item, with key None for arrays.
+    """
+    pos = _skip_whitespace(buf, pos)
+    if buf[pos:pos + 1] == close:
+        return
+    while True:
+        key = None
+        if keys:
+            start, end = scan_value(buf, pos)
+            key = json.loads(buf[start:end].decode("utf8"))
+            pos = _expect(buf, end, b":")
+        start, pos = scan_value(buf, pos)
+        yield key, start, pos
+        pos = _skip_whitespace(buf, pos)
+        c = buf[pos:pos + 1]
+        if c == close:
+            return
+        elif c != b",":
+            raise ValueError("Expected ',' or %r at position %d" % (close, pos))
+        pos += 1
+
+
+def scan_object(buf, pos):
+    """Find the items of the JSON object starting at or after pos.
+
+    Yields (key, start, end) for each item, with the byte range of its
+    value.
+    """
+    pos = _expect(buf, pos, b"{")
+    return _scan_items(buf, pos, b"}", True)
+
+
+def scan_array(buf, pos):
+    """Find the items of the JSON array starting at or after pos.
+
+    Yields (start, end) for each item.
+    """
+    pos = _expect(buf, pos, b"[")
+    for _, start, end in _scan_items(buf, pos, b"]", False):
+        yield start, end
+
+
+def scan_notebook(buf):
+    """Find the top level fields and the cells of a notebook in buf.
+
+    Returns (fields, cells), where fields maps the keys of the notebook
+    to the (start, end) byte ranges of their values, and cells is a
+    list of the byte ranges of each cell.
+    """
+    fields = {}
+    cells = []
+    for key, start, end in scan_object(buf, 0):
+        fields[key] = (start, end)
+        if key == "cells":
+            cells = list(scan_array(buf, start))
+    return fields, cells
+
+
+def map_file(filename):
+    "Memory map a file for reading."
+    with io.open(filename, "rb") as f:
+        if os.name == "nt":
+            # Mapped files can not be replaced on Windows
+            return f.read()
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can not be mapped
+            return f.read()
+
+
+class NotebookScan(object):
+    """The scanned parts of a notebook file, parsed when asked for.
+
+    The file is memory mapped, so only the parts that are read need
+    to be loaded. Nothing is validated. Use as a context manager, or
+    call close().
+    """
+
+    def __init__(self, filename):
+        self.buf = map_file(filename)
+        self.fields, self.cells = scan_notebook(self.buf)
+
+    def read_field(self, key, default=None):
+        "Parse a top level field of the notebook."
+        if key not in self.fields:
+            return default
+        start, end = self.fields[key]
+        return json.loads(self.buf[start:end].decode("utf8"))
+
+    def read_cells(self, start=None, stop=None):
+        "Parse the cells in the range start:stop, like a slice."
+        return [json.loads(self.buf[s:e].decode("utf8"))
+                for s, e in self.cells[start:stop]]
+
+    def close(self):
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,339 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Reading notebooks incrementally, leaving large outputs unparsed.
+
+Unlike nbformat.read, the notebook is parsed one cell at a time from
+a memory mapped file, validation is optional, and large binary output
+data and attachments are kept as Blobs, slices of the file that are
+never decoded unless their values are asked for. Diffing, patching
+and merging pass Blobs through as atomic values, and write_json and
+write_notebook copy their bytes straight back out.
+"""
+
+from __future__ import unicode_literals
+
+import copy
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import types
+import uuid
+
+import nbformat
+from nbformat.v4.rwbase import split_lines, strip_transient
+
+from .cache import content_digest
+from .jsonscan import scan_notebook, scan_object, scan_array, map_file
+from .utils import is_binary_mimetype
+
+
+__all__ = ["Blob", "read_notebook", "reads_notebook",
+           "write_json", "write_notebook", "save_notebook", "json_default"]
+
+
+# Binary output data and attachments larger than this many bytes are
+# kept as Blobs
+BLOB_SIZE = 2**16
+
+# Blobs are written in pieces of this many bytes
+WRITE_SIZE = 2**20
+
+
+class Blob(object):
+    """A JSON string kept as a slice of the bytes it was read from.
+
+    Blobs are identified by a digest of their bytes, computed when
+    created. Blobs compare equal when their digests are equal, and
+    compare to other values by their decoded value. Blobs are
+    immutable, so copies are the same object.
+    """
+
+    __slots__ = ("buf", "start", "end", "digest")
+
+    def __init__(self, buf, start, end, digest=None):
+        self.buf = buf
+        self.start = start
+        self.end = end
+        if digest is None:
+            digest = content_digest(buf[start:end])
+        self.digest = digest
+
+    @property
+    def size(self):
+        return self.end - self.start
+
+    def raw(self):
+        "The JSON bytes of the value, including quotes."
+        return self.buf[self.start:self.end]
+
+    def value(self):
+        "Decode the value."
+        return json.loads(self.raw().decode("utf8"))
+
+    def chunks(self):
+        "Generate the JSON bytes of the value in pieces."
+        for pos in range(self.start, self.end, WRITE_SIZE):
+            yield self.buf[pos:min(pos + WRITE_SIZE, self.end)]
+
+    def write_to(self, fp, text=False):
+        "Write the JSON bytes to a binary file, or as text if text is true."
+        for data in self.chunks():
+            fp.write(data.decode("utf8") if text else data)
+
+    def __eq__(self, other):
+        if isinstance(other, Blob):
+            return self.digest == other.digest
+        return self.value() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    # Equal strings would have different hashes
+    __hash__ = None
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return "Blob(<%d bytes, sha1=%s>)" % (self.size, self.digest)
+
+
+def json_default(obj):
+    "Decode Blobs when serializing, for the default argument of json.dump."
+    if isinstance(obj, Blob):
+        return obj.value()
+    raise TypeError("%r is not JSON serializable" % (obj,))
+
+
+class _StreamEncoder(json.JSONEncoder):
+    """Encodes Blobs and generators as unique marker strings.
+
+    The markers are replaced by the values when writing.
+    """
+
+    def __init__(self, *args, **kwargs):
+        json.JSONEncoder.__init__(self, *args, **kwargs)
+        self.values = []
+        token = "nbdime-stream-%s-" % uuid.uuid4().hex
+        self.marker = re.compile(r'"%s(\d+)"' % token)
+        self.marker_prefix = '"' + token
+        self.token = token
+
+    def default(self, obj):
+        if isinstance(obj, (Blob, types.GeneratorType)):
+            self.values.append(obj)
+            return "%s%d" % (self.token, len(self.values) - 1)
+        return json.JSONEncoder.default(self, obj)
+
+
+def _indented(write, pad):
+    "Wrap write to indent all lines but the first with pad."
+    newline = "\n" if isinstance(pad, type("")) else b"\n"
+    return lambda data: write(data.replace(newline, newline + pad))
+
+
+def _write_array(items, write, text, kwargs, encoder, pad):
+    "Write the items of a generator as a JSON array, one at a time."
+    def encode(s):
+        return s if text else s.encode("utf8")
+
+    indent = encoder.indent
+    if isinstance(indent, int):
+        indent = " " * indent
+    inner = None if indent is None else pad + indent
+    empty = True
+    write(encode("["))
+    for item in items:
+        sep = "" if empty else encoder.item_separator
+        if inner is None:
+            write(encode(sep))
+            _write_json(item, write, text, kwargs)
+        else:
+            write(encode(sep + "\n" + inner))
+            _write_json(item, _indented(write, encode(inner)), text, kwargs)
+        empty = False
+    if inner is not None and not empty:
+        write(encode("\n" + pad))
+    write(encode("]"))
+
+
+def _write_json(obj, write, text, kwargs):
+    encoder = _StreamEncoder(**kwargs)
+    pending = []
+    # The indentation of the last line written
+    pad = [""]
+
+    def flush():
+        if pending:
+            data = "".join(pending)
+            del pending[:]
+            write(data if text else data.encode("utf8"))
+
+    def append(part):
+        pending.append(part)
+        if "\n" in part:
+            line = part.rsplit("\n", 1)[1]
+            pad[0] = line[:len(line) - len(line.lstrip(" \t"))]
+
+    size = 0
+    for chunk in encoder.iterencode(obj):
+        if encoder.marker_prefix in chunk:
+            parts = encoder.marker.split(chunk)
+            # parts alternates text and value numbers
+            for i, part in enumerate(parts):
+                if i % 2 == 0:
+                    if part:
+                        append(part)
+                    continue
+                flush()
+                value = encoder.values[int(part)]
+                if isinstance(value, Blob):
+                    for data in value.chunks():
+                        write(data.decode("utf8") if text else data)
+                else:
+                    _write_array(value, write, text, kwargs, encoder, pad[0])
+        else:
+            append(chunk)
+        size += len(chunk)
+        if size > WRITE_SIZE:
+            flush()
+            size = 0
+    flush()
+
+
+def write_json(obj, fp, **kwargs):
+    """Serialize obj as JSON to fp, like json.dump.
+
+    The bytes of Blobs are copied from their source without decoding
+    them. Generators are written as arrays, each item encoded and
+    written when it is generated, so the whole array is never held in
+    memory. fp may be a binary or a text file.
+    """
+    _write_json(obj, fp.write, isinstance(fp, io.TextIOBase), kwargs)
+
+
+def write_notebook(nb, fp):
+    """Write a v4 notebook to fp in the same format as nbformat.write.
+
+    fp may be a binary or a text file. Blobs are written with
+    write_json, and the notebook is not validated.
+    """
+    # Copying shares Blobs, they are immutable
+    nb = strip_transient(split_lines(copy.deepcopy(nb)))
+    write_json(nb, fp, indent=1, sort_keys=True, separators=(",", ": "),
+               ensure_ascii=False)
+    newline = "\n"
+    fp.write(newline if isinstance(fp, io.TextIOBase) else newline.encode("utf8"))
+
+
+def _blob_path(path):
+    "Check if the value at a path within a cell may be kept as a Blob."
+    n = len(path)
+    if n == 4 and path[0] == "outputs" and path[2] == "data":
+        return is_binary_mimetype(path[3])
+    if n == 3 and path[0] == "attachments":
+        return is_binary_mimetype(path[2])
+    return False
+
+
+def _read_value(buf, start, end, path, blob_size, blobs):
+    """Parse the JSON value in buf[start:end] found at path within a cell.
+
+    Large values that may be Blobs are replaced with an empty string,
+    and recorded in blobs with their path.
+    """
+    if end - start > blob_size:
+        c = buf[start:start + 1]
+        if c == b'"' and _blob_path(path):
+            blobs.append((path, Blob(buf, start, end)))
+            return ""
+        elif c == b"{":
+            return dict(
+                (key, _read_value(buf, s, e, path + (key,), blob_size, blobs))
+                for key, s, e in scan_object(buf, start))
+        elif c == b"[":
+            return [_read_value(buf, s, e, path + (i,), blob_size, blobs)
+                    for i, (s, e) in enumerate(scan_array(buf, start))]
+    return json.loads(buf[start:end].decode("utf8"))
+
+
+def reads_notebook(buf, validate=False, blob_size=BLOB_SIZE):
+    """Read a notebook from bytes, or a buffer like a memory map.
+
+    Returns a v4 notebook, where binary output data and attachments
+    longer than blob_size bytes are Blobs referring to buf. If
+    validate is true, the notebook is checked against the nbformat
+    schema, and nbformat.ValidationError raised if it is invalid.
+    Other notebook versions are read and converted by nbformat.
+    """
+    fields, cells = scan_notebook(buf)
+    version = fields.get("nbformat")
+    if version is None or json.loads(buf[version[0]:version[1]].decode("utf8")) != 4:
+        nb = nbformat.reads(buf[:].decode("utf8"), as_version=4)
+        if validate:
+            nbformat.validate(nb)
+        return nb
+
+    nb = {}
+    for key, (start, end) in fields.items():
+        if key != "cells":
+            nb[key] = json.loads(buf[start:end].decode("utf8"))
+    nb["cells"] = []
+    blobs = []
+    for start, end in cells:
+        cell_blobs = []
+        nb["cells"].append(_read_value(buf, start, end, (), blob_size, cell_blobs))
+        blobs.append(cell_blobs)
+    nb = nbformat.v4.to_notebook_json(nb)
+    if validate:
+        # Blobs are strings, and are left as empty strings here
+        nbformat.validate(nb)
+
+    for cell, cell_blobs in zip(nb.cells, blobs):
+        for path, value in cell_blobs:
+            container = cell
+            for key in path[:-1]:
+                container = container[key]
+            container[path[-1]] = value
+    return nb
+
+
+def read_notebook(filename, validate=False, blob_size=BLOB_SIZE):
+    """Read a notebook file with reads_notebook.
+
+    The file is memory mapped, and must not be changed while Blobs
+    from it are in use.
+    """
+    return reads_notebook(map_file(filename), validate, blob_size)
+
+
+def save_notebook(nb, filename):
+    """Write a notebook file with write_notebook.
+
+    The notebook is written to a temporary file which then replaces
+    filename, so Blobs read from filename stay valid while writing.
+    """
+    dirname = os.path.dirname(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(dir=dirname, prefix=".nbdime-", suffix=".ipynb")
+    try:
+        with io.open(fd, "w", encoding="utf8") as f:
+            write_notebook(nb, f)
+        if os.path.exists(filename):
+            shutil.copymode(filename, tmp)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp, 0o666 & ~umask)
+        getattr(os, "replace", os.rename)(tmp, filename)
+    except BaseException:
+        os.remove(tmp)
+        raise
@@ -397,10 +397,37 @@ def resolve_action(base, decision):
         raise NotImplementedError("The action \"%s\" is not defined" % a)
 
 
+def _as_nodes(value):
+    """Convert dicts in value to NotebookNodes, like nbformat.from_dict.
+
+    Values that need no conversion are returned as they are, so they
+    stay shared.
+    """
+    if isinstance(value, dict):
+        items = [(k, _as_nodes(v)) for k, v in value.items()]
+        if type(value) is nbformat.NotebookNode and all(
+                v is value[k] for k, v in items):
+            return value
+        return nbformat.NotebookNode(items)
+    elif isinstance(value, (tuple, list)):
+        items = [_as_nodes(v) for v in value]
+        if type(value) is list and all(
+                v is w for v, w in zip(items, value)):
+            return value
+        return items
+    return value
+
+
 def apply_decisions(base, decisions):
     """Apply a list of merge decisions to base.
+
+    The merged notebook shares the values that were not changed with
+    base, local and remote, and all must be treated as read-only.
     """
-    merged = copy.deepcopy(base)
+    # Containers are copied on the way to the paths that are patched,
+    # base is not modified
+    merged = copy.copy(base)
+    private = set([id(merged)])
     prev_path = None
     parent = None
     last_key = None
@@ -432,14 +459,16 @@ def apply_decisions(base, decisions):
             # Different path, start a new collection
             if prev_path is not None:
                 # First, apply previous diffs
+                patched = patch(resolved, diffs, share=True)
+                private.add(id(patched))
                 if parent is None:
                     # Operations on root create new merged object
-                    merged = patch(resolved, diffs)
+                    merged = patched
                 else:
                     # If not, overwrite entry in parent (which is an entry in
                     # merged). This is ok, as no paths should point to
                     # subobjects of the patched object
-                    parent[last_key] = patch(resolved, diffs)
+                    parent[last_key] = patched
 
             prev_path = path
             # Resolve path in base and output
@@ -450,6 +479,9 @@ def apply_decisions(base, decisions):
                 parent = resolved
                 resolved = resolved[key]   # Should raise if key missing
                 last_key = key
+                if id(resolved) not in private:
+                    resolved = parent[key] = copy.copy(resolved)
+                    private.add(id(resolved))
             diffs = resolve_action(resolved, md)
             if line:
                 diffs = push_path(line, diffs)
@@ -457,9 +489,9 @@ def apply_decisions(base, decisions):
     # Apply the last collection of diffs, if present (same as above)
     if prev_path is not None:
         if parent is None:
-            merged = patch(resolved, diffs)
+            merged = patch(resolved, diffs, share=True)
         else:
-            parent[last_key] = patch(resolved, diffs)
+            parent[last_key] = patch(resolved, diffs, share=True)
 
-    merged = nbformat.from_dict(merged)
+    merged = _as_nodes(merged)
     return merged
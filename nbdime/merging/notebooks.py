@@ -12,6 +12,7 @@ from six import StringIO
 from .generic import decide_merge_with_diff
 from .decisions import apply_decisions
 from .autoresolve import autoresolve
+from ..args import diff_config_from_args
 from ..diffing.notebooks import diff_notebooks
 from ..utils import Strategies
 from ..prettyprint import pretty_print_notebook_diff, pretty_print_merge_decisions, pretty_print_notebook
@@ -111,9 +112,10 @@ def autoresolve_notebook_conflicts(base, decisions, args):
 
 
 def decide_notebook_merge(base, local, remote, args=None):
-    # Compute notebook specific diffs
-    local_diffs = diff_notebooks(base, local)
-    remote_diffs = diff_notebooks(base, remote)
+    # Compute notebook specific diffs, with the diff settings of args
+    config = diff_config_from_args(args)
+    local_diffs = diff_notebooks(base, local, config)
+    remote_diffs = diff_notebooks(base, remote, config)
 
     if args and args.log_level == "DEBUG":
         _logger.debug("In merge, base-local diff:")
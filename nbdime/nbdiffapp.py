@@ -10,51 +10,123 @@ import io
 import os
 import sys
 import argparse
-import nbformat
-import json
 
 import nbdime
-from nbdime.diffing.notebooks import diff_notebooks
-from nbdime.prettyprint import pretty_print_notebook_diff
+from nbdime import loader, prettyprint
+from nbdime.diffing.notebooks import iter_diff_notebooks, lazy_diff_notebooks
+from nbdime.prettyprint import pretty_print_notebook_diff_entries, terminal_output
 from nbdime.args import add_generic_args, add_diff_args, add_filename_args
+from nbdime.args import add_diff_render_args
+from nbdime.args import diff_config_from_args
 
 
-_description = "Compute the difference between two Jupyter notebooks."
+_description = """Compute the difference between two Jupyter notebooks.
+
+When base and remote are git revisions, for example `nbdiff HEAD~1 HEAD`,
+all notebooks changed between them are diffed, optionally limited to
+the given paths.
+"""
+
+
+# Cache of parsed notebooks, set by long running processes like the daemon
+notebook_cache = None
+
+
+def read_notebook(filename):
+    """Read a notebook, through the notebook cache if there is one.
+
+    Without a cache, large binary outputs are left unparsed until
+    they are needed, and the notebook is not validated.
+    """
+    if notebook_cache is None:
+        return loader.read_notebook(filename)
+    with io.open(filename, "rb") as f:
+        # Keyed by content, git passes the same blobs under new names
+        return notebook_cache.reads(f.read())[0]
+
+
+def write_diff(dfn, d):
+    """Write a diff as JSON to the file dfn.
+
+    Generators in d, like the diffs of lazy_diff_notebooks, are
+    written while they are computed.
+    """
+    with io.open(dfn, "w", encoding="utf8") as df:
+        # Compact version:
+        #json.dump(d, df)
+        # Verbose version, with Blobs copied from the notebooks:
+        loader.write_json(d, df, indent=2, separators=(",", ": "))
 
 
 def main_diff(args):
     afn = args.base
     bfn = args.remote
     dfn = args.output
+    prettyprint.use_builtin_diff = not getattr(args, "external_diff", False)
+
+    if args.paths or not (os.path.exists(afn) and os.path.exists(bfn)):
+        from .gitfiles import resolve_tree
+        if resolve_tree(afn) and resolve_tree(bfn):
+            return main_diff_revisions(args)
+        if args.paths:
+            print("Paths can only be given with git revisions.")
+            return 1
 
     for fn in (afn, bfn):
         if not os.path.exists(fn):
             print("Missing file {}".format(fn))
             return 1
 
-    a = nbformat.read(afn, as_version=4)
-    b = nbformat.read(bfn, as_version=4)
-
-    d = diff_notebooks(a, b)
+    config = diff_config_from_args(args)
+    a = read_notebook(afn)
+    b = read_notebook(bfn)
 
     if dfn:
-        with io.open(dfn, "w", encoding="utf8") as df:
-            # Compact version:
-            #json.dump(d, df)
-            # Verbose version:
-            json.dump(d, df, indent=2, separators=(",", ": "))
+        write_diff(dfn, lazy_diff_notebooks(a, b, config))
     else:
-        # This printer is to keep the unit tests passing,
-        # some tests capture output with capsys which doesn't
-        # pick up on sys.stdout.write()
-        class Printer:
-            def write(self, text):
-                print(text, end="")
-        pretty_print_notebook_diff(afn, bfn, a, d, Printer())
+        # Print each cell as soon as it has been diffed
+        with terminal_output() as out:
+            pretty_print_notebook_diff_entries(
+                afn, bfn, a, iter_diff_notebooks(a, b, config), out)
 
     return 0
 
 
+def main_diff_revisions(args):
+    """Diff the notebooks changed between two git revisions.
+
+    All notebooks are read from a single `git cat-file` process.
+    With an output file, the diffs are written as an object
+    mapping the paths of the notebooks to their diffs.
+    """
+    from .gitfiles import GitObjectReader, GitNotebookSource, changed_files
+    base, remote = args.base, args.remote
+    config = diff_config_from_args(args)
+    changed = changed_files(base, remote, args.paths or ["*.ipynb"])
+    # Mode changes keep the blob, no need to parse it
+    changed = [f for f in changed
+               if f.path.endswith(".ipynb") and f.content_changed()]
+    with GitObjectReader() as reader:
+        source = GitNotebookSource(reader, cache=notebook_cache)
+        if args.output:
+            def lazy_diff(f):
+                # Read the notebooks when the diff is written
+                a = source.read(f.base_sha)
+                b = source.read(f.remote_sha)
+                for e in lazy_diff_notebooks(a, b, config):
+                    yield e
+            write_diff(args.output, dict((f.path, lazy_diff(f)) for f in changed))
+            return 0
+        with terminal_output() as out:
+            for f in changed:
+                a = source.read(f.base_sha)
+                b = source.read(f.remote_sha)
+                pretty_print_notebook_diff_entries(
+                    "%s:%s" % (base, f.path), "%s:%s" % (remote, f.path),
+                    a, iter_diff_notebooks(a, b, config), out)
+    return 0
+
+
 def _build_arg_parser():
     """Creates an argument parser for the nbdiff command."""
     parser = argparse.ArgumentParser(
@@ -63,7 +135,13 @@ def _build_arg_parser():
         )
     add_generic_args(parser)
     add_diff_args(parser)
+    add_diff_render_args(parser)
     add_filename_args(parser, ["base", "remote"])
+    parser.add_argument(
+        'paths',
+        nargs='*',
+        help="with git revisions as base and remote, only diff "
+             "notebooks in these paths.")
 
     parser.add_argument(
         '-o', '--output',
@@ -80,8 +158,11 @@ def main(args=None):
     if sys.platform.startswith('win'):
         import colorama
         colorama.init()
-    arguments = _build_arg_parser().parse_args(args)
+    parser = _build_arg_parser()
+    arguments = parser.parse_args(args)
     nbdime.log.init_logging(level=arguments.log_level)
+    # Report invalid diff settings before diffing
+    diff_config_from_args(arguments, parser)
     return main_diff(arguments)
 
 
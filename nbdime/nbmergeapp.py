@@ -11,10 +11,11 @@ import os
 import sys
 import argparse
 
-import nbformat
-
 import nbdime
 import nbdime.log
+from nbdime.args import diff_config_from_args
+from nbdime.interning import intern_notebooks
+from nbdime.loader import read_notebook, write_notebook, save_notebook
 from nbdime.merging import merge_notebooks
 from nbdime.prettyprint import pretty_print_merge_decisions
 from .merging import merge_notebooks
@@ -34,9 +35,10 @@ def main_merge(args):
             nbdime.log.error("Cannot find file '{}'".format(fn))
             return 1
 
-    b = nbformat.read(bfn, as_version=4)
-    l = nbformat.read(lfn, as_version=4)
-    r = nbformat.read(rfn, as_version=4)
+    # Large outputs are passed through without being decoded, and
+    # values common to the notebooks are only kept once
+    b, l, r = intern_notebooks(
+        read_notebook(bfn), read_notebook(lfn), read_notebook(rfn))
 
     merged, decisions = merge_notebooks(b, l, r, args)
     conflicted = [d for d in decisions if d.conflict]
@@ -55,12 +57,11 @@ def main_merge(args):
         nbdime.log.warning("Conflicts:\n%s", out.getvalue())
     elif mfn:
         # Write partial or fully completed merge to given foo.ipynb filename
-        with io.open(mfn, "w", encoding="utf8") as mf:
-            nbformat.write(merged, mfn)
+        save_notebook(merged, mfn)
         nbdime.log.info("Merge result written to %s" % mfn)
     else:
         # Write merged notebook to terminal
-        nbformat.write(merged, sys.stdout)
+        write_notebook(merged, sys.stdout)
     return returncode
 
 
@@ -95,8 +96,11 @@ def main(args=None):
     if args is None:
         args = sys.argv[1:]
     nbdime.log.init_logging()
-    arguments = _build_arg_parser().parse_args(args)
+    parser = _build_arg_parser()
+    arguments = parser.parse_args(args)
     nbdime.log.init_logging(level=arguments.log_level)
+    # Report invalid diff settings before merging
+    diff_config_from_args(arguments, parser)
     return main_merge(arguments)
 
 
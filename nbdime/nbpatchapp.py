@@ -10,10 +10,10 @@ import os
 import sys
 import argparse
 import json
-import nbformat
 import io
 
 import nbdime
+from nbdime.loader import read_notebook, save_notebook, write_notebook
 from nbdime.patching import patch_notebook
 from nbdime.diff_format import to_diffentry_dicts
 
@@ -31,7 +31,7 @@ def main_patch(args):
             print("Missing file {}".format(fn))
             return 1
 
-    before = nbformat.read(base_filename, as_version=4)
+    before = read_notebook(base_filename)
     with io.open(path_filename, encoding="utf8") as patch_file:
         diff = json.load(patch_file)
     diff = to_diffentry_dicts(diff)
@@ -39,9 +39,10 @@ def main_patch(args):
     after = patch_notebook(before, diff)
 
     if output_filename:
-        nbformat.write(after, output_filename)
+        save_notebook(after, output_filename)
     else:
-        print(after)
+        # Written like a notebook file, with the Blobs of large outputs
+        write_notebook(after, sys.stdout)
 
     return 0
 
@@ -14,7 +14,9 @@ import nbformat
 import json
 
 import nbdime
-from nbdime.prettyprint import pretty_print_notebook
+from nbdime import loader
+from nbdime.jsonscan import NotebookScan
+from nbdime.prettyprint import pretty_print_notebook, terminal_output
 from nbdime.args import add_generic_args, add_filename_args
 
 
@@ -24,6 +26,66 @@ Limit to specific fields by passing options.
 """
 
 
+def cell_range(text):
+    """Parse a range of cells, like 100:150, :10 or 5, as a slice."""
+    try:
+        if ":" not in text:
+            index = int(text)
+            return slice(index, index + 1 if index != -1 else None)
+        start, stop = [int(v) if v.strip() else None for v in text.split(":")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "invalid cell range %r, expected START:STOP" % text)
+    return slice(start, stop)
+
+
+def read_notebook(fn, cells=None):
+    """Read a notebook, or only a range of its cells.
+
+    Returns the notebook and the index of its first cell. The notebook
+    is not validated, and for a range of cells, only those cells are
+    parsed.
+    """
+    if cells is not None:
+        try:
+            with NotebookScan(fn) as scan:
+                if scan.read_field("nbformat") == 4:
+                    nb = dict((key, scan.read_field(key))
+                              for key in scan.fields if key != "cells")
+                    nb["cells"] = scan.read_cells(cells.start, cells.stop)
+                    first = cells.indices(len(scan.cells))[0]
+                    return nbformat.v4.to_notebook_json(nb), first
+        except ValueError:
+            # Not valid JSON, leave the error message to nbformat
+            pass
+    if cells is None:
+        return loader.read_notebook(fn), 0
+    nb = nbformat.read(fn, as_version=4)
+    first = cells.indices(len(nb.cells))[0]
+    nb.cells = nb.cells[cells]
+    return nb, first
+
+
+class OutputLimitReached(Exception):
+    pass
+
+
+class LimitedOutput(object):
+    "Passes at most `limit` characters on to `out`, then raises OutputLimitReached."
+
+    def __init__(self, out, limit):
+        self.out = out
+        self.remaining = limit
+
+    def write(self, text):
+        if len(text) > self.remaining:
+            self.out.write(text[:self.remaining])
+            self.remaining = 0
+            raise OutputLimitReached()
+        self.out.write(text)
+        self.remaining -= len(text)
+
+
 def main_show(args):
 
     fn = args.notebook
@@ -31,19 +93,19 @@ def main_show(args):
         print("Missing file {}".format(fn))
         return 1
 
-    nb = nbformat.read(fn, as_version=4)
+    nb, first_index = read_notebook(fn, args.cells)
 
-    # This printer is to keep the unit tests passing,
-    # some tests capture output with capsys which doesn't
-    # pick up on sys.stdout.write()
-    class Printer:
-        def write(self, text):
-            print(text, end="")
     if not any((args.sources, args.outputs, args.attachments, args.metadata, args.details)):
         ppargs = None
     else:
         ppargs = args
-    pretty_print_notebook(nb, ppargs, Printer())
+    with terminal_output() as out:
+        if args.max_chars is not None:
+            out = LimitedOutput(out, args.max_chars)
+        try:
+            pretty_print_notebook(nb, ppargs, out, first_index)
+        except OutputLimitReached:
+            out.out.write("\n...<output stopped at %d characters>\n" % args.max_chars)
 
     return 0
 
@@ -84,6 +146,20 @@ def _build_arg_parser():
         default=False,
         help="show details not covered by other options.")
 
+    parser.add_argument(
+        '--cells',
+        type=cell_range,
+        default=None,
+        metavar="START:STOP",
+        help="only show the cells in this range, numbered from 0 like "
+             "a Python slice, or a single cell. Only the shown cells are "
+             "read, and the notebook is not validated.")
+    parser.add_argument(
+        '--max-chars',
+        type=int,
+        default=None,
+        help="stop after showing this many characters.")
+
     return parser
 
 
@@ -17,7 +17,12 @@ from .diff_format import DiffOp, NBDiffFormatError, flatten_list_of_string_diff
 __all__ = ["patch", "patch_notebook"]
 
 
-def patch_list(obj, diff):
+def _keep(value, share):
+    "Take a value not mentioned in a diff into the patched object."
+    return value if share else copy.deepcopy(value)
+
+
+def patch_list(obj, diff, share=False):
     # The patched sequence to build and return
     newobj = []
     # Index into obj, the next item to take unless diff says otherwise
@@ -28,7 +33,7 @@ def patch_list(obj, diff):
         assert isinstance(index, int)
 
         # Take values from obj not mentioned in diff, up to not including index
-        newobj.extend(copy.deepcopy(value) for value in obj[take:index])
+        newobj.extend(_keep(value, share) for value in obj[take:index])
 
         if op == DiffOp.ADDRANGE:
             # Extend with new values directly
@@ -38,7 +43,7 @@ def patch_list(obj, diff):
             # Delete a number of values by skipping
             skip = e.length
         elif op == DiffOp.PATCH:
-            newobj.append(patch(obj[index], e.diff))
+            newobj.append(patch(obj[index], e.diff, share))
             skip = 1
         # Note that the operations ADD, REMOVE, REPLACE are not produced by the
         # diff algorithm anymore, keeping these cases just in case we want them back:
@@ -62,7 +67,7 @@ def patch_list(obj, diff):
         take = max(take, index + skip)
 
     # Take values at end not mentioned in diff
-    newobj.extend(copy.deepcopy(value) for value in obj[take:len(obj)])
+    newobj.extend(_keep(value, share) for value in obj[take:len(obj)])
 
     return newobj
 
@@ -76,7 +81,7 @@ def patch_string(obj, diff):
     return "".join(patch_list(list(obj), diff))
 
 
-def patch_dict(obj, diff):
+def patch_dict(obj, diff, share=False):
     newobj = {}
     deleted_keys = set()
 
@@ -96,19 +101,19 @@ def patch_dict(obj, diff):
             newobj[key] = e.value
         elif op == DiffOp.PATCH:
             assert key not in deleted_keys
-            newobj[key] = patch(obj[key], e.diff)
+            newobj[key] = patch(obj[key], e.diff, share)
         else:
             raise NBDiffFormatError("Invalid op {}.".format(op))
 
     # Take items not mentioned in diff
     for key in obj:
         if key not in deleted_keys and key not in newobj:
-            newobj[key] = copy.deepcopy(obj[key])
+            newobj[key] = _keep(obj[key], share)
 
     return NotebookNode(newobj)
 
 
-def patch(obj, diff):
+def patch(obj, diff, share=False):
     """Produce a patched version of obj with given hierarchial diff.
 
     A valid input object can be any dict or list of leaf values,
@@ -119,11 +124,15 @@ def patch(obj, diff):
     Leaf values are any non-dict, non-list objects as far as patch
     is concerned, although the intentional use of this library
     is that values are json-serializable.
+
+    Values of obj not changed by the diff are copied, unless share is
+    true. The patched object then shares them with obj, and both must
+    be treated as read-only.
     """
     if isinstance(obj, dict):
-        return patch_dict(obj, diff)
+        return patch_dict(obj, diff, share)
     elif isinstance(obj, list):
-        return patch_list(obj, diff)
+        return patch_list(obj, diff, share)
     elif isinstance(obj, string_types):
         return patch_string(obj, diff)
     else:
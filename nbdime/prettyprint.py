@@ -6,6 +6,9 @@
 from __future__ import unicode_literals
 from __future__ import print_function
 
+import atexit
+from contextlib import contextmanager
+import errno
 from itertools import chain
 import sys
 import io
@@ -17,7 +20,7 @@ import re
 import shutil
 from subprocess import Popen, PIPE
 import tempfile
-from difflib import unified_diff
+from difflib import unified_diff, SequenceMatcher
 from six import string_types
 import hashlib
 
@@ -26,12 +29,16 @@ try:
 except ImportError:
     from backports.shutil_which import which
 
+from .cache import LRUCache
 from .diff_format import NBDiffFormatError, DiffOp, op_patch
+from .loader import Blob
 from .patching import patch, patch_string
-from .utils import star_path, split_path, join_path
+from .utils import star_path, split_path, join_path, is_binary_mimetype
 from .log import warning
 
 # TODO: Make this configurable
+# Render diffs of multiline strings in-process, instead of with git or diff
+use_builtin_diff = True
 use_git = True
 use_diff = True
 use_colors = True
@@ -43,6 +50,19 @@ IND = "  "
 # TODO: Use this for line wrapping some places?
 MAXWIDTH = 78
 
+# Values longer than this many characters are snipped when printed
+MAX_VALUE_SIZE = 10000
+
+# Lists longer than this are snipped when printed
+MAX_LIST_ITEMS = 500
+
+# Only this many characters at each end of long strings are checked
+# when looking for base64 data
+BASE64_CHECK_SIZE = 1024
+
+# Lines of context around changes in diffs of multiline strings
+DIFF_CONTEXT = 3
+
 git_diff_print_cmd = 'git diff --no-index --color-words before after'
 diff_print_cmd = 'diff before after'
 git_mergefile_print_cmd = 'git merge-file -p local base remote'
@@ -54,6 +74,7 @@ if use_colors:
     GREEN = colorama.Fore.GREEN
     BLUE = colorama.Fore.BLUE
     YELLOW = colorama.Fore.YELLOW
+    CYAN = colorama.Fore.CYAN
     RESET = colorama.Style.RESET_ALL
 
 else:
@@ -61,6 +82,7 @@ else:
     GREEN = ''
     BLUE = ''
     YELLOW = ''
+    CYAN = ''
     RESET = ''
     git_diff_print_cmd = git_diff_print_cmd.replace(" --color-words ", "")
 
@@ -72,53 +94,104 @@ INFO     = '{color}## '.format(color=BLUE)
 DIFF_ENTRY_END = '\n'
 
 
+_tool_dir = None
+
+
+def external_tool_dir():
+    """A temporary directory shared by all calls of external tools.
+
+    Made once per process instead of once per rendered string, and
+    removed at exit.
+    """
+    global _tool_dir
+    if _tool_dir is None or not os.path.isdir(_tool_dir):
+        _tool_dir = tempfile.mkdtemp(prefix="nbdime-")
+        atexit.register(shutil.rmtree, _tool_dir, True)
+    return _tool_dir
+
+
+_tools = {}
+
+def have_tool(name):
+    "Check if an external tool is on the path, looking it up only once."
+    if name not in _tools:
+        _tools[name] = which(name) is not None
+    return _tools[name]
+
+
+def _write_text(path, text):
+    if isinstance(text, bytes):
+        text = text.decode("utf8")
+    with io.open(path, 'w', encoding="utf8") as f:
+        f.write(text)
+
+
 def external_merge_render(cmd, b, l, r):
-    if isinstance(l, bytes):
-        l = l.decode("utf8")
-    if isinstance(b, bytes):
-        b = b.decode("utf8")
-    if isinstance(r, bytes):
-        r = r.decode("utf8")
-    td = tempfile.mkdtemp()
-    try:
-        with io.open(os.path.join(td, 'local'), 'w', encoding="utf8") as f:
-            f.write(l)
-        with io.open(os.path.join(td, 'base'), 'w', encoding="utf8") as f:
-            f.write(b)
-        with io.open(os.path.join(td, 'remote'), 'w', encoding="utf8") as f:
-            f.write(r)
-        assert all(fn in cmd for fn in ['local', 'base', 'remote'])
-        p = Popen(cmd, cwd=td, stdout=PIPE)
-        output, _ = p.communicate()
-        output = output.decode('utf8')
-    finally:
-        shutil.rmtree(td)
-    return output
+    td = external_tool_dir()
+    _write_text(os.path.join(td, 'local'), l)
+    _write_text(os.path.join(td, 'base'), b)
+    _write_text(os.path.join(td, 'remote'), r)
+    assert all(fn in cmd for fn in ['local', 'base', 'remote'])
+    p = Popen(cmd, cwd=td, stdout=PIPE)
+    output, _ = p.communicate()
+    return output.decode('utf8')
+
 
+_no_newline = re.compile(r"^\\ No newline at end of file\n?", flags=re.M)
 
 def external_diff_render(cmd, a, b):
-    if isinstance(a, bytes):
-        a = a.decode("utf8")
-    if isinstance(b, bytes):
-        b = b.decode("utf8")
-    td = tempfile.mkdtemp()
-    try:
-        with io.open(os.path.join(td, 'before'), 'w', encoding="utf8") as f:
-            f.write(a)
-        with io.open(os.path.join(td, 'after'), 'w', encoding="utf8") as f:
-            f.write(b)
-        assert all(fn in cmd for fn in ['before', 'after'])
-        p = Popen(cmd, cwd=td, stdout=PIPE)
-        output, _ = p.communicate()
-        output = output.decode('utf8')
-        r = re.compile(r"^\\ No newline at end of file\n?", flags=re.M)
-        output, n = r.subn("", output)
-        assert n <= 2
-    finally:
-        shutil.rmtree(td)
+    td = external_tool_dir()
+    _write_text(os.path.join(td, 'before'), a)
+    _write_text(os.path.join(td, 'after'), b)
+    assert all(fn in cmd for fn in ['before', 'after'])
+    p = Popen(cmd, cwd=td, stdout=PIPE)
+    output, _ = p.communicate()
+    output, n = _no_newline.subn("", output.decode('utf8'))
+    assert n <= 2
     return output
 
 
+_ansi_escape = re.compile(r"\x1b\[[0-9;]*m")
+_git_file_header = re.compile(r"^diff --git a/before/(\d+) b/after/\d+$")
+
+def external_diff_render_many(cmd, pairs):
+    """Render the diffs of many (a, b) pairs with a single git call.
+
+    cmd is a git diff --no-index command comparing the directories
+    'before' and 'after', where each pair is written to a file
+    numbered by its position. The output is split back up by the
+    file headers, which are dropped.
+    """
+    td = os.path.join(external_tool_dir(), "many")
+    if os.path.isdir(td):
+        shutil.rmtree(td)
+    for side in ('before', 'after'):
+        os.makedirs(os.path.join(td, side))
+    for k, (a, b) in enumerate(pairs):
+        _write_text(os.path.join(td, 'before', str(k)), a)
+        _write_text(os.path.join(td, 'after', str(k)), b)
+    assert all(fn in cmd for fn in ['before', 'after'])
+    p = Popen(cmd, cwd=td, stdout=PIPE)
+    output, _ = p.communicate()
+    output = _no_newline.sub("", output.decode('utf8'))
+
+    rendered = [""] * len(pairs)
+    current = None
+    in_header = False
+    for line in output.splitlines(True):
+        plain = _ansi_escape.sub("", line).rstrip("\n")
+        m = _git_file_header.match(plain)
+        if m:
+            current = rendered[int(m.group(1))] = []
+            in_header = True
+        elif in_header:
+            # index, ---, and +++ lines
+            in_header = not plain.startswith("+++ ")
+        elif current is not None:
+            current.append(line)
+    return ["".join(r) for r in rendered]
+
+
 # FIXME: Move to utils
 def as_text_lines(text):
     if isinstance(text, string_types):
@@ -197,6 +270,168 @@ def builtin_diff_render(a, b):
     return diff
 
 
+def _align_lines(n, di):
+    """Align the lines of two strings from their line-based diff.
+
+    n is the number of lines of the first string. Returns a list of
+    (tag, i, j), where i and j are line numbers in either string, or
+    None for lines only in one of them. Lines patched in place are
+    aligned with tag "change".
+    """
+    ops = []
+    i = j = 0
+    # Insertions go before removals at the same line
+    for e in sorted(di, key=lambda e: (e.key, e.op != DiffOp.ADDRANGE)):
+        if not i <= e.key <= n:
+            raise NBDiffFormatError("Invalid line diff key {}".format(e.key))
+        while i < e.key:
+            ops.append(("equal", i, j))
+            i += 1
+            j += 1
+        if e.op == DiffOp.ADDRANGE:
+            for _ in e.valuelist:
+                ops.append(("insert", None, j))
+                j += 1
+        elif e.op == DiffOp.REMOVERANGE:
+            for _ in range(e.length):
+                ops.append(("delete", i, None))
+                i += 1
+        elif e.op == DiffOp.PATCH:
+            ops.append(("change", i, j))
+            i += 1
+            j += 1
+        else:
+            raise NBDiffFormatError("Invalid line diff op {}".format(e.op))
+    while i < n:
+        ops.append(("equal", i, j))
+        i += 1
+        j += 1
+    return ops
+
+
+def _hunk_ranges(ops, context):
+    "Group changes with context lines into (start, end) ranges of ops."
+    ranges = []
+    for k, op in enumerate(ops):
+        if op[0] == "equal":
+            continue
+        start, end = max(0, k - context), min(len(ops), k + context + 1)
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    return ranges
+
+
+def _unified_range(ops, start, end, side):
+    "Format the line range of a hunk like in unified diff headers."
+    lines = [op[side] for op in ops[start:end] if op[side] is not None]
+    if lines:
+        first = lines[0]
+    else:
+        # Only lines on the other side, count the lines before the hunk
+        first = sum(1 for op in ops[:start] if op[side] is not None)
+    if len(lines) == 1:
+        return "%d" % (first + 1)
+    elif not lines:
+        return "%d,0" % first
+    return "%d,%d" % (first + 1, len(lines))
+
+
+def _strip_eol(line):
+    return line.splitlines()[0] if line else line
+
+
+def _colored(text, color):
+    "Color text, leaving newlines outside of colors like git does."
+    return "".join(color + part + RESET if part and part != "\n" else part
+                   for part in re.split("(\n)", text))
+
+
+# Newlines are tokens of their own, so changes never span them
+_words = re.compile(r"\n|[^\S\n]+|\S+", re.UNICODE)
+
+def _word_diff_render(old, new):
+    """Render changed lines as a single block of word changes.
+
+    When lines are inserted, deleted or joined, the block is rendered
+    as whole removed and added lines instead.
+    """
+    ta = _words.findall("".join(old))
+    tb = _words.findall("".join(new))
+    parts = []
+    matcher = SequenceMatcher(None, ta, tb, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            parts.append("".join(ta[i1:i2]))
+        elif "\n" in ta[i1:i2] or "\n" in tb[j1:j2]:
+            return _line_diff_render(old, new)
+        else:
+            parts.append(_colored("".join(ta[i1:i2]), RED))
+            parts.append(_colored("".join(tb[j1:j2]), GREEN))
+    text = "".join(parts)
+    if not text.endswith("\n"):
+        text += "\n"
+    return text
+
+
+def _unified_diff_render(old, new):
+    return "".join(["-%s\n" % _strip_eol(line) for line in old] +
+                   ["+%s\n" % _strip_eol(line) for line in new])
+
+
+def _line_diff_render(old, new):
+    "Render changed lines as colored removed and added lines."
+    return "".join(["%s-%s%s\n" % (RED, _strip_eol(line), RESET)
+                    for line in old] +
+                   ["%s+%s%s\n" % (GREEN, _strip_eol(line), RESET)
+                    for line in new])
+
+
+def diff_render_with_nbdime(a, b, di=None, context=DIFF_CONTEXT):
+    """Render the diff of two multiline strings without external tools.
+
+    di is the line-based diff of a and b, computed if not given. The
+    output is a unified diff, or with colors, a word diff like that of
+    git diff --color-words.
+    """
+    if di is None:
+        from .diffing.sequences import diff_strings_linewise
+        di = diff_strings_linewise(a, b)
+    a_lines = a.splitlines(True)
+    b_lines = b.splitlines(True)
+    ops = _align_lines(len(a_lines), di)
+    if sum(1 for op in ops if op[2] is not None) != len(b_lines):
+        raise NBDiffFormatError("Line diff does not match the strings.")
+
+    render_block = _word_diff_render if use_colors else _unified_diff_render
+    out = []
+    for start, end in _hunk_ranges(ops, context):
+        header = "@@ -%s +%s @@" % (_unified_range(ops, start, end, 1),
+                                     _unified_range(ops, start, end, 2))
+        if use_colors:
+            header = CYAN + header + RESET
+        out.append(header + "\n")
+        old, new = [], []
+        for tag, i, j in ops[start:end]:
+            if tag != "equal":
+                if i is not None:
+                    old.append(a_lines[i])
+                if j is not None:
+                    new.append(b_lines[j])
+                continue
+            if old or new:
+                out.append(render_block(old, new))
+                old, new = [], []
+            if use_colors:
+                out.append("%s\n" % _strip_eol(a_lines[i]))
+            else:
+                out.append(" %s\n" % _strip_eol(a_lines[i]))
+        if old or new:
+            out.append(render_block(old, new))
+    return "".join(out)
+
+
 def diff_render_with_git(a, b):
     cmd = git_diff_print_cmd
     diff = external_diff_render(cmd.split(), a, b)
@@ -214,15 +449,58 @@ def diff_render_with_difflib(a, b):
     return "".join(diff.splitlines(True)[2:])
 
 
-def diff_render(a, b):
-    if use_git and which('git'):
+# Diffs rendered ahead by prerender_string_diffs, by (a, b)
+_prerendered = {}
+
+
+def diff_render(a, b, di=None):
+    """Render the diff of two multiline strings.
+
+    di is the line-based diff of a and b, if known.
+    """
+    rendered = _prerendered.pop((a, b), None)
+    if rendered is not None:
+        return rendered
+    if use_builtin_diff:
+        return diff_render_with_nbdime(a, b, di)
+    elif use_git and have_tool('git'):
         return diff_render_with_git(a, b)
-    elif use_diff and which('diff'):
+    elif use_diff and have_tool('diff'):
         return diff_render_with_diff(a, b)
     else:
         return diff_render_with_difflib(a, b)
 
 
+def _rendered_string_diffs(a, di):
+    "Find the (a, b) pairs of multiline strings printed as diffs."
+    if isinstance(a, string_types):
+        b = patch(a, di)
+        if (("\n" in a or "\n" in b) and
+                _trim_base64(a) == a and _trim_base64(b) == b):
+            yield a, b
+    elif isinstance(a, (dict, list)):
+        for e in di:
+            if e.op == DiffOp.PATCH:
+                for pair in _rendered_string_diffs(a[e.key], e.diff):
+                    yield pair
+
+
+def prerender_string_diffs(a, di):
+    """Render all string diffs within a diff of a with one call of git.
+
+    Only done when git renders diffs, to save starting it once for
+    every string. The results are used by diff_render.
+    """
+    _prerendered.clear()
+    if use_builtin_diff or not (use_git and have_tool('git')):
+        return
+    pairs = list(set(_rendered_string_diffs(a, di)))
+    if len(pairs) > 1:
+        cmd = git_diff_print_cmd.split()
+        rendered = external_diff_render_many(cmd, pairs)
+        _prerendered.update(zip(pairs, rendered))
+
+
 def merge_render_with_git(b, l, r, strategy=None):
     cmd = git_mergefile_print_cmd
     if strategy is None:
@@ -252,9 +530,9 @@ def merge_render_with_diff3(b, l, r, strategy=None):
 def merge_render(b, l, r, strategy=None):
     if strategy == "use-base":
         return b
-    if use_git and which('git'):
+    if use_git and have_tool('git'):
         return merge_render_with_git(b, l, r, strategy)
-    elif use_diff and which('diff3'):
+    elif use_diff and have_tool('diff3'):
         return merge_render_with_diff3(b, l, r, strategy)
     else:
         return builtin_merge_render(b, l, r, strategy)
@@ -270,31 +548,104 @@ def file_timestamp(filename):
         return "(no timestamp)"
 
 
+# Digests of the last few large strings, which are often printed more
+# than once, like an image shared by interned base, local and remote.
+# Keyed by identity, so a lookup does not hash the string again.
+_digests = LRUCache(max_size=16)
+
+
 def hash_string(s):
-    return hashlib.md5(s.encode("utf8")).hexdigest()
+    if len(s) < BASE64_CHECK_SIZE:
+        return hashlib.md5(s.encode("utf8")).hexdigest()
+    # The entry holds on to s, so its id is not reused while cached
+    (cached, digest), _ = _digests.get_or_compute(
+        id(s), lambda: (s, hashlib.md5(s.encode("utf8")).hexdigest()))
+    if cached is not s:
+        digest = hashlib.md5(s.encode("utf8")).hexdigest()
+    return digest
+
 
 _base64 = re.compile(r'^(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?$', re.MULTILINE|re.UNICODE)
 
-def _trim_base64(s):
-    """Trim and hash base64 strings"""
-    if len(s) > 64 and _base64.match(s.replace('\n', '')):
+
+def _mimetype_from_path(path):
+    "Get the mimetype of output data or attachments from a diff path."
+    parts = path.rsplit("/", 3)
+    if len(parts) == 4 and (parts[1] == "data" or parts[0].endswith("/attachments")):
+        return "/".join(parts[2:])
+    return None
+
+
+def _looks_base64(s):
+    """Check if s looks like base64 data.
+
+    Only the start and end of long strings are checked, with the
+    characters aligned to groups of four.
+    """
+    if len(s) <= 2 * BASE64_CHECK_SIZE:
+        return bool(_base64.match(s.replace('\n', '')))
+    head = s[:BASE64_CHECK_SIZE].replace('\n', '')
+    tail = s[-BASE64_CHECK_SIZE:].replace('\n', '')
+    head = head[:len(head) - len(head) % 4]
+    tail = tail[len(tail) % 4:]
+    return bool(_base64.match(head) and _base64.match(tail))
+
+
+def _trim_base64(s, mimetype=None):
+    """Trim and hash base64 strings
+
+    Data of binary mimetypes is known to be base64 without looking.
+    """
+    if len(s) > 64 and ((mimetype and is_binary_mimetype(mimetype))
+                        or _looks_base64(s)):
         h = hash_string(s)
         s =  '%s...<snip base64, md5=%s...>' % (s[:8], h[:16])
     return s
 
 
-def format_value(v):
+def _snip_large(s):
+    """Snip strings longer than MAX_VALUE_SIZE, keeping whole lines."""
+    if len(s) <= MAX_VALUE_SIZE:
+        return s
+    end = s.rfind("\n", 0, MAX_VALUE_SIZE) + 1 or MAX_VALUE_SIZE
+    return '%s...<snip %d characters, md5=%s...>' % (
+        s[:end], len(s) - end, hash_string(s)[:16])
+
+
+def _min_repr_size(value, limit):
+    """A lower bound of len(repr(value)), only counted up to limit.
+
+    Tells whether a value can fit on a line without formatting it.
+    """
+    if isinstance(value, string_types):
+        return len(value) + 2
+    elif isinstance(value, (list, tuple, dict)):
+        # Brackets and separators
+        size = 2 * len(value)
+        items = value.items() if isinstance(value, dict) else ((v,) for v in value)
+        for item in items:
+            for v in item:
+                if size >= limit:
+                    return size
+                size += _min_repr_size(v, limit - size)
+        return size
+    return 1
+
+
+def format_value(v, mimetype=None):
     "Format simple value for printing. Snips base64 strings and uses pprint for the rest."
+    if isinstance(v, Blob):
+        v = v.value()
     if not isinstance(v, string_types):
         # Not a string, defer to pprint
         vstr = pprint.pformat(v)
     else:
-        # Snip if base64 data
-        vstr = _trim_base64(v)
+        # Snip if base64 data, or just large
+        vstr = _snip_large(_trim_base64(v, mimetype))
     return vstr
 
 
-def pretty_print_value(value, prefix="", out=sys.stdout):
+def pretty_print_value(value, prefix="", out=sys.stdout, mimetype=None):
     """Print a possibly complex value with all lines prefixed.
 
     Calls out to generic formatters based on value
@@ -306,7 +657,7 @@ def pretty_print_value(value, prefix="", out=sys.stdout):
     elif isinstance(value, list) and value:
         pretty_print_list(value, prefix, out)
     else:
-        pretty_print_multiline(format_value(value), prefix, out)
+        pretty_print_multiline(format_value(value, mimetype), prefix, out)
 
 
 def pretty_print_value_at(value, path, prefix="", out=sys.stdout):
@@ -347,7 +698,8 @@ def pretty_print_value_at(value, path, prefix="", out=sys.stdout):
             starred = None
 
     if starred is None:
-        pretty_print_value(value, prefix, out)
+        mimetype = None if path is None else _mimetype_from_path(path)
+        pretty_print_value(value, prefix, out, mimetype)
 
 
 def pretty_print_key(k, prefix, out):
@@ -370,7 +722,8 @@ def pretty_print_item(k, v, prefix="", out=sys.stdout):
         pretty_print_key(k, prefix, out)
         pretty_print_list(v, prefix+IND, out)
     else:
-        vstr = format_value(v)
+        # Keys of output data and attachments are mimetypes
+        vstr = format_value(v, k)
         if "\n" in vstr:
             # Multiline strings
             pretty_print_key(k, prefix, out)
@@ -396,12 +749,16 @@ def pretty_print_multiline(text, prefix="", out=sys.stdout):
 
 
 def pretty_print_list(li, prefix="", out=sys.stdout):
-    listr = pprint.pformat(li)
-    if len(listr) < MAXWIDTH - len(prefix) and "\\n" not in listr:
+    width = MAXWIDTH - len(prefix)
+    # Only format the whole list if it can fit on one line
+    listr = pprint.pformat(li) if _min_repr_size(li, width) < width else None
+    if listr is not None and len(listr) < width and "\\n" not in listr:
         out.write("%s%s\n" % (prefix, listr))
     else:
-        for k, v in enumerate(li):
+        for k, v in enumerate(li[:MAX_LIST_ITEMS]):
             pretty_print_item("item[%d]" % k, v, prefix, out)
+        if len(li) > MAX_LIST_ITEMS:
+            out.write("%s...<snip %d items>\n" % (prefix, len(li) - MAX_LIST_ITEMS))
 
 
 def pretty_print_dict(d, exclude_keys=(), prefix="", out=sys.stdout):
@@ -532,7 +889,7 @@ def pretty_print_cell(i, cell, prefix="", out=sys.stdout, args=None):
         pretty_print_dict(cell, exclude_keys, key_prefix, out)
 
 
-def pretty_print_notebook(nb, args=None, out=sys.stdout):
+def pretty_print_notebook(nb, args=None, out=sys.stdout, first_index=0):
     """Pretty-print a notebook for debugging, skipping large details in metadata and output
 
     Parameters
@@ -545,6 +902,8 @@ def pretty_print_notebook(nb, args=None, out=sys.stdout):
         args.sources, args.outputs, args.attachments, args.metadata, args.details
     out: file-like object
         File-like object with .write function used for output.
+    first_index: int
+        Number of the first cell, when nb only has a range of the cells.
     """
     prefix = ""
 
@@ -564,7 +923,7 @@ def pretty_print_notebook(nb, args=None, out=sys.stdout):
         pretty_print_metadata(nb.metadata, known_metadata_keys, "", out)
 
     # Write notebook cells
-    for i, cell in enumerate(nb.cells):
+    for i, cell in enumerate(nb.cells, first_index):
         pretty_print_cell(i, cell, prefix="", out=out, args=args)
 
 
@@ -606,6 +965,11 @@ def pretty_print_diff_entry(a, e, path, out=sys.stdout):
     elif op == DiffOp.REPLACE:
         aval = a[key]
         bval = e.value
+        # Blobs read by nbdime.loader are strings
+        if isinstance(aval, Blob):
+            aval = aval.value()
+        if isinstance(bval, Blob):
+            bval = bval.value()
         if type(aval) != type(bval):
             typechange = " (type changed from %s to %s)" % (
                 aval.__class__.__name__, bval.__class__.__name__)
@@ -639,8 +1003,9 @@ def pretty_print_string_diff(a, di, path, out=sys.stdout):
 
     b = patch(a, di)
 
-    ta = _trim_base64(a)
-    tb = _trim_base64(b)
+    mimetype = _mimetype_from_path(path)
+    ta = _trim_base64(a, mimetype)
+    tb = _trim_base64(b, mimetype)
 
     if ta != a or tb != b:
         if ta != a:
@@ -653,7 +1018,7 @@ def pretty_print_string_diff(a, di, path, out=sys.stdout):
             pretty_print_value_at(b, path, ADD, out)
     elif "\n" in a or "\n" in b:
         # Delegate multiline diff formatting
-        diff = diff_render(a, b)
+        diff = diff_render(a, b, di)
         out.write(diff)
         #out.write("\n")
     else:
@@ -702,9 +1067,119 @@ def pretty_print_notebook_diff(afn, bfn, a, di, out=sys.stdout):
         atime = "  " + file_timestamp(afn)
         btime = "  " + file_timestamp(bfn)
         out.write(notebook_diff_header.format(afn=afn, bfn=bfn, atime=atime, btime=btime))
+        prerender_string_diffs(a, di)
         pretty_print_diff(a, di, path, out)
 
 
+def pretty_print_notebook_diff_entries(afn, bfn, a, entries, out=sys.stdout):
+    """Pretty-print a notebook diff while it is being computed
+
+    Gives the same output as pretty_print_notebook_diff, but takes
+    the (path, entry) pairs generated by iter_diff_notebooks, and
+    prints each entry as soon as it has been computed. `out` is
+    flushed after each entry if it has a flush method.
+    """
+    flush = getattr(out, "flush", lambda: None)
+    header = False
+    for path, e in entries:
+        if not header:
+            atime = "  " + file_timestamp(afn)
+            btime = "  " + file_timestamp(bfn)
+            out.write(notebook_diff_header.format(afn=afn, bfn=bfn, atime=atime, btime=btime))
+            header = True
+        value = a
+        for key in split_path(path):
+            value = value[key]
+        prerender_string_diffs(value, [e])
+        pretty_print_diff_entry(value, e, path, out)
+        flush()
+
+
+class BufferedWriter(object):
+    """Collects written text, passing it on to a stream when flushed.
+
+    Printing writes many small fragments, this makes a single write of
+    each entry. If `encoding` is given, text is encoded before being
+    written to the stream.
+    """
+
+    def __init__(self, stream, encoding=None):
+        self.stream = stream
+        self.encoding = encoding
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def flush(self):
+        if self.parts:
+            text = "".join(self.parts)
+            self.parts = []
+            if self.encoding:
+                text = text.encode(self.encoding)
+            self.stream.write(text)
+        self.stream.flush()
+
+
+def pager_command(stream=None):
+    """The pager command to show output to stream with, or None.
+
+    A pager is only used if stream, by default sys.stdout, is a
+    terminal. The command is taken from the NBDIME_PAGER or PAGER
+    environment variables, and defaults to less.
+    """
+    if stream is None:
+        stream = sys.stdout
+    isatty = getattr(stream, "isatty", None)
+    if os.name == "nt" or isatty is None or not isatty():
+        return None
+    cmd = os.environ.get("NBDIME_PAGER", os.environ.get("PAGER"))
+    if cmd is None and which("less"):
+        cmd = "less"
+    if not cmd or cmd == "cat":
+        return None
+    return cmd
+
+
+@contextmanager
+def terminal_output(stream=None):
+    """Context giving a BufferedWriter for showing output on a terminal.
+
+    Output goes through a pager if pager_command finds one, otherwise
+    it is written to stream, by default sys.stdout. When the pager is
+    quit early, further output is discarded.
+    """
+    if stream is None:
+        stream = sys.stdout
+    cmd = pager_command(stream)
+    if cmd is None:
+        out = BufferedWriter(stream)
+        try:
+            yield out
+        finally:
+            out.flush()
+        return
+
+    env = dict(os.environ)
+    # Like git: quit if one screen, keep colors, don't clear the screen
+    env.setdefault("LESS", "FRX")
+    stream.flush()
+    pager = Popen(cmd, shell=True, stdin=PIPE, env=env)
+    out = BufferedWriter(pager.stdin, encoding="utf8")
+    try:
+        yield out
+        out.flush()
+    except (IOError, OSError) as e:
+        if e.errno != errno.EPIPE:
+            raise
+    finally:
+        try:
+            pager.stdin.close()
+        except (IOError, OSError):
+            pass
+        pager.wait()
+
+
 def pretty_print_merge_decision(base, decision, out=sys.stdout):
     prefix = IND
 
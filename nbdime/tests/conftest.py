@@ -20,6 +20,7 @@ def nocolor(request):
         REMOVE=pp.REMOVE.replace(pp.RED,''),
         INFO=pp.INFO.replace(pp.BLUE,''),
         RESET='',
+        use_colors=False,
         git_diff_print_cmd=pp.git_diff_print_cmd.replace(' --color-words', ''),
     )
     patch.start()
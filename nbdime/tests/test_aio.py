@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+
+import os
+import sys
+import threading
+
+import pytest
+import nbformat
+
+if sys.version_info < (3, 5):
+    pytest.skip("nbdime.aio requires Python 3.5", allow_module_level=True)
+
+import asyncio
+
+from nbdime import aio, diff_notebooks, merge_notebooks
+from nbdime.cache import NotebookCache
+from nbdime.executor import BoundedExecutor, QueueFull, set_shared_executor
+
+from .fixtures import filespath
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+@pytest.fixture
+def executor():
+    executor = BoundedExecutor(max_workers=1, max_queue=2)
+    previous = set_shared_executor(executor)
+    yield executor
+    set_shared_executor(previous)
+    executor.shutdown()
+
+
+def test_aio_diff_and_merge(loop, executor):
+    fns = [os.path.join(filespath(), "multilevel-test-%s.ipynb" % name)
+           for name in ("base", "local", "remote")]
+    cache = NotebookCache(2**20)
+    base, local, remote = loop.run_until_complete(asyncio.gather(
+        *[aio.read_notebook(fn, cache=cache) for fn in fns]))
+    assert base == nbformat.read(fns[0], as_version=4)
+    assert cache.read(fns[0])[2]
+
+    d = loop.run_until_complete(aio.diff_notebooks(base, local))
+    assert d == diff_notebooks(base, local)
+
+    merged, decisions = loop.run_until_complete(
+        aio.merge_notebooks(base, local, remote))
+    assert (merged, decisions) == merge_notebooks(base, local, remote)
+    assert loop.run_until_complete(aio.apply_decisions(base, decisions)) == merged
+    assert executor.pending == 0
+
+
+def test_aio_cancel_drops_pending_work(loop, executor):
+    gate = threading.Event()
+    calls = []
+    blocker = loop.create_task(aio.run(gate.wait))
+    queued = loop.create_task(aio.run(calls.append, 1))
+    also_queued = loop.create_task(aio.run(calls.append, 2))
+    loop.run_until_complete(asyncio.sleep(0.01))
+
+    # All slots are taken
+    with pytest.raises(QueueFull):
+        loop.run_until_complete(aio.run(calls.append, 3))
+
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        loop.run_until_complete(queued)
+    gate.set()
+    assert loop.run_until_complete(blocker)
+    loop.run_until_complete(also_queued)
+    assert calls == [2]
+    assert executor.pending == 0
@@ -8,6 +8,8 @@ from __future__ import unicode_literals
 import copy
 import re
 
+import nbformat
+
 from nbdime import patch
 from nbdime.diff_format import op_patch
 from nbdime.merging.decisions import (
@@ -147,3 +149,33 @@ def test_apply_merge_on_dicts():
 # merge decisions with common path "cells" can modify cells/* indices
 # merge decisions with common path "cells/*" only edit exactly one of the cells/* objects
 # applying cells/* before cells means editing first, no indices modified, then moving things around
+
+
+def test_apply_merge_shares_unchanged_values():
+    base = nbformat.from_dict({
+        "metadata": {
+            "a": {"ting": 123},
+            "b": {"tang": 456}
+        },
+        "other": {"tung": 789}
+    })
+    expected_base = copy.deepcopy(base)
+
+    remote = copy.deepcopy(base)
+    remote["metadata"]["a"]["ting"] -= 1
+    brd = diff(base, remote)
+    path, (bld, brd) = ensure_common_path((), [[], brd])
+
+    merge_decisions = [
+        create_decision_item(
+            action="remote",
+            common_path=path,
+            local_diff=bld,
+            remote_diff=brd)
+    ]
+
+    merged = apply_decisions(base, merge_decisions)
+    assert merged == remote
+    assert base == expected_base
+    assert merged["other"] is base["other"]
+    assert merged["metadata"]["b"] is base["metadata"]["b"]
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+
+import os
+import shutil
+import threading
+
+import pytest
+
+from nbdime.cache import LRUCache, NotebookCache
+
+from .fixtures import filespath
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=3)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+    assert cache.get("a") == 1
+    cache.put("d", 4)
+    assert "b" not in cache
+    assert [k for k in "acd" if k in cache] == ["a", "c", "d"]
+    assert cache.size == 3
+
+
+def test_lru_cache_size_limit():
+    cache = LRUCache(max_size=10)
+    cache.put("a", "x", size=6)
+    cache.put("b", "y", size=6)
+    assert "a" not in cache and "b" in cache
+    # Too large entries are not stored at all
+    cache.put("c", "z", size=11)
+    assert "c" not in cache and "b" in cache
+    assert cache.size == 6
+
+
+def test_lru_cache_counts_hits_and_misses():
+    cache = LRUCache(max_size=10)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_disabled_lru_cache():
+    cache = LRUCache(max_size=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+
+def test_lru_cache_shares_inflight_computation():
+    cache = LRUCache(max_size=10)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "value"
+
+    results = []
+    owner = threading.Thread(
+        target=lambda: results.append(cache.get_or_compute("k", compute)))
+    owner.start()
+    started.wait()
+    waiter = threading.Thread(
+        target=lambda: results.append(cache.get_or_compute("k", compute)))
+    waiter.start()
+    release.set()
+    owner.join()
+    waiter.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [("value", "miss"), ("value", "wait")]
+    assert cache.get_or_compute("k", compute) == ("value", "hit")
+
+
+def test_lru_cache_failed_computation_is_not_stored():
+    cache = LRUCache(max_size=10)
+
+    def fail():
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute("k", fail)
+    assert "k" not in cache
+    assert cache.get_or_compute("k", lambda: 1) == (1, "miss")
+
+
+def test_notebook_cache_detects_changed_files(tmpdir):
+    fn = str(tmpdir.join("nb.ipynb"))
+    shutil.copy(os.path.join(filespath(), "src-and-output--1.ipynb"), fn)
+    cache = NotebookCache(max_size=10**7)
+
+    nb, digest, hit = cache.read(fn)
+    assert not hit
+    nb2, digest2, hit = cache.read(fn)
+    assert hit and nb2 is nb and digest2 == digest
+
+    # Replace file contents (with a different size)
+    shutil.copy(os.path.join(filespath(), "src-and-output--2.ipynb"), fn)
+    nb3, digest3, hit = cache.read(fn)
+    assert not hit
+    assert digest3 != digest
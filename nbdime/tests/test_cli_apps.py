@@ -5,15 +5,26 @@
 
 from __future__ import unicode_literals
 
+import base64
+import io
+import json
 import logging
 import os
 
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+import nbformat
+
 from .fixtures import filespath
 
 import nbdime
+from nbdime import diff_notebooks
 from nbdime.nbshowapp import main_show
 from nbdime.nbdiffapp import main_diff
 from nbdime.nbmergeapp import main_merge
+from nbdime.nbpatchapp import main_patch
 
 
 def test_nbshow_app():
@@ -26,6 +37,40 @@ def test_nbshow_app():
     assert nbdime.log.logger.level == logging.CRITICAL
 
 
+def test_nbshow_app_cells(capsys):
+    p = filespath()
+    afn = os.path.join(p, "multilevel-test-base.ipynb")
+    nb = nbformat.read(afn, as_version=4)
+
+    args = nbdime.nbshowapp._build_arg_parser().parse_args([afn, '--cells', '1:3', '-s'])
+    assert args.cells == slice(1, 3)
+    with mock.patch('nbformat.validate', side_effect=AssertionError):
+        assert 0 == main_show(args)
+    out = capsys.readouterr()[0]
+    assert 'code cell 0:' not in out
+    assert 'code cell 1:' in out
+    assert 'code cell 2:' in out
+    assert 'code cell 3:' not in out
+    assert nb.cells[1].source in out
+
+    args = nbdime.nbshowapp._build_arg_parser().parse_args([afn, '--cells', '-1'])
+    assert 0 == main_show(args)
+    out = capsys.readouterr()[0]
+    assert 'cell %d:' % (len(nb.cells) - 1) in out
+    assert 'cell %d:' % (len(nb.cells) - 2) not in out
+
+
+def test_nbshow_app_max_chars(capsys):
+    p = filespath()
+    afn = os.path.join(p, "multilevel-test-base.ipynb")
+    args = nbdime.nbshowapp._build_arg_parser().parse_args([afn, '--max-chars', '50'])
+    assert 0 == main_show(args)
+    out = capsys.readouterr()[0]
+    shown, note = out.rsplit("\n", 2)[:2]
+    assert len(shown) == 50
+    assert note == "...<output stopped at 50 characters>"
+
+
 def test_nbdiff_app():
     p = filespath()
     afn = os.path.join(p, "multilevel-test-base.ipynb")
@@ -40,6 +85,53 @@ def test_nbdiff_app():
     assert nbdime.log.logger.level == logging.WARN
 
 
+def test_nbdiff_app_external_diff():
+    p = filespath()
+    afn = os.path.join(p, "multilevel-test-base.ipynb")
+    bfn = os.path.join(p, "multilevel-test-local.ipynb")
+    parser = nbdime.nbdiffapp._build_arg_parser()
+    try:
+        assert 0 == main_diff(parser.parse_args([afn, bfn, '--external-diff']))
+        assert not nbdime.prettyprint.use_builtin_diff
+        assert 0 == main_diff(parser.parse_args([afn, bfn]))
+        assert nbdime.prettyprint.use_builtin_diff
+    finally:
+        nbdime.prettyprint.use_builtin_diff = True
+
+
+def test_nbpatch_app_prints_notebook(tmpdir, capsys):
+    image = base64.b64encode(os.urandom(100000)).decode("ascii")
+    a = nbformat.v4.new_notebook(cells=[
+        nbformat.v4.new_code_cell("show()", outputs=[
+            nbformat.v4.new_output("display_data", data={"image/png": image})
+        ])])
+    b = nbformat.v4.new_notebook(cells=a.cells + [
+        nbformat.v4.new_markdown_cell("# Added")])
+    afn = str(tmpdir.join("a.ipynb"))
+    dfn = str(tmpdir.join("diff.json"))
+    nbformat.write(a, afn)
+    with io.open(dfn, "w", encoding="utf8") as f:
+        f.write(json.dumps(diff_notebooks(a, b)))
+
+    args = nbdime.nbpatchapp._build_arg_parser().parse_args([afn, dfn])
+    assert 0 == main_patch(args)
+    assert nbformat.reads(capsys.readouterr()[0], as_version=4) == b
+
+
+def test_nbdiff_app_output(tmpdir):
+    p = filespath()
+    afn = os.path.join(p, "multilevel-test-base.ipynb")
+    bfn = os.path.join(p, "multilevel-test-local.ipynb")
+    dfn = str(tmpdir.join("diff.json"))
+
+    args = nbdime.nbdiffapp._build_arg_parser().parse_args([afn, bfn, '-o', dfn])
+    assert 0 == main_diff(args)
+    expected = diff_notebooks(nbformat.read(afn, as_version=4),
+                              nbformat.read(bfn, as_version=4))
+    with io.open(dfn, encoding="utf8") as f:
+        assert f.read() == json.dumps(expected, indent=2, separators=(",", ": "))
+
+
 def test_nbmerge_app():
     p = filespath()
     bfn = os.path.join(p, "multilevel-test-base.ipynb")
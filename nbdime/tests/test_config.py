@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+
+import argparse
+import io
+import json
+
+import pytest
+
+from nbdime import patch
+from nbdime.args import add_diff_args, diff_config_from_args
+from nbdime.config import (DiffConfig, profiles, load_config,
+                           default_config, set_default_config)
+from nbdime.diffing.generic import diff
+from nbdime.diffing.notebooks import diff_notebooks, diff_mime_bundle
+
+from .fixtures import matching_nb_pairs
+
+
+def test_config_profiles():
+    assert DiffConfig() == DiffConfig("default")
+    for name in profiles:
+        config = DiffConfig(name)
+        for key, value in profiles[name].items():
+            assert getattr(config, key) == value
+    assert DiffConfig("fast") != DiffConfig()
+    with pytest.raises(ValueError):
+        DiffConfig("nonexisting")
+    with pytest.raises(ValueError):
+        DiffConfig(nonexisting_setting=1)
+
+
+@pytest.mark.parametrize("name, value", [
+    ("line_similarity", "abc"),
+    ("line_similarity", 1.5),
+    ("source_similarity", True),
+    ("workers", 0),
+    ("grid_memory_limit", None),
+    ("algorithm", "fastest"),
+    ("algorithms", {"/cells/*/source": "fastest"}),
+    ("algorithms", ["myers"]),
+    ("auto_costs", {"nonexisting": 1}),
+    ("auto_costs", {"myers": "cheap"}),
+    ("similarity_ratio", "ratios"),
+    ("split_mimes", "text/"),
+    ("split_mimes", [1]),
+])
+def test_config_invalid_settings(name, value):
+    with pytest.raises(ValueError):
+        DiffConfig(**{name: value})
+    # A failed update changes nothing
+    config = DiffConfig()
+    with pytest.raises(ValueError):
+        config.update(approximate_max_length=10, **{name: value})
+    assert config == DiffConfig()
+
+
+def test_config_algorithm_for_path():
+    config = DiffConfig(algorithm="difflib",
+                        algorithms={"/cells/*/outputs": "bruteforce"})
+    assert config.algorithm_for("/cells/*/source") == "difflib"
+    assert config.algorithm_for("/cells/*/source", exact=False) == "bruteforce"
+    assert config.algorithm_for("/cells/*/outputs") == "bruteforce"
+
+
+def test_load_config_precedence(tmpdir):
+    filename = str(tmpdir.join("nbdime_diff.json"))
+    with io.open(filename, "w", encoding="utf8") as f:
+        f.write(json.dumps({"profile": "fast", "line_similarity": 0.5,
+                            "source_similarity": 0.5}))
+
+    config = load_config(environ={}, filename=filename)
+    assert config.profile == "fast"
+    assert config.line_similarity == 0.5
+
+    environ = {"NBDIME_DIFF_PROFILE": "precise",
+               "NBDIME_DIFF_LINE_SIMILARITY": "0.6",
+               "NBDIME_DIFF_ALGORITHM": "difflib"}
+    config = load_config(environ=environ, filename=filename)
+    assert config.profile == "precise"
+    assert config.algorithm == "difflib"
+    assert config.line_similarity == 0.6
+    assert config.source_similarity == 0.5
+
+    config = load_config(profile="default", settings={"line_similarity": None},
+                         environ=environ, filename=filename)
+    assert config.profile == "default"
+    assert config.line_similarity is None
+    assert config.source_similarity == 0.5
+
+
+def test_diff_config_from_args(tmpdir):
+    parser = argparse.ArgumentParser()
+    add_diff_args(parser)
+    assert diff_config_from_args(parser.parse_args([])) is default_config()
+    assert diff_config_from_args(None) is default_config()
+
+    filename = str(tmpdir.join("config.json"))
+    with io.open(filename, "w", encoding="utf8") as f:
+        f.write(json.dumps({"split_max_size": 100}))
+    arguments = parser.parse_args([
+        "--diff-profile", "fast", "--diff-config", filename,
+        "--diff-option", "line_similarity=0.8",
+        "--diff-option", "algorithm=bruteforce"])
+    config = diff_config_from_args(arguments)
+    assert config.profile == "fast"
+    assert config.split_max_size == 100
+    assert config.line_similarity == 0.8
+    assert config.algorithm == "bruteforce"
+
+
+def test_diff_config_from_args_errors(tmpdir, capsys):
+    parser = argparse.ArgumentParser()
+    add_diff_args(parser)
+    filename = str(tmpdir.join("config.json"))
+    with io.open(filename, "w", encoding="utf8") as f:
+        f.write("{not json")
+    for args in (["--diff-option", "line_similarity=abc"],
+                 ["--diff-option", "foo=1"],
+                 ["--diff-option", "foo"],
+                 ["--diff-config", filename],
+                 ["--diff-config", str(tmpdir.join("missing.json"))]):
+        arguments = parser.parse_args(args)
+        with pytest.raises(ValueError):
+            diff_config_from_args(arguments)
+        with pytest.raises(SystemExit):
+            diff_config_from_args(arguments, parser)
+        assert "error:" in capsys.readouterr()[1]
+
+
+def test_default_config_ignores_invalid_environment(monkeypatch):
+    monkeypatch.setenv("NBDIME_DIFF_PROFILE", "bogus")
+    with pytest.raises(ValueError):
+        load_config()
+    previous = set_default_config(None)
+    try:
+        assert default_config() == DiffConfig()
+    finally:
+        set_default_config(previous)
+
+
+def test_set_default_config():
+    config = DiffConfig("fast")
+    previous = set_default_config(config)
+    try:
+        assert default_config() is config
+    finally:
+        set_default_config(previous)
+
+
+def test_line_similarity_setting():
+    a = "def f(x):\n    return x + 1\n"
+    b = "def f(x):\n    return x + 2\n"
+    # Similar lines are patched, or replaced when only equal lines align
+    d = diff(a, b, config=DiffConfig())
+    assert [e.op for e in d] == ["patch"]
+    d = diff(a, b, config=DiffConfig(line_similarity=None))
+    assert sorted(e.op for e in d) == ["addrange", "removerange"]
+    for config in (DiffConfig(), DiffConfig(line_similarity=None)):
+        assert patch(a, diff(a, b, config=config)) == b
+
+
+def test_split_max_size_setting():
+    a = {"text/plain": "x\n" * 10}
+    b = {"text/plain": "x\n" * 9 + "y\n"}
+    d = diff_mime_bundle(a, b, config=DiffConfig())
+    assert d[0].op == "patch"
+    d = diff_mime_bundle(a, b, config=DiffConfig(split_max_size=10))
+    assert d[0].op == "replace"
+
+
+@pytest.mark.parametrize("profile", sorted(profiles))
+def test_diff_and_patch_notebooks_with_profiles(matching_nb_pairs, profile):
+    a, b = matching_nb_pairs
+    d = diff_notebooks(a, b, DiffConfig(profile))
+    assert patch(a, d) == b
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+
+import io
+import logging
+import os
+import socket
+import threading
+from os.path import join as pjoin
+
+import pytest
+import mock
+
+from nbdime import daemonclient, nbdiffapp
+from nbdime.config import default_config
+from nbdime.gitdiffdriver import main as gdd_main
+from nbdime.prettyprint import file_timestamp
+
+from .test_git_diffdriver import expected_output
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="Requires Unix domain sockets.")
+
+
+test_dir = os.path.abspath(os.path.dirname(__file__))
+
+
+def diff_driver_argv():
+    fn1 = pjoin(test_dir, 'files/foo--1.ipynb')
+    fn2 = pjoin(test_dir, 'files/foo--2.ipynb')
+    argv = [
+        '/mock/path/git-nbdiffdriver', 'diff',
+        fn1,
+        fn1, 'invalid_mock_checksum', '100644',
+        fn2, 'invalid_mock_checksum', '100644']
+    expected = expected_output.format(
+        fn1, fn2, file_timestamp(fn1), file_timestamp(fn2))
+    return argv, expected
+
+
+@pytest.fixture
+def daemon(request, tmpdir, monkeypatch):
+    """Run a daemon in a thread of the test process."""
+    from nbdime.daemon import DaemonServer, request as daemon_request
+    directory = str(tmpdir.mkdir('daemon'))
+    os.chmod(directory, 0o700)
+    path = pjoin(directory, 'daemon.sock')
+    root = logging.getLogger()
+    level = root.level
+    server = DaemonServer(path, idle_timeout=0)
+    thread = threading.Thread(target=server.serve)
+    thread.daemon = True
+    thread.start()
+    monkeypatch.setenv('NBDIME_DAEMON_SOCKET', path)
+
+    def stop():
+        daemon_request('shutdown', path)
+        thread.join(10)
+        server.server_close()
+        root.removeHandler(server.log_handler)
+        root.setLevel(level)
+        nbdiffapp.notebook_cache = None
+    request.addfinalizer(stop)
+    return server
+
+
+def test_daemon_runs_diff_driver(daemon, capsys, nocolor):
+    argv, expected = diff_driver_argv()
+    for i in range(2):
+        with mock.patch('sys.argv', argv):
+            assert gdd_main() == 0
+        assert capsys.readouterr()[0] == expected
+    assert daemon.requests == 2
+    # The second run read the notebooks from the cache
+    assert daemon.notebook_cache.entries.hits == 2
+
+
+recorded_profiles = []
+
+
+def record_profile(args):
+    recorded_profiles.append(default_config().profile)
+
+
+def test_daemon_loads_diff_settings_per_request(daemon, monkeypatch):
+    from nbdime import daemon as daemon_module
+    monkeypatch.setitem(daemon_module.drivers, 'record-profile',
+                        'nbdime.tests.test_daemon:record_profile')
+    config = default_config()
+    del recorded_profiles[:]
+    for profile in ('fast', 'precise'):
+        request = {'command': 'record-profile', 'cwd': os.getcwd(), 'args': [],
+                   'env': dict(os.environ, NBDIME_DIFF_PROFILE=profile)}
+        assert daemon.run_driver(request, io.BytesIO()) == 0
+    assert recorded_profiles == ['fast', 'precise']
+    assert default_config() is config
+
+
+def test_daemon_refuses_other_version(daemon, capsys):
+    argv, expected = diff_driver_argv()
+    with mock.patch('nbdime._version.__version__', '0.0.0'):
+        assert daemonclient.run('git-nbdiffdriver', argv[1:]) is None
+    assert daemon.requests == 0
+    assert capsys.readouterr()[0] == ''
+
+
+def test_driver_runs_without_daemon(tmpdir, monkeypatch, capsys, nocolor):
+    path = pjoin(str(tmpdir), 'daemon.sock')
+    monkeypatch.setenv('NBDIME_DAEMON_SOCKET', path)
+    argv, expected = diff_driver_argv()
+    assert daemonclient.run('git-nbdiffdriver', argv[1:]) is None
+    with mock.patch('sys.argv', argv):
+        assert gdd_main() == 0
+    assert capsys.readouterr()[0] == expected
+
+
+def test_client_ignores_shared_directory(daemon):
+    path = daemonclient.socket_path()
+    sock = daemonclient.connect(path)
+    assert sock is not None
+    sock.close()
+    os.chmod(os.path.dirname(path), 0o755)
+    assert daemonclient.connect(path) is None
+    os.chmod(os.path.dirname(path), 0o700)
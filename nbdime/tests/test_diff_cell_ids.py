@@ -0,0 +1,73 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+
+import copy
+
+import nbformat
+from nbformat.v4 import new_notebook, new_code_cell, new_markdown_cell
+
+from nbdime import patch_notebook, diff_notebooks
+from nbdime.diffing.notebooks import match_cell_ids, align_cells
+
+
+def cells_with_ids(ids, cell_type="code"):
+    new_cell = new_code_cell if cell_type == "code" else new_markdown_cell
+    cells = []
+    for cell_id in ids:
+        cell = new_cell("source of %s\n" % cell_id)
+        cell.id = cell_id
+        cells.append(cell)
+    return cells
+
+
+def test_match_cell_ids():
+    a = cells_with_ids("abcdef")
+    assert match_cell_ids(a, a) == [(k, k) for k in range(6)]
+    # Moved cells are left out, keeping the matches in order
+    b = cells_with_ids("abedcf")
+    matches = match_cell_ids(a, b)
+    assert matches in ([(0, 0), (1, 1), (2, 4), (5, 5)],
+                       [(0, 0), (1, 1), (3, 3), (5, 5)],
+                       [(0, 0), (1, 1), (4, 2), (5, 5)])
+    # Inserted and deleted cells
+    b = cells_with_ids("xbcyf")
+    assert match_cell_ids(a, b) == [(1, 1), (2, 2), (5, 4)]
+    # Duplicate ids, other cell types and missing ids are not matched
+    b = cells_with_ids("aabcdef")
+    b[2].cell_type = "markdown"
+    del b[3]["id"]
+    assert match_cell_ids(a, b) == [(3, 4), (4, 5), (5, 6)]
+    assert match_cell_ids(a, []) == []
+    assert match_cell_ids([], a) == []
+
+
+def test_align_cells_by_id():
+    a = cells_with_ids("abcdef")
+    b = copy.deepcopy(a)
+    # Matched by id despite new source
+    b[2].source = "something else entirely\n"
+    assert align_cells(a, b) == [(0, 0, 6)]
+
+    # Cells without matching ids are aligned by source
+    b = copy.deepcopy(a)
+    b[1].id = "x"
+    b.insert(4, cells_with_ids("y")[0])
+    assert align_cells(a, b) == [(0, 0, 4), (4, 5, 2)]
+
+
+def test_diff_and_patch_notebooks_with_cell_ids():
+    a = new_notebook(cells=cells_with_ids("abcdefgh"))
+    b = copy.deepcopy(a)
+    b.cells[1].source = "changed\n"
+    b.cells.insert(6, b.cells.pop(2))
+    del b.cells[0]
+    b.cells.append(cells_with_ids("z", "markdown")[0])
+    d = diff_notebooks(a, b)
+    assert patch_notebook(a, d) == nbformat.from_dict(b)
+    cell_ops = [e for e in d if e.key == "cells"][0].diff
+    # The changed cell is patched, not replaced
+    assert [e.key for e in cell_ops if e.op == "patch"] == [1]
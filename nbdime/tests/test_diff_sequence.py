@@ -24,8 +24,7 @@ def check_diff_sequence_and_patch(a, b):
     assert is_valid_diff(d)
     assert patch(b, d) == a
 
-#algorithms = ["difflib", "bruteforce", "myers"]
-algorithms = ["difflib", "bruteforce"]
+algorithms = ["difflib", "bruteforce", "myers", "auto"]
 
 
 @pytest.yield_fixture(params=algorithms)
@@ -0,0 +1,97 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+
+import operator
+
+from six.moves import xrange as range
+
+from nbdime import patch
+from nbdime.config import DiffConfig
+from nbdime.diffing.seq_auto import estimate_edit_distance, choose_sequence_algorithm
+from nbdime.diffing import snakes
+from nbdime.diffing.sequences import diff_sequence
+from nbdime.diffing.snakes import compute_snakes_multilevel
+
+
+def lines(n, prefix="line"):
+    return ["%s %d\n" % (prefix, i) for i in range(n)]
+
+
+def test_estimate_edit_distance():
+    a = lines(100)
+    assert estimate_edit_distance(a, a) == 0
+    assert estimate_edit_distance(a, a[:50] + a[60:]) == 10
+    assert estimate_edit_distance(a, lines(100, "other")) == 200
+    # Moved items count as inserted and deleted
+    assert estimate_edit_distance(a, a[::-1]) == 198
+    # Unhashable items are sampled
+    da = [{"x": x} for x in a]
+    assert estimate_edit_distance(da, da) == 0
+    assert estimate_edit_distance(da, [{"y": x} for x in a]) == 200
+
+
+def test_choose_sequence_algorithm():
+    config = DiffConfig()
+    a = lines(1000)
+    b = a[:300] + lines(5, "new") + a[310:]
+    assert choose_sequence_algorithm(a[:3], b[:3], config=config) == "bruteforce"
+    assert choose_sequence_algorithm(a, b, config=config) == "myers"
+    assert choose_sequence_algorithm(a, lines(1000, "other"), config=config) == "bruteforce"
+    # Approximate comparisons are never done by hash
+    compare = lambda x, y: x.split()[-1] == y.split()[-1]
+    assert choose_sequence_algorithm(a, b, compare, config=config) == "myers"
+
+    big = lines(20000)
+    assert choose_sequence_algorithm(big, big[::-1], config=config) == "difflib"
+    config = DiffConfig(auto_hash_min_size=10**6)
+    assert choose_sequence_algorithm(big, big[::-1], config=config) != "difflib"
+
+
+def test_auto_costs_setting():
+    a = lines(200)
+    b = a[:100] + a[101:]
+    config = DiffConfig(auto_costs={"myers_item": 10**6})
+    assert config.auto_costs["bruteforce"] == DiffConfig().auto_costs["bruteforce"]
+    assert choose_sequence_algorithm(a, b, config=config) == "bruteforce"
+
+
+def test_diff_sequence_auto():
+    config = DiffConfig(algorithm="auto")
+    a = lines(1000)
+    for b in (a, a[:300] + lines(5, "new") + a[310:], lines(20, "other"), []):
+        d = diff_sequence(a, b, config=config)
+        assert patch(a, d) == b
+
+
+def test_compute_snakes_uses_chosen_algorithm(monkeypatch):
+    calls = []
+
+    def recording(name, f):
+        def wrapper(*args):
+            calls.append(name)
+            return f(*args)
+        return wrapper
+
+    for name in ("myers", "difflib", "bruteforce"):
+        attr = name + "_compute_snakes"
+        monkeypatch.setattr(snakes, attr, recording(name, getattr(snakes, attr)))
+
+    a = lines(200)
+    b = a[:50] + lines(3, "new") + a[60:]
+    compares = [lambda x, y: x.split()[-1] == y.split()[-1], operator.__eq__]
+    expected = compute_snakes_multilevel(a, b, compares, config=DiffConfig())
+    assert set(calls) == {"bruteforce"}
+    # difflib is only used for the exact compare, and auto leaves the
+    # short gaps between the exact matches to brute force
+    for algorithm, used in (("myers", {"myers"}),
+                            ("difflib", {"difflib", "bruteforce"}),
+                            ("auto", {"myers", "bruteforce"})):
+        del calls[:]
+        config = DiffConfig(algorithm=algorithm)
+        result = compute_snakes_multilevel(a, b, compares, config=config)
+        assert sum(n for i, j, n in result) == sum(n for i, j, n in expected)
+        assert set(calls) == used
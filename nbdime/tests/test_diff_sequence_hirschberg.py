@@ -0,0 +1,94 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+
+import random
+
+from six.moves import xrange as range
+
+from nbdime import patch
+from nbdime.diff_format import is_valid_diff
+from nbdime.diffing import seq_bruteforce
+from nbdime.diffing.seq_bruteforce import (bruteforce_compare_grid, bruteforce_llcs_grid,
+                                           bruteforce_compute_snakes, diff_sequence_bruteforce)
+from nbdime.diffing.seq_hirschberg import (hirschberg_llcs_row, hirschberg_lcs_indices,
+                                           hirschberg_compute_snakes, diff_sequence_hirschberg)
+
+
+examples = [
+    ([], []),
+    ([1], []),
+    ([], [1]),
+    ([1], [1]),
+    ([1, 2], [1, 2]),
+    ([2, 1], [1, 2]),
+    ([1, 2, 3], [1, 2]),
+    ([2, 1, 3], [1, 2]),
+    ([1, 2], [1, 2, 3]),
+    ([2, 1], [1, 2, 3]),
+    ([1, 2], [1, 2, 1, 2]),
+    ([1, 2, 1, 2], [1, 2]),
+    ([1, 2, 3, 4, 1, 2], [3, 4, 2, 3]),
+    (list("abcab"), list("ayb")),
+    (list("xaxcxabc"), list("abcy")),
+    ]
+
+
+def random_examples(n):
+    rng = random.Random(42)
+    for k in range(n):
+        a = [rng.randint(0, 4) for i in range(rng.randint(0, 30))]
+        b = [rng.randint(0, 4) for i in range(rng.randint(0, 30))]
+        yield a, b
+
+
+def check_lcs(a, b):
+    R = bruteforce_llcs_grid(bruteforce_compare_grid(a, b))
+    llcs = R[len(a)][-1]
+    if a:
+        assert hirschberg_llcs_row(a, b) == R[len(a)]
+
+    A_indices, B_indices = hirschberg_lcs_indices(a, b)
+    assert len(A_indices) == len(B_indices) == llcs
+    assert all(a[i] == b[j] for i, j in zip(A_indices, B_indices))
+    assert A_indices == sorted(set(A_indices))
+    assert B_indices == sorted(set(B_indices))
+
+    d = diff_sequence_hirschberg(a, b)
+    assert is_valid_diff(d)
+    assert patch(a, d) == b
+
+    snakes = hirschberg_compute_snakes(a, b)
+    assert sum(n for i, j, n in snakes) == llcs
+
+
+def test_diff_sequence_hirschberg():
+    for a, b in examples:
+        check_lcs(a, b)
+    for a, b in random_examples(200):
+        check_lcs(a, b)
+
+
+def test_hirschberg_compare():
+    a = ["abc", "Abd", "xyz"]
+    b = ["ABD", "XYZ"]
+    compare = lambda x, y: x.lower() == y.lower()
+    assert hirschberg_lcs_indices(a, b, compare) == ([1, 2], [0, 1])
+
+
+def test_bruteforce_uses_linear_space_above_limit(monkeypatch):
+    a, b = list("xaxcxabc" * 5), list("abcy" * 7)
+    expected = bruteforce_compute_snakes(a, b, lambda x, y: x == y)
+
+    def no_grid(*args):
+        raise AssertionError("Grid computed")
+
+    monkeypatch.setattr(seq_bruteforce, "grid_memory_limit", 0)
+    monkeypatch.setattr(seq_bruteforce, "bruteforce_compare_grid", no_grid)
+    d = diff_sequence_bruteforce(a, b)
+    assert patch(a, d) == b
+    snakes = bruteforce_compute_snakes(a, b, lambda x, y: x == y)
+    assert sum(n for i, j, n in snakes) == sum(n for i, j, n in expected)
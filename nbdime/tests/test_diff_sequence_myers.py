@@ -0,0 +1,57 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+
+from nbdime import patch
+from nbdime.diff_format import is_valid_diff
+from nbdime.diffing.seq_bruteforce import bruteforce_compare_grid, bruteforce_llcs_grid
+from nbdime.diffing.seq_myers import (myers_middle_snake, myers_lcs_indices,
+                                      myers_compute_snakes, diff_sequence_myers)
+
+from .test_diff_sequence_hirschberg import examples, random_examples
+
+
+def check_lcs(a, b):
+    R = bruteforce_llcs_grid(bruteforce_compare_grid(a, b))
+    llcs = R[len(a)][-1]
+
+    A_indices, B_indices = myers_lcs_indices(a, b)
+    assert len(A_indices) == len(B_indices) == llcs
+    assert all(a[i] == b[j] for i, j in zip(A_indices, B_indices))
+    assert A_indices == sorted(set(A_indices))
+    assert B_indices == sorted(set(B_indices))
+
+    d = diff_sequence_myers(a, b)
+    assert is_valid_diff(d)
+    assert patch(a, d) == b
+
+    snakes = myers_compute_snakes(a, b)
+    assert sum(n for i, j, n in snakes) == llcs
+
+
+def test_diff_sequence_myers():
+    for a, b in examples:
+        check_lcs(a, b)
+    for a, b in random_examples(500):
+        check_lcs(a, b)
+
+
+def test_myers_middle_snake():
+    # Cases from Myers' article and neil.fraser.name/writing/diff/
+    a, b = list("abcabba"), list("cbabac")
+    D = myers_middle_snake(a, b, 0, len(a), 0, len(b))[0]
+    assert D == 5
+    a, b = list("xaxcxabc"), list("abcy")
+    D, x, y, u, v = myers_middle_snake(a, b, 0, len(a), 0, len(b))
+    assert D == 5 + 1
+    assert a[x:u] == b[y:v]
+
+
+def test_myers_compare():
+    a = ["abc", "Abd", "xyz"]
+    b = ["ABD", "XYZ"]
+    compare = lambda x, y: x.lower() == y.lower()
+    assert myers_lcs_indices(a, b, compare) == ([1, 2], [0, 1])
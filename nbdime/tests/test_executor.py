@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+
+import threading
+
+import pytest
+
+from nbdime.executor import (BoundedExecutor, QueueFull, shared_executor,
+                             set_shared_executor)
+
+
+def test_executor_runs_calls():
+    executor = BoundedExecutor(max_workers=2, max_queue=2)
+    futures = [executor.submit(pow, 2, i) for i in range(4)]
+    assert [f.result() for f in futures] == [1, 2, 4, 8]
+    executor.shutdown()
+    assert executor.pending == 0
+
+
+def test_executor_refuses_work_beyond_queue_depth():
+    executor = BoundedExecutor(max_workers=1, max_queue=1)
+    gate = threading.Event()
+    running = executor.submit(gate.wait)
+    queued = executor.submit(gate.wait)
+    with pytest.raises(QueueFull):
+        executor.submit(gate.wait)
+
+    # Cancelling the queued call frees up its slot
+    assert queued.cancel()
+    again = executor.submit(gate.wait)
+    gate.set()
+    assert running.result() and again.result()
+    executor.shutdown()
+    assert executor.pending == 0
+
+
+def test_executor_rejects_bad_limits():
+    with pytest.raises(ValueError):
+        BoundedExecutor(max_workers=0)
+    with pytest.raises(ValueError):
+        BoundedExecutor(max_queue=-1)
+
+
+def test_shared_executor():
+    executor = shared_executor()
+    assert shared_executor() is executor
+
+    mine = BoundedExecutor(max_workers=1)
+    assert set_shared_executor(mine) is executor
+    assert shared_executor() is mine
+    set_shared_executor(executor)
+    mine.shutdown()
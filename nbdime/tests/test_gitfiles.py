@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+try:
+    from shutil import which
+except ImportError:
+    from backports.shutil_which import which
+
+import io
+import json
+import os
+import shutil
+from os.path import join as pjoin
+from subprocess import check_call
+
+import pytest
+import nbformat
+
+from .fixtures import filespath
+
+from nbdime import diff_notebooks
+from nbdime.gitfiles import (GitObjectReader, GitNotebookSource,
+                             changed_files, resolve_tree)
+from nbdime.nbdiffapp import main as nbdiff_main
+
+pytestmark = pytest.mark.skipif(not which('git'), reason="Missing git.")
+
+
+def git(repo, *args):
+    check_call(['git', '-c', 'user.name=nbdime', '-c', 'user.email=nbdime@example.com']
+               + list(args), cwd=repo)
+
+
+@pytest.fixture
+def repo(tmpdir, monkeypatch):
+    """A repository with a commit modifying, adding and removing notebooks."""
+    repo = str(tmpdir)
+    p = filespath()
+    git(repo, 'init', '-q')
+    os.mkdir(pjoin(repo, 'sub'))
+    for name in ('sub/foo.ipynb', 'bar.ipynb', 'gone.ipynb'):
+        shutil.copy(pjoin(p, 'foo--1.ipynb'), pjoin(repo, name))
+    with io.open(pjoin(repo, 'text.txt'), 'w') as f:
+        f.write('text\n')
+    git(repo, 'add', '.')
+    git(repo, 'commit', '-q', '-m', 'first')
+
+    shutil.copy(pjoin(p, 'foo--2.ipynb'), pjoin(repo, 'sub/foo.ipynb'))
+    shutil.copy(pjoin(p, 'foo--2.ipynb'), pjoin(repo, 'new.ipynb'))
+    os.chmod(pjoin(repo, 'bar.ipynb'), 0o755)
+    with io.open(pjoin(repo, 'text.txt'), 'w') as f:
+        f.write('changed\n')
+    git(repo, 'rm', '-q', 'gone.ipynb')
+    git(repo, 'add', '.')
+    git(repo, 'commit', '-q', '-m', 'second')
+    monkeypatch.chdir(repo)
+    return repo
+
+
+def test_object_reader(repo):
+    with open(pjoin(filespath(), 'foo--2.ipynb'), 'rb') as f:
+        expected = f.read()
+    with GitObjectReader() as reader:
+        sha, kind, data = reader.read('HEAD:new.ipynb')
+        assert kind == 'blob'
+        assert data == expected
+        # Same process, by sha
+        assert reader.read(sha) == (sha, kind, data)
+        with pytest.raises(KeyError):
+            reader.read('HEAD:missing.ipynb')
+        assert reader.read('HEAD:text.txt')[2] == b'changed\n'
+
+
+def test_changed_files(repo):
+    changed = {f.path: f for f in changed_files('HEAD~1', 'HEAD')}
+    assert sorted(changed) == [
+        'bar.ipynb', 'gone.ipynb', 'new.ipynb', 'sub/foo.ipynb', 'text.txt']
+    assert changed['gone.ipynb'].status == 'D'
+    assert changed['new.ipynb'].status == 'A'
+    assert not changed['bar.ipynb'].content_changed()
+    assert changed['sub/foo.ipynb'].content_changed()
+
+    # Paths are relative to the working directory
+    os.chdir('sub')
+    assert [f.path for f in changed_files('HEAD~1', 'HEAD', ['.'])] == ['sub/foo.ipynb']
+
+
+def test_notebook_source(repo):
+    added = {f.path: f for f in changed_files('HEAD~1', 'HEAD')}['new.ipynb']
+    with GitObjectReader() as reader:
+        source = GitNotebookSource(reader)
+        assert source.read(added.base_sha) == nbformat.v4.new_notebook()
+        assert source.read(added.remote_sha) == nbformat.read(
+            pjoin(filespath(), 'foo--2.ipynb'), as_version=4)
+
+
+def test_resolve_tree(repo):
+    assert resolve_tree('HEAD')
+    assert resolve_tree('HEAD~1') != resolve_tree('HEAD')
+    assert resolve_tree('nosuchrevision') is None
+    assert resolve_tree('text.txt') is None
+
+
+def test_nbdiff_revisions(repo):
+    output = pjoin(repo, 'diff.json')
+    assert nbdiff_main(['HEAD~1', 'HEAD', '-o', output]) == 0
+    with io.open(output, encoding='utf8') as f:
+        diffs = json.load(f)
+    # Only notebooks with changed contents are diffed
+    assert sorted(diffs) == ['gone.ipynb', 'new.ipynb', 'sub/foo.ipynb']
+    a = nbformat.read(pjoin(filespath(), 'foo--1.ipynb'), as_version=4)
+    b = nbformat.read(pjoin(filespath(), 'foo--2.ipynb'), as_version=4)
+    assert diffs['sub/foo.ipynb'] == json.loads(json.dumps(diff_notebooks(a, b)))
+
+    assert nbdiff_main(['HEAD~1', 'HEAD', 'sub', '-o', output]) == 0
+    with io.open(output, encoding='utf8') as f:
+        assert list(json.load(f)) == ['sub/foo.ipynb']
+
+
+def test_nbdiff_revisions_printed(repo, capsys, nocolor):
+    assert nbdiff_main(['HEAD~1', 'HEAD', 'sub']) == 0
+    out = capsys.readouterr()[0]
+    assert out.startswith('nbdiff HEAD~1:sub/foo.ipynb HEAD:sub/foo.ipynb\n')
+    assert '+def foo(x, y):' in out
+
+    assert nbdiff_main(['HEAD~1', 'nosuchrevision']) == 1
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import nbdime
+
+
+# Entry points started once per file by git, and the packages they
+# must not import
+light_entry_points = [
+    "nbdime",
+    "nbdime.__main__",
+    "nbdime.daemonclient",
+    "nbdime.gitdiffdriver",
+    "nbdime.gitmergedriver",
+    "nbdime.gitdifftool",
+    "nbdime.gitmergetool",
+    "nbdime.webapp.sessionclient",
+    ]
+heavy_packages = ["nbformat", "jsonschema", "tornado", "requests",
+                  "nbdime.diffing", "nbdime.merging", "nbdime.prettyprint"]
+
+# Packages the command line apps must not import
+app_entry_points = [
+    ("nbdime.nbshowapp", ["tornado", "nbdime.diffing", "nbdime.merging",
+                          "nbdime.webapp"]),
+    ("nbdime.nbdiffapp", ["tornado", "nbdime.merging", "nbdime.webapp"]),
+    ("nbdime.nbmergeapp", ["tornado", "nbdime.webapp"]),
+    ]
+
+# Import time budgets in milliseconds, with a warm bytecode cache. The
+# measured times are about a quarter of these. Wall clock times vary
+# too much on shared machines, so they are only checked when
+# NBDIME_BENCHMARK is set, the imported modules are always checked.
+light_budget = 150
+app_own_budget = 50
+
+benchmark = pytest.mark.skipif(
+    not os.environ.get("NBDIME_BENCHMARK"),
+    reason="Import times are only checked with NBDIME_BENCHMARK=1.")
+
+
+@pytest.fixture(scope="module")
+def pycache(tmpdir_factory):
+    "A bytecode cache outside of the source tree, shared by the tests."
+    return str(tmpdir_factory.mktemp("pycache"))
+
+
+def _python(args, pycache):
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    cmd = [sys.executable, "-X", "pycache_prefix=" + pycache] + args
+    return subprocess.run(cmd, env=env, check=True, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, universal_newlines=True)
+
+
+def imported_modules(module, pycache):
+    code = "import sys, json, %s; print(json.dumps(sorted(sys.modules)))" % module
+    return json.loads(_python(["-c", code], pycache).stdout)
+
+
+def import_times(module, pycache, runs=2):
+    """Import module with -X importtime, returning {name: (self, cumulative)}.
+
+    Times are in milliseconds, the fastest of some runs.
+    """
+    _python(["-c", "import " + module], pycache)  # Warm the cache
+    best = {}
+    for i in range(runs):
+        stderr = _python(["-X", "importtime", "-c", "import " + module],
+                         pycache).stderr
+        for line in stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            own, cumulative, name = line[len("import time:"):].split("|")
+            try:
+                times = (int(own) / 1000.0, int(cumulative) / 1000.0)
+            except ValueError:
+                continue  # Header line
+            name = name.strip()
+            best[name] = min(best.get(name, times), times)
+    return best
+
+
+def is_within(name, package):
+    return name == package or name.startswith(package + ".")
+
+
+def test_lazy_attributes():
+    assert "diff_notebooks" in dir(nbdime)
+    from nbdime import diff, merge_notebooks
+    from nbdime.diffing import diff as diffing_diff
+    assert diff is diffing_diff
+    assert nbdime.merge_notebooks is merge_notebooks
+    with pytest.raises(AttributeError):
+        nbdime.no_such_function
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8),
+                    reason="Imports are eager before Python 3.7, "
+                           "pycache_prefix requires Python 3.8.")
+class TestImports:
+
+    @pytest.mark.parametrize("module", light_entry_points)
+    def test_light_entry_point_modules(self, module, pycache):
+        modules = imported_modules(module, pycache)
+        heavy = [name for name in modules
+                 if any(is_within(name, p) for p in heavy_packages)]
+        assert heavy == []
+
+    @pytest.mark.parametrize("module,excluded", app_entry_points)
+    def test_app_modules(self, module, excluded, pycache):
+        modules = imported_modules(module, pycache)
+        unexpected = [name for name in modules
+                      if any(is_within(name, p) for p in excluded)]
+        assert unexpected == []
+
+    @benchmark
+    @pytest.mark.parametrize("module", light_entry_points)
+    def test_light_entry_point_import_time(self, module, pycache):
+        times = import_times(module, pycache)
+        assert times[module][1] < light_budget
+
+    @benchmark
+    @pytest.mark.parametrize("module", [m for m, _ in app_entry_points])
+    def test_app_import_time(self, module, pycache):
+        # The apps need nbformat, only count nbdime's own modules
+        times = import_times(module, pycache)
+        own = sum(t[0] for name, t in times.items()
+                  if is_within(name, "nbdime"))
+        assert own < app_own_budget
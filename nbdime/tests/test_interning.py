@@ -0,0 +1,89 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+
+import copy
+import os
+from base64 import encodebytes
+
+import nbformat
+
+from nbdime import diff_notebooks, merge_notebooks
+from nbdime.interning import (Interner, intern_notebooks,
+                              intern_notebook_copies)
+from nbdime.loader import read_notebook
+
+from .fixtures import filespath
+
+
+def test_intern_shares_equal_values():
+    interner = Interner()
+    a = {"x": [1, "text", {"y": None}], "z": "text"}
+    b = {"z": "te" + "xt", "x": [1, "text", {"y": None}]}
+    c = {"x": [1.0, "text", {"y": None}], "z": "text"}
+
+    assert interner.intern(a) is a
+    assert interner.intern(b) is a
+    # Interned in place, and equal values are shared
+    assert b["x"] is a["x"]
+    assert b["z"] is a["z"]
+
+    # Equal numbers of different types are kept apart
+    assert interner.intern(c) is not a
+    assert c["x"] is not a["x"]
+    assert c["x"][2] is a["x"][2]
+    assert type(c["x"][0]) is float
+
+
+def test_intern_notebooks(tmpdir):
+    image = encodebytes(os.urandom(1000)).decode("ascii")
+    fns = []
+    for name in ("base", "local"):
+        nb = nbformat.v4.new_notebook(cells=[
+            nbformat.v4.new_code_cell("show()", outputs=[
+                nbformat.v4.new_output("display_data", data={"image/png": image})
+            ]),
+            nbformat.v4.new_markdown_cell("# %s" % name),
+        ])
+        fns.append(str(tmpdir.join(name + ".ipynb")))
+        nbformat.write(nb, fns[-1])
+
+    base, local = intern_notebooks(*(read_notebook(fn, blob_size=100) for fn in fns))
+    assert base.cells[0].outputs is local.cells[0].outputs
+    assert base.cells[1] is not local.cells[1]
+    assert diff_notebooks(base, local) == diff_notebooks(
+        nbformat.read(fns[0], as_version=4), nbformat.read(fns[1], as_version=4))
+
+
+def test_merge_interned_notebooks():
+    fns = [os.path.join(filespath(), "multi_cell_nb%s.ipynb" % name)
+           for name in ("", "--local", "--remote")]
+    notebooks = [nbformat.read(fn, as_version=4) for fn in fns]
+    expected = merge_notebooks(*copy.deepcopy(notebooks))[0]
+
+    interned = intern_notebooks(*copy.deepcopy(notebooks))
+    merged = merge_notebooks(*interned)[0]
+    assert merged == expected
+    assert interned == notebooks
+
+
+def test_intern_notebook_copies():
+    fns = [os.path.join(filespath(), "multi_cell_nb%s.ipynb" % name)
+           for name in ("", "--local", "--remote")]
+    notebooks = [nbformat.read(fn, as_version=4) for fn in fns]
+    originals = copy.deepcopy(notebooks)
+    ids = [[id(cell) for cell in nb.cells] for nb in notebooks]
+
+    interned = intern_notebook_copies(*notebooks)
+    assert interned == originals
+    assert all(isinstance(nb, nbformat.NotebookNode) for nb in interned)
+    # The notebooks are unchanged, but the copies share values
+    assert notebooks == originals
+    assert [[id(cell) for cell in nb.cells] for nb in notebooks] == ids
+    shared = [cell for cell in interned[1].cells
+              if any(cell is c for c in interned[0].cells)]
+    assert shared
+    assert merge_notebooks(*interned)[0] == merge_notebooks(*originals)[0]
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+
+import glob
+import io
+import json
+import os
+
+import pytest
+
+from .fixtures import filespath
+
+from nbdime.jsonscan import scan_value, scan_notebook, NotebookScan
+
+
+@pytest.mark.parametrize("value", [
+    '"text"',
+    '"quote \\" and backslash \\\\"',
+    '"ends with backslash \\\\"',
+    '"%s"' % ("long " * 1000),
+    '"%s \\"quoted\\""' % ("long " * 1000),
+    '[1, "]", {"a": [2, "}"]}, []]',
+    '{"key \\"with\\" quotes": "[", "b": {}}',
+    '-1.5e3',
+    'true',
+    'null',
+    ])
+def test_scan_value(value):
+    buf = (" \n" + value + " ,").encode("utf8")
+    start, end = scan_value(buf, 0)
+    assert start == 2
+    assert json.loads(buf[start:end].decode("utf8")) == json.loads(value)
+
+
+def test_scan_value_unterminated():
+    with pytest.raises(ValueError):
+        scan_value(b'["abc", {}', 0)
+    with pytest.raises(ValueError):
+        scan_value(b'"abc\\"', 0)
+
+
+def test_scan_notebooks():
+    for fn in glob.glob(os.path.join(filespath(), "*.ipynb")):
+        with io.open(fn, "rb") as f:
+            buf = f.read()
+        nb = json.loads(buf.decode("utf8"))
+        fields, cells = scan_notebook(buf)
+        assert sorted(fields) == sorted(nb)
+        assert [json.loads(buf[s:e].decode("utf8")) for s, e in cells] == nb.get("cells", [])
+
+
+def test_notebook_scan():
+    fn = os.path.join(filespath(), "multilevel-test-base.ipynb")
+    with io.open(fn, encoding="utf8") as f:
+        nb = json.load(f)
+    with NotebookScan(fn) as scan:
+        assert len(scan.cells) == len(nb["cells"])
+        assert scan.read_field("metadata") == nb["metadata"]
+        assert scan.read_field("missing") is None
+        assert scan.read_cells(1, 3) == nb["cells"][1:3]
+        assert scan.read_cells(-1) == nb["cells"][-1:]
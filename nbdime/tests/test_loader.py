@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+
+import copy
+import glob
+import io
+import itertools
+import json
+import os
+from base64 import encodebytes
+
+import pytest
+import nbformat
+from nbformat import v4
+
+from .fixtures import filespath
+
+from nbdime import diff_notebooks
+from nbdime.loader import (Blob, read_notebook, reads_notebook, json_default,
+                           write_json, write_notebook, save_notebook)
+
+
+def as_json(obj):
+    return json.loads(json.dumps(obj, default=json_default))
+
+
+def image_notebook(images):
+    "A notebook with a cell showing each image."
+    nb = v4.new_notebook()
+    for i, image in enumerate(images):
+        cell = v4.new_code_cell("show(%d)" % i, execution_count=i)
+        cell.outputs.append(v4.new_output(
+            "display_data", data={"image/png": image, "text/plain": "<image>"}))
+        nb.cells.append(cell)
+    return nb
+
+
+def test_reads_notebook_matches_nbformat():
+    for fn in glob.glob(os.path.join(filespath(), "*.ipynb")):
+        with io.open(fn, "rb") as f:
+            data = f.read()
+        expected = nbformat.reads(data.decode("utf8"), as_version=4)
+        for blob_size in (2**16, 8):
+            nb = reads_notebook(data, blob_size=blob_size)
+            assert as_json(nb) == as_json(expected)
+
+
+def test_blobs(tmpdir):
+    images = [encodebytes(os.urandom(1000)).decode("ascii") for i in range(3)]
+    fn = str(tmpdir.join("images.ipynb"))
+    nbformat.write(image_notebook(images + [images[0]]), fn)
+
+    nb = read_notebook(fn, blob_size=100)
+    data = [cell.outputs[0].data for cell in nb.cells]
+    assert all(isinstance(d["image/png"], Blob) for d in data)
+    # Small and text values are parsed
+    assert data[0]["text/plain"] == "<image>"
+    assert [d["image/png"].value() for d in data] == images + [images[0]]
+
+    # Compared by digest, and to other values by value
+    assert data[0]["image/png"] is not data[3]["image/png"]
+    assert data[0]["image/png"].digest == data[3]["image/png"].digest
+    assert data[0]["image/png"] == data[3]["image/png"]
+    assert data[0]["image/png"] != data[1]["image/png"]
+    assert data[0]["image/png"] == images[0]
+    assert images[1] == data[1]["image/png"]
+    assert copy.deepcopy(data[0])["image/png"] is data[0]["image/png"]
+
+
+def test_diff_blobs(tmpdir):
+    images = [encodebytes(os.urandom(1000)).decode("ascii") for i in range(3)]
+    afn = str(tmpdir.join("a.ipynb"))
+    bfn = str(tmpdir.join("b.ipynb"))
+    nbformat.write(image_notebook(images), afn)
+    nbformat.write(image_notebook([images[0], images[2], images[2]]), bfn)
+
+    expected = diff_notebooks(nbformat.read(afn, as_version=4),
+                              nbformat.read(bfn, as_version=4))
+    d = diff_notebooks(read_notebook(afn, blob_size=100),
+                       read_notebook(bfn, blob_size=100))
+    assert as_json(d) == as_json(expected)
+    assert d
+
+
+def test_validation():
+    nb = v4.new_notebook()
+    nb.cells.append(v4.new_code_cell("x = 1"))
+    del nb.cells[0]["outputs"]
+    data = json.dumps(nb).encode("utf8")
+    assert "outputs" not in reads_notebook(data).cells[0]
+    with pytest.raises(nbformat.ValidationError):
+        reads_notebook(data, validate=True)
+    reads_notebook(json.dumps(image_notebook(["abcd" * 100])).encode("utf8"),
+                   validate=True, blob_size=10)
+
+
+def test_write_notebook_matches_nbformat(tmpdir):
+    images = [encodebytes(os.urandom(1000)).decode("ascii") for i in range(3)]
+    fns = glob.glob(os.path.join(filespath(), "*.ipynb"))
+    fns.append(str(tmpdir.join("images.ipynb")))
+    nbformat.write(image_notebook(images), fns[-1])
+    for fn in fns:
+        expected = io.StringIO()
+        nbformat.write(nbformat.read(fn, as_version=4), expected)
+        nb = read_notebook(fn, blob_size=100)
+        text = io.StringIO()
+        write_notebook(nb, text)
+        assert text.getvalue() == expected.getvalue()
+        binary = io.BytesIO()
+        write_notebook(nb, binary)
+        assert binary.getvalue() == expected.getvalue().encode("utf8")
+
+
+def test_write_json_streams_blobs(tmpdir, monkeypatch):
+    image = encodebytes(os.urandom(1000)).decode("ascii")
+    fn = str(tmpdir.join("images.ipynb"))
+    nbformat.write(image_notebook([image]), fn)
+    nb = read_notebook(fn, blob_size=100)
+    value = {"before": [1, "two"], "image": nb.cells[0].outputs[0].data["image/png"]}
+
+    monkeypatch.setattr(Blob, "value", lambda self: pytest.fail("Blob decoded"))
+    out = io.BytesIO()
+    write_json(value, out, sort_keys=True)
+    assert json.loads(out.getvalue().decode("utf8")) == {
+        "before": [1, "two"], "image": image}
+
+
+def test_save_notebook_over_source(tmpdir):
+    images = [encodebytes(os.urandom(100000)).decode("ascii") for i in range(2)]
+    fn = str(tmpdir.join("images.ipynb"))
+    expected = image_notebook(images)
+    nbformat.write(expected, fn)
+    os.chmod(fn, 0o640)
+    nb = read_notebook(fn, blob_size=100)
+    nb.cells.reverse()
+    save_notebook(nb, fn)
+    expected.cells.reverse()
+    assert nbformat.read(fn, as_version=4) == expected
+    assert os.stat(fn).st_mode & 0o777 == 0o640
+    assert os.listdir(str(tmpdir)) == ["images.ipynb"]
+
+
+def test_write_json_generators():
+    def items(n):
+        for i in range(n):
+            yield {"i": i, "nested": (j for j in range(i)), "empty": (j for j in ())}
+
+    for kwargs in ({}, {"indent": 2, "separators": (",", ": ")}, {"indent": 1, "sort_keys": True}):
+        for n in range(3):
+            expected = json.dumps(
+                {"items": [{"i": i, "nested": list(range(i)), "empty": []} for i in range(n)]},
+                **kwargs)
+            out = io.StringIO()
+            write_json({"items": items(n)}, out, **kwargs)
+            assert out.getvalue() == expected
+
+
+def test_write_lazy_diff(tmpdir):
+    from nbdime.diffing.notebooks import lazy_diff_notebooks
+    images = [encodebytes(os.urandom(1000)).decode("ascii") for i in range(3)]
+    fns = [str(tmpdir.join("a.ipynb")), str(tmpdir.join("b.ipynb"))]
+    nbformat.write(image_notebook(images), fns[0])
+    nbformat.write(image_notebook(images[1:] + ["changed"]), fns[1])
+    a, b = [read_notebook(fn, blob_size=100) for fn in fns]
+
+    expected = json.dumps(diff_notebooks(a, b), indent=2, default=json_default)
+    out = io.BytesIO()
+    write_json(lazy_diff_notebooks(a, b), out, indent=2)
+    assert out.getvalue().decode("utf8") == expected
+
+
+def test_lazy_diff_without_consuming_cells():
+    from nbdime.diffing.notebooks import lazy_diff_notebooks
+    a = v4.new_notebook(cells=[v4.new_code_cell("x = %d" % i) for i in range(4)])
+    b = v4.new_notebook(cells=[v4.new_code_cell("x = %d" % i) for i in range(1, 5)],
+        metadata={"changed": True})
+    expected = diff_notebooks(a, b)
+    assert [e.key for e in expected] == ["cells", "metadata"]
+
+    # The cell diffs are left unconsumed
+    entries = list(itertools.islice(lazy_diff_notebooks(a, b), 5))
+    assert [e.key for e in entries] == ["cells", "metadata"]
+    assert entries[1] == expected[1]
+    assert list(entries[0].diff) == []
+
+
+def test_lazy_diff_of_plain_dicts():
+    from nbdime.diffing.notebooks import iter_diff_notebooks, lazy_diff_notebooks
+    fns = [os.path.join(filespath(), "multi_cell_nb%s.ipynb" % name)
+           for name in ("", "--local")]
+    a, b = [nbformat.read(fn, as_version=4) for fn in fns]
+    expected = diff_notebooks(a, b)
+    # Like the output of json.load, without attribute access
+    a, b = [json.loads(json.dumps(nb)) for nb in (a, b)]
+    assert diff_notebooks(a, b) == expected
+    assert [e for path, e in iter_diff_notebooks(a, b)] != []
+    out = io.StringIO()
+    write_json(lazy_diff_notebooks(a, b), out)
+    assert json.loads(out.getvalue()) == json.loads(json.dumps(expected))
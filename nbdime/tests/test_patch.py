@@ -92,3 +92,18 @@ def test_patch_dict():
     # Test !, item patch
     subdiff = [op_patch(0, [op_patch(0, [op_replace(0, "H")])]), op_patch(1, [op_patch(0, [op_remove(0), op_add(0, "W")])])]
     assert patch({"a": ["hello", "world"], "b": 3}, [op_patch("a", subdiff)]) == {"a": ["Hello", "World"], "b": 3}
+
+
+def test_patch_share():
+    obj = {"a": [{"x": 1}, {"y": 2}], "b": {"z": 3}}
+    d = [op_patch("a", [op_patch(1, [op_replace("y", 4)])])]
+
+    copied = patch(obj, d)
+    assert copied == {"a": [{"x": 1}, {"y": 4}], "b": {"z": 3}}
+    assert copied["b"] is not obj["b"]
+
+    shared = patch(obj, d, share=True)
+    assert shared == copied
+    assert shared["b"] is obj["b"]
+    assert shared["a"][0] is obj["a"][0]
+    assert obj == {"a": [{"x": 1}, {"y": 2}], "b": {"z": 3}}
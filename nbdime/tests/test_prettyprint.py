@@ -24,8 +24,14 @@ import hashlib
 
 from nbformat import v4
 
+import nbformat
+import pytest
+
 from nbdime import prettyprint as pp
 from nbdime.diffing import diff
+from nbdime.diffing.notebooks import diff_notebooks, iter_diff_notebooks
+
+from .fixtures import filespath
 
 
 def b64text(nbytes):
@@ -117,6 +123,58 @@ def test_format_value_str():
     assert pp.format_value("xyz") == "xyz"
 
 
+def test_format_value_snips_large_str():
+    text = "some text\n" * (pp.MAX_VALUE_SIZE // 10 + 100)
+    vstr = pp.format_value(text)
+    assert vstr.startswith("some text\nsome text\n")
+    assert len(vstr) < pp.MAX_VALUE_SIZE + 100
+    head, marker = vstr.rsplit("\n", 1)
+    assert head + "\n" == text[:len(head) + 1]
+    assert marker == "...<snip %d characters, md5=%s...>" % (
+        len(text) - len(head) - 1, pp.hash_string(text)[:16])
+
+
+def test_trim_base64_by_mimetype():
+    text = "not base64, but stored as an image " * 10
+    assert pp._trim_base64(text) == text
+    assert pp._trim_base64(text, "text/plain") == text
+    assert pp._trim_base64(text, "image/png") == (
+        "not base...<snip base64, md5=%s...>" % pp.hash_string(text)[:16])
+    assert pp._mimetype_from_path("/cells/0/outputs/1/data/image/png") == "image/png"
+    assert pp._mimetype_from_path("/cells/0/attachments/a.gif/image/gif") == "image/gif"
+    assert pp._mimetype_from_path("/cells/0/outputs/1/data") is None
+
+    # Printed values get the mimetype from the key or path
+    assert "<snip base64" in _pretty_print({"image/png": text}, path="/cells/0/outputs/0/data")
+    assert "<snip base64" in _pretty_print(text, path="/cells/0/outputs/0/data/image/png")
+    assert "<snip base64" not in _pretty_print(text, path="/cells/0/outputs/0/data/text/plain")
+
+
+def test_trim_base64_large():
+    data = b64text(100000)
+    assert "<snip base64" in pp._trim_base64(data)
+    text = "some text\n" * 10000
+    assert pp._trim_base64(text) == text
+    # Only the ends of large strings are checked
+    assert "<snip base64" in pp._trim_base64(data[:3000] + " " + data[3000:])
+
+
+def test_hash_string_memoized():
+    data = b64text(100000)
+    pp._digests.clear()
+    misses = pp._digests.misses
+    assert pp.hash_string(data) == hashlib.md5(data.encode("utf8")).hexdigest()
+    assert pp.hash_string(data) == pp.hash_string(data)
+    assert pp._digests.misses == misses + 1
+    # Equal strings are hashed again, without comparing them
+    assert pp.hash_string("".join(list(data))) == pp.hash_string(data)
+    assert pp._digests.misses == misses + 2
+    # Only a few strings are kept alive
+    for i in range(100):
+        pp.hash_string(b64text(2000))
+    assert len(pp._digests) <= 16
+
+
 def _pretty_print(value, prefix="+", path="/dummypath"):
     io = StringIO()
     pp.pretty_print_value_at(value, path, prefix, io)
@@ -146,6 +204,22 @@ def test_pretty_print_list():
     assert text == "+['a', 'b']\n"
 
 
+def test_pretty_print_list_large():
+    lis = list(range(10000))
+
+    def pformat_items(value):
+        # Too long for one line, so no need to format it all
+        assert not isinstance(value, list)
+        return pformat(value)
+
+    with mock.patch.object(pp.pprint, 'pformat', pformat_items):
+        text = _pretty_print(lis, "+")
+    lines = text.splitlines()
+    assert lines[:2] == ["+item[0]: 0", "+item[1]: 1"]
+    assert len(lines) == pp.MAX_LIST_ITEMS + 1
+    assert lines[-1] == "+...<snip %d items>" % (len(lis) - pp.MAX_LIST_ITEMS)
+
+
 def test_pretty_print_list_longstrings():
     lis = ['a\nb', 'c\nd']
     text = _pretty_print(lis, "+")
@@ -321,7 +395,8 @@ def test_pretty_print_string_diff(nocolor):
     path = '/a/b'
     di = diff(a, b, path=path)
 
-    with mock.patch('nbdime.prettyprint.which', lambda cmd: None):
+    with mock.patch.multiple(pp, which=lambda cmd: None, _tools={},
+                             use_builtin_diff=False):
         io = StringIO()
         pp.pretty_print_diff(a, di, path, io)
         text = io.getvalue()
@@ -352,3 +427,149 @@ def test_pretty_print_string_diff_b64(nocolor):
         '+  %s...<snip base64, md5=%s...>' % (b[:8], hb[:16]),
         '',
     ]
+
+
+def test_diff_render_in_process(nocolor):
+    a = "".join("line %d\n" % i for i in range(12))
+    b = a.replace("line 1\n", "line one\n").replace("line 10\n", "") + "new\n"
+    with mock.patch.object(pp, 'Popen', side_effect=AssertionError):
+        rendered = pp.diff_render(a, b, diff(a, b))
+    assert rendered == "\n".join([
+        "@@ -1,5 +1,5 @@",
+        " line 0",
+        "-line 1",
+        "+line one",
+        " line 2",
+        " line 3",
+        " line 4",
+        "@@ -8,5 +8,5 @@",
+        " line 7",
+        " line 8",
+        " line 9",
+        "-line 10",
+        " line 11",
+        "+new",
+        ""])
+    # The diff is computed when not given
+    assert pp.diff_render(a, b) == rendered
+    assert pp.diff_render("", "x\ny") == "@@ -0,0 +1,2 @@\n+x\n+y\n"
+    assert pp.diff_render("x\ny\n", "") == "@@ -1,2 +0,0 @@\n-x\n-y\n"
+
+
+def test_diff_render_in_process_words():
+    a = "def foe(x, y):\n    return x + y\nfoe(3, 2)"
+    b = "def foo(x, y):\n    return x + y\nfoo(1, 2)"
+    R, G, C, E = pp.RED, pp.GREEN, pp.CYAN, pp.RESET
+    assert pp.diff_render(a, b) == "".join([
+        C, "@@ -1,3 +1,3 @@", E, "\n",
+        "def ", R, "foe(x,", E, G, "foo(x,", E, " y):\n",
+        "    return x + y\n",
+        R, "foe(3,", E, G, "foo(1,", E, " 2)\n",
+        ])
+
+
+def test_diff_render_in_process_words_multiline():
+    # Changes that add or remove line breaks are shown as whole lines
+    a = "l = f(3, 7)\n\nprint(l)"
+    b = "l = f(3, 4)\nprint(l)"
+    R, G, C, E = pp.RED, pp.GREEN, pp.CYAN, pp.RESET
+    assert pp.diff_render(a, b) == "".join([
+        C, "@@ -1,3 +1,2 @@", E, "\n",
+        R, "-l = f(3, 7)", E, "\n",
+        R, "-", E, "\n",
+        G, "+l = f(3, 4)", E, "\n",
+        "print(l)\n",
+        ])
+    # Word changes on several lines keep the line breaks uncolored
+    a = "x = 1\ny = 2\n"
+    b = "x = 3\ny = 4\n"
+    assert pp.diff_render(a, b) == "".join([
+        C, "@@ -1,2 +1,2 @@", E, "\n",
+        "x = ", R, "1", E, G, "3", E, "\n",
+        "y = ", R, "2", E, G, "4", E, "\n",
+        ])
+
+
+@pytest.mark.skipif(not pp.which('git'), reason="Missing git.")
+def test_prerender_string_diffs_with_git(nocolor):
+    a = {"x": "a\nb\nc\n", "y": ["1\n2\n", "3\n"]}
+    b = {"x": "a\nc\n", "y": ["1\n2\n3\n", "4\n"]}
+    di = diff(a, b)
+    with mock.patch.object(pp, 'use_builtin_diff', False):
+        expected = StringIO()
+        pp.pretty_print_diff(a, di, "", expected)
+        io = StringIO()
+        with mock.patch.object(pp, 'Popen', wraps=pp.Popen) as popen:
+            pp.prerender_string_diffs(a, di)
+            pp.pretty_print_diff(a, di, "", io)
+    assert popen.call_count == 1
+    assert io.getvalue() == expected.getvalue()
+
+
+def _read_notebooks(*names):
+    return [nbformat.read(os.path.join(filespath(), name), as_version=4)
+            for name in names]
+
+
+def test_pretty_print_notebook_diff_entries(nocolor):
+    a, b = _read_notebooks('multilevel-test-base.ipynb',
+                           'multilevel-test-local.ipynb')
+    expected = StringIO()
+    pp.pretty_print_notebook_diff('a', 'b', a, diff_notebooks(a, b), expected)
+
+    out = StringIO()
+    pp.pretty_print_notebook_diff_entries('a', 'b', a, iter_diff_notebooks(a, b), out)
+    assert out.getvalue() == expected.getvalue()
+    assert out.getvalue().startswith('nbdiff a b\n')
+
+    out = StringIO()
+    pp.pretty_print_notebook_diff_entries('a', 'a', a, iter_diff_notebooks(a, a), out)
+    assert out.getvalue() == ''
+
+
+def test_pretty_print_notebook_diff_entries_streams(nocolor):
+    a, b = _read_notebooks('foo--1.ipynb', 'foo--2.ipynb')
+    stream = StringIO()
+    out = pp.BufferedWriter(stream)
+    printed = []
+
+    def entries():
+        for item in iter_diff_notebooks(a, b):
+            # Everything before this entry has been written to the stream
+            printed.append(stream.getvalue())
+            yield item
+
+    pp.pretty_print_notebook_diff_entries('a', 'b', a, entries(), out)
+    assert len(printed) == 2
+    assert printed[0] == ''
+    assert '## modified /cells/0/source:' in printed[1]
+    assert '/cells/1/source' not in printed[1]
+    assert '/cells/1/source' in stream.getvalue()
+
+
+class FakeTerminal(StringIO):
+    def isatty(self):
+        return True
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="Pagers are not used on Windows.")
+def test_terminal_output_pager(tmpdir, monkeypatch):
+    paged = str(tmpdir.join('paged'))
+    monkeypatch.setenv('NBDIME_PAGER', 'cat > "%s"' % paged)
+    stream = FakeTerminal()
+    with pp.terminal_output(stream) as out:
+        out.write('first\n')
+        out.flush()
+        out.write('second\n')
+    with open(paged) as f:
+        assert f.read() == 'first\nsecond\n'
+    assert stream.getvalue() == ''
+
+    # Not a terminal, write directly
+    stream = StringIO()
+    with pp.terminal_output(stream) as out:
+        out.write('text\n')
+    assert stream.getvalue() == 'text\n'
+
+    monkeypatch.setenv('NBDIME_PAGER', 'cat')
+    assert pp.pager_command(FakeTerminal()) is None
@@ -0,0 +1,729 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+from __future__ import unicode_literals
+
+import io
+import json
+import logging
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+import zlib
+
+import nbformat
+import pytest
+from tornado import gen, httpserver, iostream, web
+from tornado.testing import AsyncHTTPTestCase, bind_unused_port, gen_test
+
+from nbdime import patch, diff_notebooks
+from nbdime.cache import LRUCache, content_digest
+from nbdime.diff_format import (SequenceDiffBuilder, op_addrange,
+                                to_diffentry_dicts)
+from nbdime.executor import shared_executor
+from nbdime.webapp.blobs import BlobStore
+from nbdime.webapp.encoding import encode_payload, negotiate_encoding
+from nbdime.webapp.fetching import (NotebookFetcher, default_fetch_timeout,
+                                    default_fetch_max_size)
+from nbdime.webapp.nbdimeserver import make_app, precompute
+from nbdime.webapp.paging import PagedNotebookDiff
+from nbdime.webapp.saving import write_atomic
+from nbdime.webapp.session import ToolSession, listen
+from nbdime.webapp.sessionclient import connect, request, read_notebook
+
+from .fixtures import filespath, db
+
+
+class WebTestCase(AsyncHTTPTestCase):
+    # Server parameters, override in subclasses
+    params = {}
+
+    def get_app(self):
+        params = dict(cwd=filespath(), closable=False)
+        params.update(self.params)
+        return make_app(**params)
+
+    def tearDown(self):
+        if self._app.settings["executor"] is not shared_executor():
+            self._app.settings["executor"].shutdown()
+        super(WebTestCase, self).tearDown()
+
+    def post_json(self, url, body, **kwargs):
+        return self.fetch(url, method="POST", body=json.dumps(body), **kwargs)
+
+
+class TestApi(WebTestCase):
+
+    def test_diff(self):
+        r = self.post_json("/api/diff", dict(
+            base="src-and-output--1.ipynb",
+            remote="src-and-output--2.ipynb"))
+        assert r.code == 200
+        data = json.loads(r.body.decode("utf8"))
+        assert data["base"]["cells"]
+        assert data["diff"]
+
+    def test_merge(self):
+        r = self.post_json("/api/merge", dict(
+            base="multi_cell_nb.ipynb",
+            local="multi_cell_nb--local.ipynb",
+            remote="multi_cell_nb--remote.ipynb"))
+        assert r.code == 200
+        data = json.loads(r.body.decode("utf8"))
+        assert "merge_decisions" in data
+
+    def test_invalid_notebook(self):
+        r = self.post_json("/api/diff", dict(
+            base="multilevel-test-base-local-diff.json",
+            remote="src-and-output--2.ipynb"))
+        assert r.code == 400
+
+
+class TestBusyServer(WebTestCase):
+    params = dict(workers=1, max_queue=0)
+
+    def test_busy_server_responds_503(self):
+        gate = threading.Event()
+        executor = self._app.settings["executor"]
+        executor.submit(gate.wait)
+        try:
+            r = self.post_json("/api/diff", dict(
+                base="src-and-output--1.ipynb",
+                remote="src-and-output--2.ipynb"))
+            assert r.code == 503
+        finally:
+            gate.set()
+
+
+def test_app_shares_executor_without_limits():
+    app = make_app(cwd=filespath(), closable=False)
+    assert app.settings["executor"] is shared_executor()
+    app = make_app(cwd=filespath(), closable=False, workers=2)
+    executor = app.settings["executor"]
+    assert executor is not shared_executor()
+    assert executor.max_workers == 2
+    executor.shutdown()
+
+
+class TestTimeout(WebTestCase):
+    params = dict(workers=1, max_queue=1, request_timeout=0.1)
+
+    def test_timeout_responds_504(self):
+        gate = threading.Event()
+        executor = self._app.settings["executor"]
+        executor.submit(gate.wait)
+        try:
+            r = self.post_json("/api/diff", dict(
+                base="src-and-output--1.ipynb",
+                remote="src-and-output--2.ipynb"))
+            assert r.code == 504
+        finally:
+            gate.set()
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self, logging.ERROR)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestDisconnect(WebTestCase):
+    params = dict(workers=1, max_queue=1)
+
+    @gen.coroutine
+    def wait_for_pending(self, executor, pending):
+        for i in range(500):
+            if executor.pending == pending:
+                break
+            yield gen.sleep(0.01)
+        assert executor.pending == pending
+
+    @gen_test
+    def test_disconnect_drops_pending_computation(self):
+        gate = threading.Event()
+        executor = self._app.settings["executor"]
+        executor.submit(gate.wait)
+        errors = ListHandler()
+        logging.getLogger().addHandler(errors)
+        try:
+            stream = iostream.IOStream(socket.socket())
+            yield stream.connect(("127.0.0.1", self.get_http_port()))
+            body = json.dumps(dict(base="src-and-output--1.ipynb",
+                                   remote="src-and-output--2.ipynb"))
+            yield stream.write((
+                "POST /api/diff HTTP/1.1\r\nHost: localhost\r\n"
+                "Content-Length: %d\r\n\r\n%s" % (len(body), body)
+                ).encode("utf8"))
+            yield self.wait_for_pending(executor, 2)
+            stream.close()
+            # The queued computation is cancelled, freeing its slot
+            yield self.wait_for_pending(executor, 1)
+            yield gen.sleep(0.05)
+        finally:
+            gate.set()
+            logging.getLogger().removeHandler(errors)
+        assert errors.records == []
+        yield self.wait_for_pending(executor, 0)
+
+
+class TestCache(WebTestCase):
+
+    def test_cache_headers(self):
+        body = dict(base="src-and-output--1.ipynb",
+                    remote="src-and-output--2.ipynb")
+        r = self.post_json("/api/diff", body)
+        assert r.headers["X-Nbdime-Notebook-Cache"] == "miss, miss"
+        assert r.headers["X-Nbdime-Result-Cache"] == "miss"
+        first = json.loads(r.body.decode("utf8"))
+
+        r = self.post_json("/api/diff", body)
+        assert r.headers["X-Nbdime-Notebook-Cache"] == "hit, hit"
+        assert r.headers["X-Nbdime-Result-Cache"] == "hit"
+        assert json.loads(r.body.decode("utf8")) == first
+
+
+class TestDisabledCache(WebTestCase):
+    params = dict(notebook_cache_size=0, result_cache_size=0)
+
+    def test_disabled_cache(self):
+        body = dict(base="src-and-output--1.ipynb",
+                    remote="src-and-output--2.ipynb")
+        for i in range(2):
+            r = self.post_json("/api/diff", body)
+            assert r.code == 200
+            assert r.headers["X-Nbdime-Notebook-Cache"] == "miss, miss"
+            assert r.headers["X-Nbdime-Result-Cache"] == "miss"
+
+
+class RecordingFileHandler(web.StaticFileHandler):
+    "Serves notebook files, recording the status of each response."
+
+    statuses = []
+
+    def on_finish(self):
+        self.statuses.append(self.get_status())
+
+
+class TestRemoteNotebooks(WebTestCase):
+    def setUp(self):
+        super(TestRemoteNotebooks, self).setUp()
+        # Stand-in for a remote server hosting notebooks
+        RecordingFileHandler.statuses = []
+        sock, port = bind_unused_port()
+        self.remote_server = httpserver.HTTPServer(web.Application([
+            (r"/files/(.*)", RecordingFileHandler, {"path": filespath()}),
+            ]))
+        self.remote_server.add_sockets([sock])
+        self.remote_url = "http://127.0.0.1:%d/files/" % port
+
+    def tearDown(self):
+        self.remote_server.stop()
+        super(TestRemoteNotebooks, self).tearDown()
+
+    def test_merge_remote_notebooks(self):
+        body = dict(base=self.remote_url + "multi_cell_nb.ipynb",
+                    local=self.remote_url + "multi_cell_nb--local.ipynb",
+                    remote=self.remote_url + "multi_cell_nb--remote.ipynb")
+        r = self.post_json("/api/merge", body)
+        assert r.code == 200
+        assert sorted(RecordingFileHandler.statuses) == [200, 200, 200]
+        first = json.loads(r.body.decode("utf8"))
+
+        # Unchanged notebooks are revalidated, not transferred again
+        r = self.post_json("/api/merge", body)
+        assert r.code == 200
+        assert RecordingFileHandler.statuses[3:] == [304, 304, 304]
+        assert r.headers["X-Nbdime-Notebook-Cache"] == "hit, hit, hit"
+        assert json.loads(r.body.decode("utf8")) == first
+
+    def test_missing_remote_notebook(self):
+        r = self.post_json("/api/diff", dict(
+            base=self.remote_url + "no-such-notebook.ipynb",
+            remote="src-and-output--2.ipynb"))
+        assert r.code == 400
+
+    def test_remote_notebook_size_limit(self):
+        self._app.settings["fetcher"].max_size = 100
+        r = self.post_json("/api/diff", dict(
+            base=self.remote_url + "src-and-output--1.ipynb",
+            remote="src-and-output--2.ipynb"))
+        assert r.code == 400
+
+
+def test_fetcher_keeps_explicit_zero_limits():
+    fetcher = NotebookFetcher(timeout=0, max_size=0)
+    assert fetcher.timeout == 0
+    assert fetcher.max_size == 0
+    fetcher = NotebookFetcher()
+    assert fetcher.timeout == default_fetch_timeout
+    assert fetcher.max_size == default_fetch_max_size * 1024 * 1024
+
+
+def cells_diff_from_rows(rows, ncells):
+    "Reassemble a sequence diff of cells from paged diff rows."
+    di = SequenceDiffBuilder()
+    for item in rows:
+        i = item["base_index"]
+        if item["status"] == "removed":
+            di.removerange(i, 1)
+        elif item["status"] == "modified":
+            di.patch(i, to_diffentry_dicts(item["diff"]))
+    # Insertions go before the next base cell
+    key = ncells
+    for item in reversed(rows):
+        if item["base_index"] is not None:
+            key = item["base_index"]
+        if item["status"] == "added":
+            item["key"] = key
+    entries = list(di.validated())
+    for item in rows:
+        if item["status"] == "added":
+            entries.append(op_addrange(item["key"], [item["remote"]]))
+    return sorted(entries, key=lambda e: (e.key, e.op != "addrange"))
+
+
+@pytest.mark.parametrize("base, remote", [
+    ("src-and-output--1", "src-and-output--2"),
+    ("multi_cell_nb", "multi_cell_nb--cellchange"),
+    ("multilevel-test-base", "multilevel-test-local"),
+    ])
+def test_paged_diff_patches_to_remote(db, base, remote):
+    base_nb = db[base]
+    remote_nb = db[remote]
+    paged = PagedNotebookDiff(base_nb, remote_nb)
+    rows = json.loads(json.dumps(paged.cells(0, len(paged.rows))))
+    di = cells_diff_from_rows(rows, len(base_nb.cells))
+    assert patch(base_nb.cells, di) == remote_nb.cells
+
+
+def test_paged_diff_caches_cell_diffs(db):
+    base_nb = db["multilevel-test-base"]
+    remote_nb = db["multilevel-test-local"]
+    cache = LRUCache(10**6)
+    paged = PagedNotebookDiff(base_nb, remote_nb, cache=cache, key=("k",))
+    modified = [row for row, (status, i, j) in enumerate(paged.rows)
+                if status == "modified"]
+    assert modified
+    expected = [paged.cell_diff(row) for row in modified]
+    assert sorted(cache._entries) == [("k", row) for row in modified]
+    assert cache.size <= cache.max_size
+    assert [paged.cell_diff(row) for row in modified] == expected
+    assert cache.hits == len(modified)
+
+    # The diffs are recomputed when they do not fit
+    cache = LRUCache(1)
+    paged = PagedNotebookDiff(base_nb, remote_nb, cache=cache)
+    assert [paged.cell_diff(row) for row in modified] == expected
+    assert len(cache) == 0
+
+
+class TestPagedDiff(WebTestCase):
+
+    def test_summary_and_cells(self):
+        body = dict(base="multi_cell_nb.ipynb",
+                    remote="multi_cell_nb--cellchange.ipynb")
+        r = self.post_json("/api/diff/summary", body)
+        assert r.code == 200
+        summary = json.loads(r.body.decode("utf8"))
+        assert "cells" not in summary["base"]
+        statuses = [row["status"] for row in summary["cells"]]
+        assert "modified" in statuses
+        assert all(row["base_size"] > 0 for row in summary["cells"]
+                   if row["base_index"] is not None)
+
+        # Fetch a page of cells, reusing the cached alignment
+        body.update(start=1, stop=3)
+        r = self.post_json("/api/diff/cells", body)
+        assert r.code == 200
+        assert r.headers["X-Nbdime-Result-Cache"] == "hit"
+        cells = json.loads(r.body.decode("utf8"))["cells"]
+        assert [c["row"] for c in cells] == [1, 2]
+        for c, row in zip(cells, summary["cells"][1:3]):
+            assert c["status"] == row["status"]
+            assert ("diff" in c) == (c["status"] == "modified")
+
+    def test_cells_needs_range(self):
+        r = self.post_json("/api/diff/cells", dict(
+            base="multi_cell_nb.ipynb",
+            remote="multi_cell_nb--cellchange.ipynb",
+            start=0))
+        assert r.code == 400
+
+    def test_cells_needs_valid_range(self):
+        for start, stop in ((-2, 1), (2, 1), (-3, -1)):
+            r = self.post_json("/api/diff/cells", dict(
+                base="multi_cell_nb.ipynb",
+                remote="multi_cell_nb--cellchange.ipynb",
+                start=start, stop=stop))
+            assert r.code == 400
+
+
+def find_blob_refs(obj, found):
+    "Collect all blob references in obj."
+    if isinstance(obj, dict):
+        if "nbdime-blob" in obj:
+            found.append(obj)
+        for v in obj.values():
+            find_blob_refs(v, found)
+    elif isinstance(obj, list):
+        for v in obj:
+            find_blob_refs(v, found)
+    return found
+
+
+def test_blob_store_externalizes_mime_values():
+    store = BlobStore(threshold=0.01)  # ~10 characters
+    png = "iVBORw0KGgoAAAANSUhEUg" * 4
+    output = {"output_type": "display_data", "metadata": {},
+              "data": {"image/png": png, "text/plain": "<Figure>"}}
+    diff = [{"op": "replace", "key": "image/png", "value": png}]
+    obj = {"outputs": [output], "diff": diff}
+    ext = store.externalize(obj)
+
+    # Original is left untouched
+    assert output["data"]["image/png"] == png
+    assert diff[0]["value"] == png
+
+    refs = find_blob_refs(ext, [])
+    assert len(refs) == 2
+    assert refs[0] == refs[1] == {"nbdime-blob": refs[0]["nbdime-blob"],
+                                  "length": len(png)}
+    assert store.get(refs[0]["nbdime-blob"]) == png.encode("utf8")
+    assert ext["outputs"][0]["data"]["text/plain"] == "<Figure>"
+
+
+class TestBlobs(WebTestCase):
+    params = dict(blob_threshold=0.01)
+
+    def test_diff_with_blobs(self):
+        body = dict(base="attachment.ipynb",
+                    remote="attachment--change_attachment.ipynb")
+        plain = json.loads(self.post_json("/api/diff", body).body.decode("utf8"))
+        body["blobs"] = True
+        r = self.post_json("/api/diff", body)
+        assert r.code == 200
+        data = json.loads(r.body.decode("utf8"))
+        refs = find_blob_refs(data, [])
+        assert refs
+
+        # The plain response includes the values, look them up
+        values = set()
+        for cell in plain["base"]["cells"]:
+            for attachment in cell.get("attachments", {}).values():
+                values.update(attachment.values())
+
+        digest = refs[0]["nbdime-blob"]
+        r = self.fetch("/api/blob/" + digest)
+        assert r.code == 200
+        assert r.body.decode("utf8") in values
+        assert r.headers["Etag"] == '"%s"' % digest
+        assert "immutable" in r.headers["Cache-Control"]
+
+        r = self.fetch("/api/blob/" + digest,
+                       headers={"If-None-Match": '"%s"' % digest})
+        assert r.code == 304
+
+    def test_unknown_blob(self):
+        r = self.fetch("/api/blob/" + "0" * 64)
+        assert r.code == 404
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("deflate") == "deflate"
+    assert negotiate_encoding("gzip;q=0.5, deflate") == "deflate"
+    assert negotiate_encoding("gzip;q=0, deflate;q=0") is None
+    assert negotiate_encoding("*") in ("br", "gzip")
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "deflate", "br"])
+def test_encode_payload_roundtrip(encoding):
+    if encoding == "br":
+        brotli = pytest.importorskip("brotli")
+        decompress = brotli.decompress
+    else:
+        wbits = 16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS
+        decompress = lambda b: zlib.decompress(b, wbits)
+    data = {"diff": [{"op": "addrange", "key": i, "valuelist": ["x" * 100]}
+                     for i in range(100)]}
+    body, headers = encode_payload(data, encoding=encoding)
+    assert headers["Content-Encoding"] == encoding
+    assert json.loads(decompress(body).decode("utf8")) == data
+
+    # Small payloads are not compressed
+    body, headers = encode_payload({"a": 1}, encoding=encoding)
+    assert "Content-Encoding" not in headers
+    assert json.loads(body.decode("utf8")) == {"a": 1}
+
+
+class TestEncoding(WebTestCase):
+    body = dict(base="src-and-output--1.ipynb",
+                remote="src-and-output--2.ipynb")
+
+    def test_gzip_response(self):
+        plain = self.post_json("/api/diff", self.body, decompress_response=False,
+                               headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in plain.headers
+        r = self.post_json("/api/diff", self.body, decompress_response=False,
+                           headers={"Accept-Encoding": "gzip"})
+        assert r.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in r.headers["Vary"]
+        assert len(r.body) < len(plain.body)
+        data = zlib.decompress(r.body, 16 + zlib.MAX_WBITS)
+        assert json.loads(data.decode("utf8")) == json.loads(plain.body.decode("utf8"))
+
+    def test_msgpack_response(self):
+        msgpack = pytest.importorskip("msgpack")
+        plain = self.post_json("/api/diff", self.body)
+        r = self.post_json("/api/diff", self.body,
+                           headers={"Accept": "application/msgpack"})
+        assert r.headers["Content-Type"] == "application/msgpack"
+        data = msgpack.unpackb(r.body, raw=False)
+        assert data == json.loads(plain.body.decode("utf8"))
+
+
+def test_write_atomic_preserves_mode(tmpdir):
+    path = str(tmpdir.join("merged.ipynb"))
+    write_atomic(path, b"first")
+    os.chmod(path, 0o640)
+    write_atomic(path, b"second")
+    with io.open(path, "rb") as f:
+        assert f.read() == b"second"
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert os.listdir(str(tmpdir)) == ["merged.ipynb"]
+
+
+class TestMergeStore(WebTestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.outputfilename = os.path.join(self.tmpdir, "merged.ipynb")
+        self.params = dict(outputfilename=self.outputfilename)
+        super(TestMergeStore, self).setUp()
+
+    def tearDown(self):
+        super(TestMergeStore, self).tearDown()
+        shutil.rmtree(self.tmpdir)
+
+    def load(self, name):
+        return nbformat.read(filespath() + "/" + name, as_version=4)
+
+    def stored(self):
+        with io.open(self.outputfilename, "rb") as f:
+            data = f.read()
+        return nbformat.reads(data.decode("utf8"), as_version=4), content_digest(data)
+
+    def store(self, body):
+        r = self.post_json("/api/store", body)
+        assert r.code == 200, r.body
+        return json.loads(r.body.decode("utf8"))["digest"]
+
+    def test_store_full_notebook(self):
+        local = self.load("multi_cell_nb--local.ipynb")
+        digest = self.store(dict(merged=local))
+        nb, stored_digest = self.stored()
+        assert nb == local
+        assert digest == stored_digest
+
+    def test_store_diff_against_base(self):
+        base = self.load("multi_cell_nb.ipynb")
+        local = self.load("multi_cell_nb--local.ipynb")
+        self.store(dict(base="multi_cell_nb.ipynb",
+                        diff=diff_notebooks(base, local)))
+        assert self.stored()[0] == local
+
+    def test_store_diff_against_parent(self):
+        local = self.load("multi_cell_nb--local.ipynb")
+        remote = self.load("multi_cell_nb--remote.ipynb")
+        first = self.store(dict(merged=local))
+        second = self.store(dict(parent=first, diff=diff_notebooks(local, remote)))
+        nb, digest = self.stored()
+        assert nb == remote
+        assert digest == second
+
+        # Diffs against a notebook that has since been replaced are refused
+        r = self.post_json("/api/store", dict(parent=first, diff=[]))
+        assert r.code == 409
+        assert self.stored()[0] == remote
+
+    def test_store_invalid_diff(self):
+        r = self.post_json("/api/store", dict(
+            base="multi_cell_nb.ipynb", diff=[{"op": "bogus", "key": "cells"}]))
+        assert r.code == 400
+        assert not os.path.exists(self.outputfilename)
+
+
+class TestPrecompute(WebTestCase):
+    params = dict(difftool_args=dict(base="src-and-output--1.ipynb",
+                                     remote="src-and-output--2.ipynb"))
+
+    def test_precomputed_diff(self):
+        future = precompute(self._app, cwd=filespath(), **self.params)
+        future.result()
+        r = self.post_json("/api/diff", self.params["difftool_args"])
+        assert r.code == 200
+        assert r.headers["X-Nbdime-Notebook-Cache"] == "hit, hit"
+        assert r.headers["X-Nbdime-Result-Cache"] == "hit"
+
+    def test_nothing_to_precompute(self):
+        assert precompute(self._app, cwd=filespath()) is None
+
+
+def read_bytes(name):
+    with io.open(filespath() + "/" + name, "rb") as f:
+        return f.read()
+
+
+class TestDiffSession(WebTestCase):
+
+    def get_app(self):
+        self.session = ToolSession("diff")
+        self.params = dict(session=self.session)
+        return super(TestDiffSession, self).get_app()
+
+    def add_file(self):
+        return self.session.add("foo.ipynb", {
+            "base": read_bytes("src-and-output--1.ipynb"),
+            "remote": read_bytes("src-and-output--2.ipynb")})
+
+    def test_session_page(self):
+        f = self.add_file()
+        assert f.resolved.result() == 0
+        r = self.fetch("/difftool?file=0")
+        assert r.code == 200
+        page = r.body.decode("utf8")
+        assert "File 1: foo.ipynb" in page
+        assert f.reference("remote") in page
+
+    def test_diff_of_session_file(self):
+        f = self.add_file()
+        r = self.post_json("/api/diff", f.arguments())
+        assert r.code == 200
+        assert json.loads(r.body.decode("utf8"))["diff"]
+        # Computed in the background as soon as the file was added
+        assert r.headers["X-Nbdime-Result-Cache"] in ("hit", "wait")
+
+    def test_diff_of_added_session_file(self):
+        f = self.session.add("added.ipynb", {
+            "base": b"",
+            "remote": read_bytes("src-and-output--2.ipynb")})
+        r = self.post_json("/api/diff", f.arguments())
+        assert r.code == 200
+        data = json.loads(r.body.decode("utf8"))
+        assert data["base"]["cells"] == []
+        remote = nbformat.reads(f.notebooks["remote"].decode("utf8"),
+                                as_version=4)
+        diff = to_diffentry_dicts(data["diff"])
+        assert patch(data["base"], diff)["cells"] == remote["cells"]
+
+    @gen_test
+    def test_page_waits_for_file(self):
+        response = self.http_client.fetch(self.get_url("/difftool?file=0"))
+        yield gen.sleep(0.01)
+        assert not response.done()
+        self.add_file()
+        r = yield response
+        assert r.code == 200
+
+
+class TestMergeSession(WebTestCase):
+
+    def get_app(self):
+        self.session = ToolSession("merge")
+        self.params = dict(session=self.session)
+        return super(TestMergeSession, self).get_app()
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        super(TestMergeSession, self).setUp()
+
+    def tearDown(self):
+        super(TestMergeSession, self).tearDown()
+        shutil.rmtree(self.tmpdir)
+
+    def test_store_and_resolve(self):
+        output = os.path.join(self.tmpdir, "merged.ipynb")
+        f = self.session.add("merged.ipynb", {
+            "base": read_bytes("multi_cell_nb.ipynb"),
+            "local": read_bytes("multi_cell_nb--local.ipynb"),
+            "remote": read_bytes("multi_cell_nb--remote.ipynb")},
+            output=output)
+        assert not f.resolved.done()
+
+        r = self.fetch("/mergetool?file=0")
+        assert r.code == 200
+        assert "Mark resolved" in r.body.decode("utf8")
+
+        r = self.post_json("/api/merge", f.arguments())
+        assert r.code == 200
+
+        local = nbformat.reads(f.notebooks["local"].decode("utf8"), as_version=4)
+        r = self.post_json("/api/store", dict(merged=local))
+        assert r.code == 200
+        assert nbformat.read(output, as_version=4) == local
+
+        r = self.post_json("/api/session/resolve", {"file": 0, "exit_code": 0})
+        assert r.code == 200
+        assert f.resolved.result() == 0
+        # Nothing left to save to
+        r = self.post_json("/api/store", dict(merged=local))
+        assert r.code == 400
+
+
+class TestSessionSocket(AsyncHTTPTestCase):
+
+    def get_app(self):
+        return web.Application()
+
+    def setUp(self):
+        super(TestSessionSocket, self).setUp()
+        self.session = ToolSession("diff")
+        self.server, self.info = listen(self.session, "secret")
+
+    def tearDown(self):
+        self.server.stop()
+        if "unix" in self.info:
+            shutil.rmtree(os.path.dirname(self.info["unix"]))
+        super(TestSessionSocket, self).tearDown()
+
+    def send(self, message):
+        return self.io_loop.run_in_executor(
+            None, lambda: request(connect(self.info, timeout=5), message))
+
+    @gen_test
+    def test_submit_diff(self):
+        notebooks = {
+            "base": read_bytes("foo--1.ipynb").decode("utf8"),
+            "remote": read_bytes("foo--2.ipynb").decode("utf8")}
+        reply = yield self.send(dict(token="secret", kind="diff",
+                                     name="foo.ipynb", notebooks=notebooks))
+        assert reply == {"index": 0, "exit_code": 0}
+        assert self.session.files[0].name == "foo.ipynb"
+        assert self.session.lookup("nbdime-session/0/base") == notebooks["base"].encode("utf8")
+
+    @gen_test
+    def test_submit_added_notebook(self):
+        notebooks = {
+            "base": read_notebook(os.devnull),
+            "remote": read_bytes("foo--2.ipynb").decode("utf8")}
+        reply = yield self.send(dict(token="secret", kind="diff",
+                                     name="foo.ipynb", notebooks=notebooks))
+        assert reply == {"index": 0, "exit_code": 0}
+        base = self.session.lookup("nbdime-session/0/base")
+        assert nbformat.reads(base.decode("utf8"), as_version=4).cells == []
+
+    @gen_test
+    def test_invalid_token(self):
+        reply = yield self.send(dict(token="wrong", kind="diff", notebooks={}))
+        assert "error" in reply
+        assert not self.session.files
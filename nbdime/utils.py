@@ -82,6 +82,12 @@ class Strategies(dict):
         return super(Strategies, self).get(key, d)
 
 
+def is_binary_mimetype(mimetype):
+    "Check if data of mimetype is stored base64 encoded in notebooks."
+    return ((mimetype.startswith("image/") and mimetype != "image/svg+xml")
+            or mimetype in ("application/pdf", "application/octet-stream"))
+
+
 def is_in_repo(pkg_path):
     """Get whether `pkg_path` is a repository, or is part of one
 
@@ -0,0 +1,114 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Out-of-band transfer of large output values in web API responses.
+
+Large values in mime bundles (output data and attachments) are replaced
+in API responses by references on the form
+
+    {"nbdime-blob": <digest>, "length": <number of characters>}
+
+and the values themselves are served separately by digest, so that the
+client can fetch them when needed and cache them indefinitely. Equal
+values share a digest, so a value that appears in several notebooks is
+only transferred once.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+
+from six import string_types
+
+from ..cache import LRUCache
+
+
+__all__ = ["BlobStore", "blob_digest"]
+
+
+# Defaults for out-of-band transfer
+default_blob_threshold = 64  # kilobytes
+default_blob_store_size = 256  # megabytes
+
+
+def blob_digest(data):
+    "Compute the digest identifying a blob."
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_mimetype(key):
+    return isinstance(key, string_types) and "/" in key
+
+
+class BlobStore(object):
+    """Keeps large output values for out-of-band transfer.
+
+    Values of at least `threshold` characters are moved to the store by
+    externalize. The store holds at most `max_size` bytes, evicting the
+    least recently used blobs.
+    """
+
+    def __init__(self, threshold=None, max_size=None):
+        if threshold is None:
+            threshold = default_blob_threshold
+        if max_size is None:
+            max_size = default_blob_store_size
+        self.threshold = int(threshold * 1024)
+        self.blobs = LRUCache(int(max_size * 1024 * 1024))
+
+    def add(self, value):
+        "Store a string value, returning its digest."
+        data = value.encode("utf8")
+        digest = blob_digest(data)
+        # Refresh the entry even if present, it is in use again
+        self.blobs.put(digest, data, size=len(data))
+        return digest
+
+    def get(self, digest):
+        "Get the utf8 encoded value stored under digest, or None."
+        return self.blobs.get(digest)
+
+    def reference(self, value):
+        "Store value and return a reference to it."
+        return {"nbdime-blob": self.add(value), "length": len(value)}
+
+    def _is_large(self, value):
+        return isinstance(value, string_types) and len(value) >= self.threshold
+
+    def externalize(self, obj):
+        """Replace large mime bundle values in obj by blob references.
+
+        Handles notebooks, diffs, merge decisions and any structure
+        built from those. Returns a new object where needed, leaving
+        obj itself unmodified, so it is safe to use on shared objects.
+        """
+        if isinstance(obj, dict):
+            newobj = None
+            # A diff entry adding or replacing a mime bundle value
+            if ("op" in obj and is_mimetype(obj.get("key")) and
+                    self._is_large(obj.get("value"))):
+                newobj = dict(obj)
+                newobj["value"] = self.reference(obj["value"])
+            for k, v in obj.items():
+                if is_mimetype(k) and self._is_large(v):
+                    newv = self.reference(v)
+                else:
+                    newv = self.externalize(v)
+                if newv is not v:
+                    if newobj is None:
+                        newobj = dict(obj)
+                    newobj[k] = newv
+            return obj if newobj is None else newobj
+        elif isinstance(obj, (list, tuple)):
+            newobj = None
+            for i, v in enumerate(obj):
+                newv = self.externalize(v)
+                if newv is not v:
+                    if newobj is None:
+                        newobj = list(obj)
+                    newobj[i] = newv
+            return obj if newobj is None else newobj
+        else:
+            return obj
@@ -0,0 +1,125 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Negotiated encoding and compression of web API responses.
+
+Responses are JSON by default, or MessagePack for clients that accept
+"application/msgpack" when the msgpack package is installed. The
+encoded payload is compressed with brotli (when the brotli package is
+installed), gzip or deflate, as accepted by the client.
+
+Encoding is done by the executor thread computing the response, so
+large payloads are never encoded or compressed on the IOLoop.
+"""
+
+from __future__ import unicode_literals
+
+import json
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+__all__ = ["negotiate_encoding", "negotiate_format", "encode_payload"]
+
+
+# Payloads smaller than this are not worth compressing
+default_compress_threshold = 1024  # bytes
+
+# Compression levels, trading size for speed. Brotli's default quality
+# of 11 is meant for static content and is far too slow here.
+compression_level = 6
+brotli_quality = 5
+
+
+def _parse_accept(header):
+    """Parse an Accept or Accept-Encoding header.
+
+    Returns a dict mapping each value to its quality.
+    """
+    accepted = {}
+    for part in (header or "").split(","):
+        fields = part.strip().split(";")
+        value = fields[0].strip().lower()
+        if not value:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            name, _, qvalue = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(qvalue)
+                except ValueError:
+                    q = 0.0
+        accepted[value] = q
+    return accepted
+
+
+def available_encodings():
+    "Content encodings supported, in order of preference."
+    encodings = ["gzip", "deflate"]
+    if brotli is not None:
+        encodings.insert(0, "br")
+    return encodings
+
+
+def negotiate_encoding(accept_encoding):
+    "Pick a content encoding given an Accept-Encoding header, or None."
+    accepted = _parse_accept(accept_encoding)
+    best = None
+    for encoding in available_encodings():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (encoding, q)
+    return best[0] if best else None
+
+
+def negotiate_format(accept):
+    "Pick 'msgpack' or 'json' as payload format given an Accept header."
+    if msgpack is not None:
+        accepted = _parse_accept(accept)
+        if accepted.get("application/msgpack", 0.0) > 0:
+            return "msgpack"
+    return "json"
+
+
+def compress(data, encoding):
+    "Compress bytes with the given content encoding."
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    elif encoding == "gzip":
+        c = zlib.compressobj(compression_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return c.compress(data) + c.flush()
+    elif encoding == "deflate":
+        return zlib.compress(data, compression_level)
+    else:
+        raise ValueError("Unknown content encoding %r." % (encoding,))
+
+
+def encode_payload(data, fmt="json", encoding=None,
+                   compress_threshold=default_compress_threshold):
+    """Encode response data, returning (body, headers).
+
+    `fmt` is 'json' or 'msgpack', and `encoding` a content encoding or
+    None, as returned by negotiate_format and negotiate_encoding.
+    """
+    if fmt == "msgpack":
+        body = msgpack.packb(data, use_bin_type=True)
+        headers = {"Content-Type": "application/msgpack"}
+    else:
+        body = json.dumps(data, separators=(",", ":")).encode("utf8")
+        headers = {"Content-Type": "application/json; charset=UTF-8"}
+    if encoding is not None and len(body) >= compress_threshold:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return body, headers
@@ -0,0 +1,124 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Asynchronous fetching of notebooks given to the server as URLs."""
+
+from __future__ import unicode_literals
+
+from tornado import gen, httpclient
+
+from ..cache import LRUCache
+
+try:
+    import pycurl
+except ImportError:
+    pycurl = None
+
+
+__all__ = ["NotebookFetcher", "FetchError"]
+
+
+# Default limits for fetching remote notebooks
+default_fetch_timeout = 30
+default_fetch_max_size = 512  # megabytes
+default_fetch_cache_size = 128  # megabytes
+
+
+class FetchError(Exception):
+    """Raised when a remote notebook cannot be fetched."""
+    pass
+
+
+class NotebookFetcher(object):
+    """Fetches notebook URLs with a shared HTTP client.
+
+    The HTTP client is shared by all requests to the server, limiting the
+    number of simultaneous connections to `max_clients`. When pycurl is
+    installed, the curl based client is used so that connections are kept
+    alive and reused between fetches.
+
+    Fetched contents are kept in a cache together with their ETag and
+    Last-Modified validators, and later fetches of the same URL are made
+    conditional so that unchanged notebooks are not transferred again.
+    """
+
+    def __init__(self, timeout=None, max_size=None, cache_size=None,
+                 max_clients=10):
+        if timeout is None:
+            timeout = default_fetch_timeout
+        if max_size is None:
+            max_size = default_fetch_max_size
+        self.timeout = timeout
+        self.max_size = int(max_size * 1024 * 1024)
+        if cache_size is None:
+            cache_size = default_fetch_cache_size
+        self.cache = LRUCache(int(cache_size * 1024 * 1024))
+        self.max_clients = max_clients
+        self._client = None
+
+    @property
+    def client(self):
+        # Created on first use, to bind to the running IOLoop
+        if self._client is None:
+            if pycurl is not None:
+                from tornado.curl_httpclient import CurlAsyncHTTPClient
+                impl = CurlAsyncHTTPClient
+            else:
+                impl = httpclient.AsyncHTTPClient
+            self._client = impl(force_instance=True,
+                                max_clients=self.max_clients)
+        return self._client
+
+    @gen.coroutine
+    def fetch(self, url):
+        """Fetch the contents of url as bytes.
+
+        Returns a tuple (data, hit) where `hit` tells whether the cached
+        contents were reused after a conditional request.
+        """
+        headers = {}
+        cached = self.cache.get(url)
+        if cached is not None:
+            data, etag, last_modified = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        chunks = []
+        received = [0]
+
+        def collect(chunk):
+            received[0] += len(chunk)
+            if received[0] > self.max_size:
+                raise FetchError("Remote notebook exceeds size limit.")
+            chunks.append(chunk)
+
+        try:
+            response = yield self.client.fetch(
+                url, headers=headers,
+                connect_timeout=self.timeout,
+                request_timeout=self.timeout,
+                streaming_callback=collect)
+        except httpclient.HTTPError as e:
+            if e.code == 304 and cached is not None:
+                raise gen.Return((cached[0], True))
+            if received[0] > self.max_size:
+                raise FetchError("Remote notebook exceeds size limit.")
+            raise FetchError("Failed to fetch %s: %s" % (url, e))
+        except FetchError:
+            raise
+        except Exception as e:
+            # Connection errors and the like
+            if received[0] > self.max_size:
+                raise FetchError("Remote notebook exceeds size limit.")
+            raise FetchError("Failed to fetch %s: %s" % (url, e))
+
+        data = b"".join(chunks)
+        etag = response.headers.get("Etag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.cache.put(url, (data, etag, last_modified), size=len(data))
+        raise gen.Return((data, False))
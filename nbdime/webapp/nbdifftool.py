@@ -11,8 +11,10 @@ import logging
 import threading
 
 from ..args import add_generic_args, add_diff_args
-from ..args import add_web_args, add_filename_args
+from ..args import add_web_args, add_filename_args, args_for_server
+from ..args import diff_config_from_args
 from .nbdimeserver import main_server as run_server
+from ..config import set_default_config
 import nbdime.log
 
 
@@ -55,8 +57,11 @@ def browse(port, browsername):
 def main(args=None):
     if args is None:
         args = sys.argv[1:]
-    arguments = build_arg_parser().parse_args(args)
+    parser = build_arg_parser()
+    arguments = parser.parse_args(args)
     nbdime.log.init_logging(level=arguments.log_level)
+    # The server diffs with the default config
+    set_default_config(diff_config_from_args(arguments, parser))
     port = arguments.port
     cwd = arguments.workdirectory
     base = arguments.base
@@ -66,7 +71,8 @@ def main(args=None):
         port=port, cwd=cwd,
         closable=True,
         difftool_args=dict(base=base, remote=remote),
-        on_port=lambda port: browse(port, browsername))
+        on_port=lambda port: browse(port, browsername),
+        **args_for_server(arguments))
 
 
 if __name__ == "__main__":
@@ -13,6 +13,8 @@ from tornado.httputil import url_concat
 
 from .nbdimeserver import main_server as run_server
 from ..args import add_generic_args, add_web_args, add_diff_args, add_filename_args
+from ..args import args_for_server, diff_config_from_args
+from ..config import set_default_config
 import nbdime.log
 
 
@@ -54,8 +56,11 @@ def browse(port, base, remote, browsername):
 def main(args=None):
     if args is None:
         args = sys.argv[1:]
-    arguments = build_arg_parser().parse_args(args)
+    parser = build_arg_parser()
+    arguments = parser.parse_args(args)
     nbdime.log.init_logging(level=arguments.log_level)
+    # The server diffs with the default config
+    set_default_config(diff_config_from_args(arguments, parser))
     port = arguments.port
     cwd = arguments.workdirectory
     base = arguments.base
@@ -64,7 +69,8 @@ def main(args=None):
     return run_server(
         port=port, cwd=cwd,
         closable=True,
-        on_port=lambda port: browse(port, base, remote, browsername))
+        on_port=lambda port: browse(port, base, remote, browsername),
+        **args_for_server(arguments))
 
 
 if __name__ == "__main__":
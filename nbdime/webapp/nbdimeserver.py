@@ -4,23 +4,34 @@
 from __future__ import print_function
 from __future__ import unicode_literals
 
-import io
 import json
 import logging
 import os
 import sys
 from argparse import ArgumentParser
+import concurrent.futures
+from datetime import timedelta
 
-import requests
 from six import string_types
-from tornado import ioloop, web, escape, netutil, httpserver
+from tornado import ioloop, web, escape, netutil, httpserver, gen
 import nbformat
 
 import nbdime
+from nbdime.cache import LRUCache, NotebookCache
+from nbdime.diff_format import to_diffentry_dicts
+from nbdime.executor import (BoundedExecutor, QueueFull, shared_executor,
+                             set_shared_executor)
+from nbdime.interning import intern_notebook_copies
 from nbdime.merging.notebooks import decide_notebook_merge
 from nbdime.nbmergeapp import _build_arg_parser as build_merge_parser
+from nbdime.webapp.blobs import BlobStore
+from nbdime.webapp.encoding import (encode_payload, negotiate_encoding,
+                                    negotiate_format)
+from nbdime.webapp.fetching import NotebookFetcher, FetchError
+from nbdime.webapp.paging import PagedNotebookDiff
+from nbdime.webapp.saving import MergeStore, StaleParentError
 
-from nbdime.args import add_generic_args, add_web_args
+from nbdime.args import add_generic_args, add_web_args, args_for_server
 
 
 # TODO: See <notebook>/notebook/services/contents/handlers.py for possibly useful utilities:
@@ -32,6 +43,16 @@ from nbdime.args import add_generic_args, add_web_args
 
 _logger = logging.getLogger(__name__)
 
+# Raised by cancelled computations, by the executor's futures and by
+# the asyncio futures tornado wraps them in, which are different
+# classes before Python 3.8
+try:
+    import asyncio
+    _cancelled_errors = (concurrent.futures.CancelledError,
+                         asyncio.CancelledError)
+except ImportError:  # Python 2
+    _cancelled_errors = (concurrent.futures.CancelledError,)
+
 
 here = os.path.abspath(os.path.dirname(__file__))
 static_path = os.path.join(here, "static")
@@ -50,41 +71,220 @@ class NbdimeApiHandler(web.RequestHandler):
     def initialize(self, **params):
         self.params = params
         self.base_url = params.get("base_url", "")
+        self._pending = []
+        self.cache_status = []
+        self.result_cache_status = None
+        self._fetched = {}
+        self._body = None
+
+    def on_connection_close(self):
+        # The client is gone, drop any computation that has not started yet
+        for future in self._pending:
+            future.cancel()
+
+    @gen.coroutine
+    def run_in_executor(self, fn, *args):
+        """Run fn(*args) in the shared executor, off the IOLoop.
+
+        Raises HTTP 503 if the server is too busy to accept more work,
+        and HTTP 504 if the computation exceeds the request timeout.
+        """
+        executor = self.settings["executor"]
+        try:
+            future = executor.submit(fn, *args)
+        except QueueFull:
+            raise web.HTTPError(503, "Server is busy, try again later.")
+        self._pending.append(future)
+        timeout = self.settings.get("request_timeout")
+        try:
+            if timeout:
+                result = yield gen.with_timeout(
+                    timedelta(seconds=timeout), future,
+                    quiet_exceptions=(Exception,))
+            else:
+                result = yield future
+        except gen.TimeoutError:
+            future.cancel()
+            raise web.HTTPError(504, "Computation timed out.")
+        finally:
+            self._pending.remove(future)
+        raise gen.Return(result)
 
     def base_args(self):
-        fn = self.params.get("outputfilename", None)
+        fn = self.get_output_filename()
         return {
             "closable": self.params["closable"],
             "savable": fn is not None
         }
 
-    def get_notebook_argument(self, argname):
+    @property
+    def body(self):
+        "The JSON request body."
+        if self._body is None:
+            self._body = json.loads(escape.to_unicode(self.request.body))
+        return self._body
+
+    def get_argument_filename(self, argname):
+        "Get the filename or URL given as argument `argname` in the request body."
         # Assuming a request on the form "{'argname':arg}"
-        body = json.loads(escape.to_unicode(self.request.body))
-        arg = body[argname]
+        arg = self.body[argname]
 
         # Currently assuming arg is a filename relative to
-        # where the server was started from, later we may
-        # want to accept urls or full notebooks as well.
+        # where the server was started from, or a URL.
         if not isinstance(arg, string_types):
             raise web.HTTPError(400, "Expecting a filename.")
+        return arg
+
+    @gen.coroutine
+    def fetch_remote_arguments(self, argnames):
+        """Fetch all notebook arguments that are URLs rather than files.
+
+        The URLs are fetched concurrently, without blocking the IOLoop.
+        The fetched contents are parsed later by get_notebook_argument.
+        Notebooks of a tool session are looked up in the session.
+        """
+        session = self.settings["session"]
+        urls = {}
+        for argname in argnames:
+            arg = self.get_argument_filename(argname)
+            data = session.lookup(arg) if session is not None else None
+            if data is not None:
+                # A notebook received from git in a tool session
+                self._fetched[argname] = data
+            elif not os.path.exists(os.path.join(self.params["cwd"], arg)):
+                urls[argname] = arg
+        if not urls:
+            return
+        fetcher = self.settings["fetcher"]
+        names = sorted(urls)
+        try:
+            results = yield [fetcher.fetch(urls[name]) for name in names]
+        except FetchError as e:
+            raise web.HTTPError(400, str(e))
+        for name, (data, hit) in zip(names, results):
+            self._fetched[name] = data
+
+    def get_notebook_argument(self, argname):
+        """Read the notebook named by argument `argname` of the request body.
 
-        # Check that file exists
-        path = os.path.join(self.params["cwd"], arg)
-        if not os.path.exists(path):
-            # Assume file is URI
-            r = requests.get(arg)
+        Returns a tuple (notebook, digest), where digest identifies the
+        notebook contents. Notebooks are served from the notebook cache
+        when possible, and the cache status is recorded for the response.
+
+        URL arguments must have been fetched by fetch_remote_arguments.
+        """
+        arg = self.get_argument_filename(argname)
 
         # Let nbformat do the reading and validation
+        cache = self.settings["notebook_cache"]
         try:
-            if os.path.exists(path):
-                nb = nbformat.read(path, as_version=4)
+            if argname in self._fetched:
+                nb, digest, hit = cache.reads(self._fetched[argname])
             else:
-                nb = nbformat.reads(r.text, as_version=4)
+                path = os.path.join(self.params["cwd"], arg)
+                nb, digest, hit = cache.read(path)
         except:
             raise web.HTTPError(400, "Invalid notebook: %s" % truncate_filename(arg))
 
-        return nb
+        self.cache_status.append("hit" if hit else "miss")
+        return nb, digest
+
+    def get_cached_result(self, key, compute, size=None):
+        """Get a result from the result cache, or compute and store it.
+
+        Results are keyed on the digests of the notebooks they
+        were computed from. The size of results is estimated by
+        `size(result)`, or by the size of their JSON representation.
+        """
+        cache = self.settings["result_cache"]
+        result, self.result_cache_status = cache.get_or_compute(
+            key, compute, size=size or _json_size)
+        return result
+
+    def compute_payload(self, compute):
+        """Compute the response data with compute, and encode it.
+
+        If the client asks for it with the request argument "blobs",
+        large output values are moved out of the response, to be
+        fetched separately from /api/blob.
+
+        Returns a tuple (body, headers) with the encoded response body,
+        in the format and content encoding accepted by the client.
+        """
+        data = compute()
+        if self.body.get("blobs"):
+            data = self.settings["blob_store"].externalize(data)
+        headers = self.request.headers
+        return encode_payload(
+            data,
+            fmt=negotiate_format(headers.get("Accept")),
+            encoding=negotiate_encoding(headers.get("Accept-Encoding")))
+
+    @gen.coroutine
+    def compute_and_finish(self, argnames, compute):
+        """Respond with the result of compute, run in the executor.
+
+        Notebook arguments in argnames that are URLs are fetched first.
+        """
+        yield self.fetch_remote_arguments(argnames)
+        try:
+            body, headers = yield self.run_in_executor(self.compute_payload, compute)
+        except _cancelled_errors:
+            # Client disconnected before the computation started
+            return
+        self.set_cache_headers()
+        for name, value in headers.items():
+            self.set_header(name, value)
+        self.set_header("Vary", "Accept, Accept-Encoding")
+        self.finish(body)
+
+    def set_cache_headers(self):
+        "Report cache usage of the request in response headers."
+        if self.cache_status:
+            self.set_header("X-Nbdime-Notebook-Cache", ", ".join(self.cache_status))
+        if self.result_cache_status:
+            self.set_header("X-Nbdime-Result-Cache", self.result_cache_status)
+
+    def get_output_filename(self):
+        "Get the file to store the merge result to, or None."
+        session = self.settings["session"]
+        if session is not None:
+            # The merge git is waiting for
+            f = session.pending()
+            return f.output if f is not None else None
+        return self.params.get("outputfilename", None)
+
+    @gen.coroutine
+    def render_session_file(self, template):
+        """Render the tool page of a file of the tool session.
+
+        The file is given by the "file" query argument, waiting for git
+        to pass it in if needed. The next file is prefetched.
+        """
+        session = self.settings["session"]
+        try:
+            index = int(self.get_argument("file", 0))
+        except ValueError:
+            raise web.HTTPError(400, "Expecting an integer file index.")
+        f = yield session.wait_for(index)
+        if f is None:
+            raise web.HTTPError(404, "The session has ended.")
+        session.viewed = index
+        session.touch()
+        prefetch_session_file(self.application, index + 1)
+
+        args = self.base_args()
+        # Navigating between files must not close the tool
+        args["closable"] = False
+        args["savable"] = f.output is not None and f is session.pending()
+        args.update(f.arguments())
+        info = {
+            "index": index,
+            "name": f.name,
+            "pending": not f.resolved.done(),
+            }
+        self.render(template, config_data=args, base_url=self.base_url,
+                    session=info)
 
 
 class MainHandler(NbdimeApiHandler):
@@ -106,7 +306,11 @@ class MainDiffHandler(NbdimeApiHandler):
 
 
 class MainDifftoolHandler(NbdimeApiHandler):
+    @gen.coroutine
     def get(self):
+        if self.settings["session"] is not None:
+            yield self.render_session_file("difftool.html")
+            return
         args = self.base_args()
         if "difftool_args" in self.params:
             args["base"] = self.params["difftool_args"]["base"]
@@ -114,7 +318,8 @@ class MainDifftoolHandler(NbdimeApiHandler):
         else:
             args["base"] = self.get_argument("base", "")
             args["remote"] = self.get_argument("remote", "")
-        self.render("difftool.html", config_data=args, base_url=self.base_url)
+        self.render("difftool.html", config_data=args, base_url=self.base_url,
+                    session=None)
 
 
 class MainMergeHandler(NbdimeApiHandler):
@@ -127,7 +332,11 @@ class MainMergeHandler(NbdimeApiHandler):
 
 
 class MainMergetoolHandler(NbdimeApiHandler):
+    @gen.coroutine
     def get(self):
+        if self.settings["session"] is not None:
+            yield self.render_session_file("mergetool.html")
+            return
         args = self.base_args()
         if "mergetool_args" in self.params:
             args["base"] = self.params["mergetool_args"]["base"]
@@ -137,16 +346,22 @@ class MainMergetoolHandler(NbdimeApiHandler):
             args["base"] = self.get_argument("base", "")
             args["local"] = self.get_argument("local", "")
             args["remote"] = self.get_argument("remote", "")
-        self.render("mergetool.html", config_data=args, base_url=self.base_url)
+        self.render("mergetool.html", config_data=args, base_url=self.base_url,
+                    session=None)
 
 
 class ApiDiffHandler(NbdimeApiHandler):
+    @gen.coroutine
     def post(self):
-        base_nb = self.get_notebook_argument("base")
-        remote_nb = self.get_notebook_argument("remote")
+        yield self.compute_and_finish(["base", "remote"], self.compute_diff)
+
+    def compute_diff(self):
+        base_nb, base_digest = self.get_notebook_argument("base")
+        remote_nb, remote_digest = self.get_notebook_argument("remote")
 
         try:
-            thediff = nbdime.diff_notebooks(base_nb, remote_nb)
+            thediff = self.get_cached_result(
+                *diff_computation(base_nb, base_digest, remote_nb, remote_digest))
         except Exception:
             nbdime.log.exception("Error diffing documents:")
             raise web.HTTPError(500, "Error while attempting to diff documents")
@@ -155,23 +370,76 @@ class ApiDiffHandler(NbdimeApiHandler):
             "base": base_nb,
             "diff": thediff,
             }
-        self.finish(data)
+        return data
+
+
+class ApiPagedDiffHandler(NbdimeApiHandler):
+    """Base class for the paged diff API.
+
+    The lazily computed diff is kept in the result cache, so that later
+    requests for ranges of cells reuse the alignment and cell diffs
+    computed by earlier requests.
+    """
+    def get_paged_diff(self):
+        base_nb, base_digest = self.get_notebook_argument("base")
+        remote_nb, remote_digest = self.get_notebook_argument("remote")
+        try:
+            # The cell diffs are cached with the other results
+            return self.get_cached_result(
+                ("paged-diff", base_digest, remote_digest),
+                lambda: PagedNotebookDiff(
+                    base_nb, remote_nb, cache=self.settings["result_cache"],
+                    key=("paged-cell-diff", base_digest, remote_digest)),
+                size=lambda paged: paged.size)
+        except Exception:
+            nbdime.log.exception("Error diffing documents:")
+            raise web.HTTPError(500, "Error while attempting to diff documents")
+
+
+class ApiDiffSummaryHandler(ApiPagedDiffHandler):
+    @gen.coroutine
+    def post(self):
+        yield self.compute_and_finish(["base", "remote"], self.compute_summary)
+
+    def compute_summary(self):
+        return self.get_paged_diff().summary()
+
+
+class ApiDiffCellsHandler(ApiPagedDiffHandler):
+    @gen.coroutine
+    def post(self):
+        yield self.compute_and_finish(["base", "remote"], self.compute_cells)
+
+    def compute_cells(self):
+        start = self.body.get("start", 0)
+        stop = self.body.get("stop")
+        if not isinstance(start, int) or not isinstance(stop, int):
+            raise web.HTTPError(400, "Expecting integer start and stop.")
+        if not 0 <= start <= stop:
+            raise web.HTTPError(400, "Expecting 0 <= start <= stop.")
+        paged = self.get_paged_diff()
+        try:
+            cells = paged.cells(start, stop)
+        except Exception:
+            nbdime.log.exception("Error diffing documents:")
+            raise web.HTTPError(500, "Error while attempting to diff documents")
+        return {"cells": cells}
 
 
 class ApiMergeHandler(NbdimeApiHandler):
+    @gen.coroutine
     def post(self):
-        base_nb = self.get_notebook_argument("base")
-        local_nb = self.get_notebook_argument("local")
-        remote_nb = self.get_notebook_argument("remote")
-        merge_args = self.settings.get('merge_args')
-        if merge_args is None:
-            merge_args = build_merge_parser().parse_args(["", "", ""])
-            merge_args.merge_strategy = 'mergetool'
-            self.settings['merge_args'] = merge_args
+        yield self.compute_and_finish(["base", "local", "remote"], self.compute_merge)
+
+    def compute_merge(self):
+        base_nb, base_digest = self.get_notebook_argument("base")
+        local_nb, local_digest = self.get_notebook_argument("local")
+        remote_nb, remote_digest = self.get_notebook_argument("remote")
 
         try:
-            decisions = decide_notebook_merge(base_nb, local_nb, remote_nb,
-                                              args=merge_args)
+            decisions = self.get_cached_result(*merge_computation(
+                self.settings, base_nb, base_digest, local_nb, local_digest,
+                remote_nb, remote_digest))
         except Exception:
             nbdime.log.exception("Error merging documents:")
             raise web.HTTPError(500, "Error while attempting to merge documents")
@@ -180,32 +448,85 @@ class ApiMergeHandler(NbdimeApiHandler):
             "base": base_nb,
             "merge_decisions": decisions
             }
-        self.finish(data)
+        return data
 
 
 class ApiMergeStoreHandler(NbdimeApiHandler):
+    """Stores the merge result submitted by the client.
+
+    The merged notebook is either sent in full as "merged", or as a
+    "diff" against the notebook named by "base", or against the last
+    notebook stored by this server, identified by its digest as
+    "parent". The response holds the digest of the stored notebook.
+    """
+    @gen.coroutine
     def post(self):
         # I don't think we want to accept arbitrary filenames
         # to write to from the http request, only allowing
         # this operation if the server was run with an output
         # filename as a commandline argument:
-        fn = self.params.get("outputfilename", None)
+        fn = self.get_output_filename()
         if not fn:
             raise web.HTTPError(400, "Server does not accept storing merge result.")
         path = os.path.join(self.params["cwd"], fn)
 
-        body = json.loads(escape.to_unicode(self.request.body))
-        merged = body["merged"]
-        # TODO: Remove when merged notebook generation is verified to work as intended:
-        from pprint import pprint
-        pprint(merged)
+        if "diff" in self.body and "parent" not in self.body:
+            yield self.fetch_remote_arguments(["base"])
+        try:
+            digest = yield self.run_in_executor(self.store_merge, path)
+        except _cancelled_errors:
+            # Client disconnected before the save started
+            return
+        self.finish({"digest": digest})
+
+    def store_merge(self, path):
+        store = self.settings["merge_store"]
+        parent = None
+        if "merged" in self.body:
+            merged = self.body["merged"]
+        elif "diff" in self.body:
+            if "parent" in self.body:
+                parent = self.body["parent"]
+                before = store.get(path, parent)
+                if before is None:
+                    raise web.HTTPError(409, "Merge result has changed since %s." % parent)
+            else:
+                before, _ = self.get_notebook_argument("base")
+            try:
+                merged = nbdime.patch(before, to_diffentry_dicts(self.body["diff"]))
+            except Exception:
+                raise web.HTTPError(400, "Invalid diff of merge result.")
+        else:
+            raise web.HTTPError(400, "Expecting a merged notebook or a diff.")
         merged_nb = nbformat.from_dict(merged)
         # Somehow store unsolved conflicts?
-        # conflicts = body["conflicts"]
+        # conflicts = self.body["conflicts"]
 
-        with io.open(path, "w", encoding="utf8") as f:
-            nbformat.write(merged_nb, f)
-        self.finish()
+        try:
+            return store.store(path, merged_nb, parent=parent)
+        except StaleParentError as e:
+            raise web.HTTPError(409, str(e))
+
+
+class ApiBlobHandler(NbdimeApiHandler):
+    """Serves large output values moved out of API responses.
+
+    Blobs are addressed by the digest of their contents, and so can
+    be cached by clients forever.
+    """
+    def get(self, digest):
+        etag = '"%s"' % digest
+        self.set_header("Etag", etag)
+        self.set_header("Cache-Control", "public, max-age=31536000, immutable")
+        if self.check_etag_header():
+            # Contents of a digest never change, no need to look it up
+            self.set_status(304)
+            return
+        data = self.settings["blob_store"].get(digest)
+        if data is None:
+            raise web.HTTPError(404, "Unknown blob.")
+        self.set_header("Content-Type", "text/plain; charset=utf-8")
+        self.finish(data)
 
 
 class ApiCloseHandler(NbdimeApiHandler):
@@ -217,12 +538,139 @@ class ApiCloseHandler(NbdimeApiHandler):
 
         # Fail if no exit code is supplied:
         self.application.exit_code = int(self.request.headers.get("exit_code", 1))
+        session = self.settings["session"]
+        if session is not None:
+            session.close(self.application.exit_code)
 
         _logger.info("Closing server on remote request")
         self.finish()
         ioloop.IOLoop.current().stop()
 
 
+class ApiSessionResolveHandler(NbdimeApiHandler):
+    """Lets git continue after a file of a mergetool session.
+
+    The request gives the index of the file and the exit code for git.
+    """
+    def post(self):
+        session = self.settings["session"]
+        if session is None:
+            raise web.HTTPError(400, "Server is not running a tool session.")
+        index = self.body.get("file")
+        exit_code = self.body.get("exit_code", 1)
+        if (not isinstance(index, int) or not isinstance(exit_code, int) or
+                not 0 <= index < len(session.files)):
+            raise web.HTTPError(400, "Expecting a file index and exit code.")
+        session.resolve(index, exit_code)
+        self.finish({})
+
+
+# Default cache limits in megabytes
+default_notebook_cache_size = 256
+default_result_cache_size = 64
+
+
+def _megabytes(size, default):
+    if size is None:
+        size = default
+    return int(size * 1024 * 1024)
+
+
+def _json_size(result):
+    return len(json.dumps(result))
+
+
+def diff_computation(base_nb, base_digest, remote_nb, remote_digest):
+    "Get the result cache key and compute function of a notebook diff."
+    return (("diff", base_digest, remote_digest),
+            lambda: nbdime.diff_notebooks(base_nb, remote_nb))
+
+
+def merge_computation(settings, base_nb, base_digest, local_nb, local_digest,
+                      remote_nb, remote_digest):
+    """Get the result cache key and compute function of notebook merge decisions.
+
+    The notebooks come from the shared notebook cache, so they are
+    merged as interned copies, leaving the cached notebooks unchanged.
+    """
+    return (("merge", base_digest, local_digest, remote_digest),
+            lambda: decide_notebook_merge(
+                *intern_notebook_copies(base_nb, local_nb, remote_nb),
+                args=settings["merge_args"]))
+
+
+def _mergetool_args():
+    merge_args = build_merge_parser().parse_args(["", "", ""])
+    merge_args.merge_strategy = 'mergetool'
+    return merge_args
+
+
+def precompute(app, **params):
+    """Start computing the diff or merge of a tool server in the background.
+
+    The arguments of the difftool and mergetool are known when the
+    server starts, so their result can be computed while the browser
+    is loading the page. Requests for the result while it is being
+    computed wait for this computation rather than starting another.
+
+    Returns the future of the computation, or None if there is nothing
+    to compute. Failures are only logged, and reported again when the
+    result is requested.
+    """
+    settings = app.settings
+    cache = settings["notebook_cache"]
+    session = settings["session"]
+
+    def read(arg):
+        data = session.lookup(arg) if session is not None else None
+        if data is not None:
+            return cache.reads(data)[:2]
+        return cache.read(os.path.join(params["cwd"], arg))[:2]
+
+    if params.get("difftool_args"):
+        args = params["difftool_args"]
+
+        def compute():
+            notebooks = read(args["base"]) + read(args["remote"])
+            key, fn = diff_computation(*notebooks)
+            settings["result_cache"].get_or_compute(key, fn, size=_json_size)
+    elif params.get("mergetool_args"):
+        args = params["mergetool_args"]
+
+        def compute():
+            notebooks = read(args["base"]) + read(args["local"]) + read(args["remote"])
+            key, fn = merge_computation(settings, *notebooks)
+            settings["result_cache"].get_or_compute(key, fn, size=_json_size)
+    else:
+        return None
+
+    def done(future):
+        if not future.cancelled() and future.exception() is not None:
+            _logger.debug("Precomputation failed: %s", future.exception())
+
+    try:
+        future = settings["executor"].submit(compute)
+    except QueueFull:
+        return None
+    future.add_done_callback(done)
+    return future
+
+
+def prefetch_session_file(app, index):
+    """Start computing the diff or merge of file index of the tool session.
+
+    Only the file the user is looking at and the one after it are
+    prefetched, so that files received in a batch from git do not
+    keep the executor busy.
+    """
+    session = app.settings["session"]
+    if index >= len(session.files) or index > session.viewed + 1:
+        return None
+    f = session.files[index]
+    tool_args = {"%stool_args" % f.kind: f.arguments()}
+    return precompute(app, cwd=".", **tool_args)
+
+
 def make_app(**params):
     handlers = [
         (r"/", MainHandler, params),
@@ -231,15 +679,40 @@ def make_app(**params):
         (r"/merge", MainMergeHandler, params),
         (r"/mergetool", MainMergetoolHandler, params),
         (r"/api/diff", ApiDiffHandler, params),
+        (r"/api/diff/summary", ApiDiffSummaryHandler, params),
+        (r"/api/diff/cells", ApiDiffCellsHandler, params),
         (r"/api/merge", ApiMergeHandler, params),
         (r"/api/store", ApiMergeStoreHandler, params),
+        (r"/api/blob/([0-9a-f]+)", ApiBlobHandler, params),
+        (r"/api/session/resolve", ApiSessionResolveHandler, params),
         (r"/api/closetool", ApiCloseHandler, params),
         (r"/static", web.StaticFileHandler, {"path": static_path}),
     ]
 
+    if params.get("workers") is None and params.get("max_queue") is None:
+        # Without limits of its own, the app shares the executor of
+        # nbdime.aio
+        executor = shared_executor()
+    else:
+        executor = BoundedExecutor(max_workers=params.get("workers"),
+                                   max_queue=params.get("max_queue"))
+
     settings = {
         "static_path": static_path,
         "template_path": template_path,
+        "executor": executor,
+        "request_timeout": params.get("request_timeout"),
+        "notebook_cache": NotebookCache(_megabytes(
+            params.get("notebook_cache_size"), default_notebook_cache_size)),
+        "result_cache": LRUCache(_megabytes(
+            params.get("result_cache_size"), default_result_cache_size)),
+        "fetcher": NotebookFetcher(timeout=params.get("fetch_timeout"),
+                                   max_size=params.get("fetch_max_size")),
+        "blob_store": BlobStore(threshold=params.get("blob_threshold"),
+                                max_size=params.get("blob_store_size")),
+        "merge_store": MergeStore(),
+        "merge_args": _mergetool_args(),
+        "session": params.get("session"),
         }
 
     if nbdime.utils.is_in_repo(nbdime.__file__):
@@ -253,6 +726,10 @@ def make_app(**params):
 
     app = web.Application(handlers, **settings)
     app.exit_code = 0
+    session = settings["session"]
+    if session is not None:
+        session.add_callbacks.append(
+            lambda f: prefetch_session_file(app, f.index))
     return app
 
 
@@ -261,6 +738,9 @@ def main_server(on_port=None, closable=False, **params):
     params.update({"closable": closable})
     port = params.pop("port")
     app = make_app(**params)
+    # Computations started with nbdime.aio share the limits of the server
+    set_shared_executor(app.settings["executor"])
+    precompute(app, **params)
     if port != 0 or on_port is None:
         app.listen(port, address='127.0.0.1')
     else:
@@ -293,7 +773,8 @@ def main(args=None):
         args = sys.argv[1:]
     arguments = _build_arg_parser().parse_args(args)
     nbdime.log.init_logging(level=arguments.log_level)
-    return main_server(port=arguments.port, cwd=arguments.workdirectory)
+    return main_server(port=arguments.port, cwd=arguments.workdirectory,
+                       **args_for_server(arguments))
 
 
 if __name__ == "__main__":
@@ -12,7 +12,9 @@ import threading
 
 from ..args import add_generic_args, add_filename_args
 from ..args import add_diff_args, add_merge_args, add_web_args
+from ..args import args_for_server, diff_config_from_args
 from .nbdimeserver import main_server as run_server
+from ..config import set_default_config
 import nbdime.log
 
 
@@ -61,8 +63,11 @@ def browse(port, browsername):
 def main(args=None):
     if args is None:
         args = sys.argv[1:]
-    arguments = build_arg_parser().parse_args()
+    parser = build_arg_parser()
+    arguments = parser.parse_args(args)
     nbdime.log.init_logging(level=arguments.log_level)
+    # The server diffs with the default config
+    set_default_config(diff_config_from_args(arguments, parser))
     port = arguments.port
     cwd = arguments.workdirectory
     base = arguments.base
@@ -74,7 +79,8 @@ def main(args=None):
                       closable=True,
                       mergetool_args=dict(base=base, local=local, remote=remote),
                       outputfilename=merged,
-                      on_port=lambda port: browse(port, browsername))
+                      on_port=lambda port: browse(port, browsername),
+                      **args_for_server(arguments))
 
 
 if __name__ == "__main__":
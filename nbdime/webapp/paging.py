@@ -0,0 +1,142 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Paged notebook diffs for the web API.
+
+Instead of sending the full base notebook and the full diff in one
+response, the paged API first sends a cell level summary of the diff,
+and the client then requests the contents of ranges of cells as they
+are needed. Only the alignment of cells is computed up front, while
+the diffs of individual cells are computed on request and kept in a
+size limited cache.
+"""
+
+from __future__ import unicode_literals
+
+import json
+
+from ..cache import LRUCache
+from ..diffing import diff
+from ..diffing.notebooks import (align_cells, diff_single_cells,
+    notebook_predicates, notebook_differs)
+
+
+__all__ = ["PagedNotebookDiff"]
+
+
+# Characters of JSON of the cell diffs kept when no cache is given
+default_cell_diff_cache_size = 2**26
+
+
+def _json_size(value):
+    return len(json.dumps(value))
+
+
+class PagedNotebookDiff(object):
+    """Lazily computed diff of two notebooks, split into rows of cells.
+
+    Each row is one of:
+
+    - "unchanged": a base cell matched with an equal remote cell
+    - "modified": a base cell matched with a changed remote cell
+    - "removed": a base cell that is deleted
+    - "added": a remote cell that is inserted
+
+    The rows are in the order the cells appear in the diff, and rows
+    with a base cell are ordered by base cell index.
+
+    The diffs of modified rows are stored in `cache`, an LRUCache that
+    may be shared with other results, under the key `key + (row,)`.
+    Without a cache, a private one is used.
+    """
+
+    def __init__(self, base, remote, cache=None, key=()):
+        self.base = base
+        self.remote = remote
+        if cache is None:
+            cache = LRUCache(default_cell_diff_cache_size)
+        self._cell_diffs = cache
+        self._key = tuple(key)
+
+        # Diff everything except the cells right away, it's small
+        a = {k: v for k, v in base.items() if k != "cells"}
+        b = {k: v for k, v in remote.items() if k != "cells"}
+        self.notebook_diff = diff(a, b, path="", predicates=notebook_predicates,
+                                  differs=notebook_differs)
+
+        acells = base["cells"]
+        bcells = remote["cells"]
+        self._base_sizes = [_json_size(c) for c in acells]
+        self._remote_sizes = [_json_size(c) for c in bcells]
+        # Rough estimate of memory held, for caching purposes
+        self.size = sum(self._base_sizes) + sum(self._remote_sizes)
+
+        self.rows = []
+        snakes = align_cells(acells, bcells)
+        i0, j0 = 0, 0
+        for i, j, n in snakes + [(len(acells), len(bcells), 0)]:
+            for k in range(i0, i):
+                self.rows.append(("removed", k, None))
+            for k in range(j0, j):
+                self.rows.append(("added", None, k))
+            for k in range(n):
+                if acells[i + k] == bcells[j + k]:
+                    status = "unchanged"
+                else:
+                    status = "modified"
+                self.rows.append((status, i + k, j + k))
+            i0, j0 = i + n, j + n
+
+    def summary(self):
+        """Summarize the diff without the contents of the cells.
+
+        The summary includes the notebook level diff (everything but
+        cells), the status of each row and the JSON size of its cells.
+        """
+        rows = []
+        for status, i, j in self.rows:
+            row = {"status": status, "base_index": i, "remote_index": j}
+            if i is not None:
+                row["base_size"] = self._base_sizes[i]
+            if j is not None:
+                row["remote_size"] = self._remote_sizes[j]
+            rows.append(row)
+        base = {k: v for k, v in self.base.items() if k != "cells"}
+        return {
+            "base": base,
+            "notebook_diff": self.notebook_diff,
+            "cells": rows,
+            }
+
+    def cell_diff(self, row):
+        "Get the diff of the cells of a modified row, computing it if needed."
+        status, i, j = self.rows[row]
+        assert status == "modified"
+        d, _ = self._cell_diffs.get_or_compute(
+            self._key + (row,),
+            lambda: diff_single_cells(self.base["cells"][i],
+                                      self.remote["cells"][j]),
+            size=_json_size)
+        return d
+
+    def cells(self, start, stop):
+        """Get the contents of rows start to stop (exclusive).
+
+        Each row includes the base cell if there is one, the remote cell
+        if it was added, and the cell diff if it was modified.
+        """
+        result = []
+        for row in range(start, min(stop, len(self.rows))):
+            status, i, j = self.rows[row]
+            item = {"row": row, "status": status,
+                    "base_index": i, "remote_index": j}
+            if i is not None:
+                item["base"] = self.base["cells"][i]
+            if status == "added":
+                item["remote"] = self.remote["cells"][j]
+            elif status == "modified":
+                item["diff"] = self.cell_diff(row)
+            result.append(item)
+        return result
@@ -0,0 +1,99 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Storing of merge results submitted to the web server.
+
+Each stored notebook is identified by the digest of the written file.
+The last notebook stored to each path is kept in memory, so that the
+client can later submit only a diff against it instead of uploading
+the whole notebook again.
+"""
+
+from __future__ import unicode_literals
+
+import io
+import os
+import shutil
+import threading
+import uuid
+
+import nbformat
+
+from ..cache import content_digest
+
+
+__all__ = ["MergeStore", "StaleParentError", "write_atomic"]
+
+
+try:
+    _replace = os.replace
+except AttributeError:
+    # Python 2, atomic on POSIX only
+    _replace = os.rename
+
+
+def write_atomic(path, data, mode=0o666):
+    """Write bytes to path, replacing the file atomically.
+
+    The data is written to a temporary file next to path, which is
+    then renamed to path, so readers never see a partially written
+    file. The mode of an existing file is preserved, new files are
+    created with `mode` (subject to the umask).
+    """
+    tmp = "%s.%s.tmp" % (path, uuid.uuid4().hex[:8])
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    fd = os.open(tmp, flags, mode)
+    try:
+        with io.open(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp)
+        _replace(tmp, path)
+    except:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class StaleParentError(Exception):
+    """Raised when a save is based on a notebook that is no longer stored."""
+    pass
+
+
+class MergeStore(object):
+    """Writes merge results, remembering the last one written to each path."""
+
+    def __init__(self):
+        self._saved = {}
+        self._lock = threading.Lock()
+
+    def get(self, path, digest):
+        "Get the notebook last stored to path if it has digest, or None."
+        saved = self._saved.get(path)
+        if saved is not None and saved[0] == digest:
+            return saved[1]
+        return None
+
+    def store(self, path, nb, parent=None):
+        """Write notebook nb to path, returning the digest of the file.
+
+        If `parent` is given, the write only succeeds if the notebook
+        currently stored to path has that digest, otherwise
+        StaleParentError is raised.
+        """
+        s = nbformat.writes(nb)
+        if not s.endswith("\n"):
+            s += "\n"
+        data = s.encode("utf8")
+        digest = content_digest(data)
+        with self._lock:
+            if parent is not None and self.get(path, parent) is None:
+                raise StaleParentError(
+                    "Notebook %s has changed since %s." % (path, parent))
+            write_atomic(path, data)
+            self._saved[path] = (digest, nb)
+        return digest
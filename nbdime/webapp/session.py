@@ -0,0 +1,326 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Review of many notebooks from git in a single tool session.
+
+git difftool and git mergetool run their tool once per file. In session
+mode the first run starts one long-lived server, and every run hands
+its notebooks to that server over a local socket (see sessionclient).
+The user steps through the files in one browser page, while the diff
+of the next file is computed in the background.
+
+Notebooks received from git are referred to in API requests by
+references on the form "nbdime-session/<index>/<role>".
+"""
+
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import logging
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import time
+import uuid
+from argparse import ArgumentParser
+
+import nbformat
+from tornado import gen, ioloop, locks, netutil
+from tornado.concurrent import Future
+from tornado.iostream import StreamClosedError
+from tornado.tcpserver import TCPServer
+
+import nbdime.log
+from ..args import add_generic_args, add_web_args, args_for_server
+from .saving import write_atomic
+
+
+__all__ = ["ToolSession", "SessionSocketServer"]
+
+
+_logger = logging.getLogger(__name__)
+
+
+reference_prefix = "nbdime-session"
+
+# Roles of the notebooks of each kind of file
+session_roles = {
+    "diff": ("base", "remote"),
+    "merge": ("base", "local", "remote"),
+    }
+
+# Stands in for the missing side of added and deleted files
+empty_notebook = nbformat.writes(nbformat.v4.new_notebook()).encode("utf8")
+
+# Defaults for session servers
+default_idle_timeout = 3600  # seconds
+default_max_message_size = 512  # megabytes
+
+
+class SessionFile(object):
+    """A diff or merge received from git."""
+
+    def __init__(self, index, kind, name, notebooks, output=None):
+        self.index = index
+        self.kind = kind
+        self.name = name
+        self.notebooks = notebooks
+        self.output = output
+        # Resolved with the exit code to give git
+        self.resolved = Future()
+
+    def reference(self, role):
+        return "%s/%d/%s" % (reference_prefix, self.index, role)
+
+    def arguments(self):
+        "The references to the notebooks of this file, by role."
+        return {role: self.reference(role) for role in self.notebooks}
+
+
+class ToolSession(object):
+    """The files received from git in a difftool or mergetool session.
+
+    Must only be used from the IOLoop thread. The callbacks in
+    `add_callbacks` are called with each new file.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.files = []
+        self.closed = False
+        # Index of the file the user is looking at
+        self.viewed = 0
+        self.last_activity = time.time()
+        self.add_callbacks = []
+        self._changed = locks.Condition()
+
+    def add(self, name, notebooks, output=None):
+        """Add a file with notebooks given as bytes by role.
+
+        Empty notebooks, sent for files git adds or deletes, are
+        replaced by an empty notebook.
+        """
+        notebooks = {role: data or empty_notebook
+                     for role, data in notebooks.items()}
+        f = SessionFile(len(self.files), self.kind, name, notebooks, output)
+        self.files.append(f)
+        if self.kind == "diff":
+            # Nothing for git to wait for
+            f.resolved.set_result(0)
+        self.touch()
+        self._changed.notify_all()
+        for callback in self.add_callbacks:
+            callback(f)
+        return f
+
+    def touch(self):
+        self.last_activity = time.time()
+
+    def lookup(self, reference):
+        "Get the notebook bytes referred to by reference, or None."
+        parts = reference.split("/")
+        if len(parts) != 3 or parts[0] != reference_prefix:
+            return None
+        try:
+            f = self.files[int(parts[1])]
+        except (ValueError, IndexError):
+            return None
+        return f.notebooks.get(parts[2])
+
+    def pending(self):
+        "Get the first file git is still waiting for, or None."
+        for f in self.files:
+            if not f.resolved.done():
+                return f
+        return None
+
+    def resolve(self, index, exit_code):
+        "Let git continue after file index, with the given exit code."
+        f = self.files[index]
+        if not f.resolved.done():
+            f.resolved.set_result(exit_code)
+        self.touch()
+
+    @gen.coroutine
+    def wait_for(self, index):
+        """Wait until file index has been received.
+
+        Returns the file, or None if the session is closed first.
+        """
+        while index >= len(self.files) and not self.closed:
+            yield self._changed.wait()
+        raise gen.Return(self.files[index] if index < len(self.files) else None)
+
+    def close(self, exit_code=1):
+        "End the session, resolving files git still waits for with exit_code."
+        self.closed = True
+        for f in self.files:
+            if not f.resolved.done():
+                f.resolved.set_result(exit_code)
+        self._changed.notify_all()
+
+
+class SessionSocketServer(TCPServer):
+    """Receives files for a session from the git tools.
+
+    Each connection carries one request line of JSON on the form
+
+        {"token": ..., "name": ..., "notebooks": {role: text}, "output": ...}
+
+    answered with a line {"index": ..., "exit_code": ...} once git can
+    continue, that is right away for diffs and when the user has
+    resolved the merge for merges.
+    """
+
+    def __init__(self, session, token, max_size=None):
+        if max_size is None:
+            max_size = default_max_message_size
+        self.max_size = int(max_size * 1024 * 1024)
+        super(SessionSocketServer, self).__init__(max_buffer_size=self.max_size)
+        self.session = session
+        self.token = token
+
+    @gen.coroutine
+    def handle_stream(self, stream, address):
+        try:
+            line = yield stream.read_until(b"\n", max_bytes=self.max_size)
+            try:
+                reply = yield self.handle_message(json.loads(line.decode("utf8")))
+            except (ValueError, KeyError, TypeError) as e:
+                reply = {"error": "Invalid request: %s" % e}
+            yield stream.write(json.dumps(reply).encode("utf8") + b"\n")
+        except StreamClosedError:
+            # The git tool was interrupted
+            pass
+        finally:
+            stream.close()
+
+    @gen.coroutine
+    def handle_message(self, message):
+        if message.get("token") != self.token:
+            raise gen.Return({"error": "Invalid session token."})
+        if self.session.closed:
+            raise gen.Return({"error": "Session is closed."})
+        if message["kind"] != self.session.kind:
+            raise gen.Return({"error": "Expecting a %s." % self.session.kind})
+        notebooks = message["notebooks"]
+        if sorted(notebooks) != sorted(session_roles[self.session.kind]):
+            raise gen.Return({"error": "Unexpected notebooks."})
+        f = self.session.add(
+            message.get("name"),
+            {role: text.encode("utf8") for role, text in notebooks.items()},
+            output=message.get("output"))
+        exit_code = yield f.resolved
+        raise gen.Return({"index": f.index, "exit_code": exit_code})
+
+
+def listen(session, token):
+    """Start a socket server for the session.
+
+    Listens on a Unix socket in a private directory where supported,
+    and on a local TCP port otherwise. Returns a tuple (server, info)
+    where info is the address for the session file.
+    """
+    server = SessionSocketServer(session, token)
+    if hasattr(socket, "AF_UNIX"):
+        directory = tempfile.mkdtemp(prefix="nbdime-")
+        path = os.path.join(directory, "session.sock")
+        server.add_socket(netutil.bind_unix_socket(path, mode=0o600))
+        info = {"unix": path}
+    else:
+        sockets = netutil.bind_sockets(0, "127.0.0.1")
+        server.add_sockets(sockets)
+        info = {"port": sockets[0].getsockname()[1]}
+    info["token"] = token
+    info["pid"] = os.getpid()
+    return server, info
+
+
+def remove_session_file(path, token):
+    "Remove the session file at path, unless another session has replaced it."
+    try:
+        with open(path, "rb") as f:
+            if json.loads(f.read().decode("utf8")).get("token") == token:
+                os.remove(path)
+    except (IOError, OSError, ValueError):
+        pass
+
+
+def build_arg_parser():
+    """
+    Creates an argument parser for session servers.
+    """
+    description = 'Server for nbdime difftool and mergetool sessions.'
+    parser = ArgumentParser(description=description)
+    add_generic_args(parser)
+    add_web_args(parser, 0)
+    parser.add_argument(
+        'kind',
+        choices=('diff', 'merge'),
+        help="whether the session is for the difftool or the mergetool.")
+    parser.add_argument(
+        '--session-file',
+        required=True,
+        help="file to write the address of the session to.")
+    parser.add_argument(
+        '--idle-timeout',
+        default=default_idle_timeout,
+        type=float,
+        help="seconds without activity after which the session ends. "
+             "Default is %d." % default_idle_timeout)
+    return parser
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    arguments = build_arg_parser().parse_args(args)
+    nbdime.log.init_logging(level=arguments.log_level)
+
+    from .nbdimeserver import main_server as run_server
+    if arguments.kind == "diff":
+        from .nbdifftool import browse
+    else:
+        from .nbmergetool import browse
+
+    token = uuid.uuid4().hex
+    session = ToolSession(arguments.kind)
+    server, info = listen(session, token)
+
+    def on_port(port):
+        def open_first(f):
+            if f.index == 0:
+                browse(port, arguments.browser)
+        session.add_callbacks.append(open_first)
+        info["url"] = "http://127.0.0.1:%d/%stool" % (port, arguments.kind)
+        write_atomic(arguments.session_file,
+                     json.dumps(info).encode("utf8"), mode=0o600)
+
+    def check_idle():
+        idle = time.time() - session.last_activity
+        if idle > arguments.idle_timeout and session.pending() is None:
+            _logger.info("Closing idle session")
+            session.close()
+            ioloop.IOLoop.current().stop()
+
+    checker = ioloop.PeriodicCallback(check_idle, 10000)
+    checker.start()
+    try:
+        return run_server(port=arguments.port, cwd=arguments.workdirectory,
+                          closable=True, session=session, on_port=on_port,
+                          **args_for_server(arguments))
+    finally:
+        checker.stop()
+        server.stop()
+        if "unix" in info:
+            shutil.rmtree(os.path.dirname(info["unix"]), ignore_errors=True)
+        remove_session_file(arguments.session_file, token)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
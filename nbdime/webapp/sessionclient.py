@@ -0,0 +1,161 @@
+# coding: utf-8
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+
+"""Client side of difftool and mergetool sessions.
+
+Called by the git tools once for every file git passes in. The files
+are handed to the session server of the repository over a local socket,
+starting the server first if none is running. This module only uses
+the standard library, to keep the per-file start up time low.
+
+The session server writes its address and an access token to a session
+file in the git directory. Messages are single lines of JSON in both
+directions.
+"""
+
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+
+__all__ = ["submit", "session_file_path"]
+
+
+# Time to wait for a newly started session server
+default_start_timeout = 20
+
+
+def session_file_path(kind, cwd=None):
+    "Path of the session file for a difftool ('diff') or mergetool ('merge') session."
+    git_dir = subprocess.check_output(
+        ["git", "rev-parse", "--git-dir"], cwd=cwd).decode("utf8").strip()
+    git_dir = os.path.join(cwd or os.curdir, git_dir)
+    return os.path.abspath(os.path.join(git_dir, "nbdime-%stool-session.json" % kind))
+
+
+def read_session_file(path):
+    "Read the address and token of a session server, or None."
+    try:
+        with io.open(path, encoding="utf8") as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def connect(info, timeout=None):
+    "Connect to the session server described by info."
+    if info.get("unix") and hasattr(socket, "AF_UNIX"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = info["unix"]
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        address = ("127.0.0.1", info["port"])
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except:
+        sock.close()
+        raise
+    return sock
+
+
+def request(sock, message):
+    "Send a message and wait for the reply line."
+    sock.settimeout(None)
+    sock.sendall(json.dumps(message).encode("utf8") + b"\n")
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b"\n"):
+            break
+    return json.loads(b"".join(chunks).decode("utf8"))
+
+
+def start_server(kind, path, cwd, timeout=default_start_timeout):
+    """Start a session server in the background and wait until it is up.
+
+    Returns the connected socket and session info.
+    """
+    cmd = [sys.executable, "-m", "nbdime.webapp.session", kind,
+           "--session-file", path, "--workdirectory", cwd]
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
+    elif hasattr(os, "setsid"):
+        # Outlive the git command that started the tool
+        kwargs["preexec_fn"] = os.setsid
+    with io.open(os.devnull, "r+b") as devnull:
+        subprocess.Popen(cmd, stdin=devnull, stdout=devnull, stderr=devnull,
+                         close_fds=os.name != "nt", **kwargs)
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        info = read_session_file(path)
+        if info is not None:
+            try:
+                return connect(info, timeout=1), info
+            except (IOError, OSError):
+                pass
+        time.sleep(0.05)
+    raise RuntimeError("Failed to start nbdime session server.")
+
+
+def read_notebook(filename):
+    # git passes /dev/null (or a missing file) for added and deleted
+    # files, sent as empty text for the server to replace with an
+    # empty notebook
+    if not os.path.isfile(filename):
+        return ""
+    with io.open(filename, encoding="utf8") as f:
+        return f.read()
+
+
+def submit(kind, filenames, name=None, output=None, cwd=None):
+    """Hand a diff or merge to the session server, starting it if needed.
+
+    `filenames` maps notebook roles ("base", "remote" and for merges
+    "local") to files. Their contents are sent rather than their names,
+    as git removes temporary files once the tool returns. For merges,
+    the result is written to `output` by the server.
+
+    Diffs return immediately, merges wait until the user has resolved
+    the merge. Returns the exit code for git.
+    """
+    cwd = os.path.abspath(cwd or os.curdir)
+    path = session_file_path(kind, cwd)
+    info = read_session_file(path)
+    sock = None
+    if info is not None:
+        try:
+            sock = connect(info, timeout=1)
+        except (IOError, OSError):
+            # Stale session file of a server that is gone
+            sock = None
+    if sock is None:
+        sock, info = start_server(kind, path, cwd)
+
+    message = {
+        "token": info["token"],
+        "kind": kind,
+        "name": name or filenames.get("remote"),
+        "notebooks": {role: read_notebook(fn) for role, fn in filenames.items()},
+        "output": os.path.abspath(output) if output else None,
+        }
+    try:
+        reply = request(sock, message)
+    finally:
+        sock.close()
+    if "error" in reply:
+        sys.stderr.write("nbdime session: %s\n" % reply["error"])
+    return reply.get("exit_code", 1)
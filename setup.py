@@ -234,7 +234,6 @@ install_requires = setuptools_args['install_requires'] = [
     'six',
     'colorama',
     'tornado',
-    'requests'
 ]
 
 extras_require = setuptools_args['extras_require'] = {
@@ -252,6 +251,7 @@ extras_require = setuptools_args['extras_require'] = {
 
     ':python_version == "2.7"': [
         'backports.shutil_which',
+        'futures',
     ],
 }
 